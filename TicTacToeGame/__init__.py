@@ -1,4 +1,23 @@
-from .loops import *
-from .main import mainTTTLoop
+from importlib import import_module
 
-__all__ = ["loops", "structs", "setup", "mainTTTLoop"]
\ No newline at end of file
+
+__all__ = ["loops", "structs", "setup", "core", "mainTTTLoop"]
+
+# What the game modules export, loaded on first use. Importing the package (or the headless core in
+# TicTacToeGame.core, or the searches) then never pulls in pygame, for example in the AI's worker processes
+_lazyAttributes = {
+    "mainTTTLoop": ".main",
+    "gameOverLoop": ".loops",
+    "gameplayLoop": ".loops",
+    "settingsLoop": ".loops",
+}
+
+
+def __getattr__(name):
+    if name in _lazyAttributes:
+        return getattr(import_module(_lazyAttributes[name], __name__), name)
+
+    if name in __all__:
+        return import_module(f".{name}", __name__)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
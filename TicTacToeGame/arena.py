@@ -0,0 +1,395 @@
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations
+from math import log10, sqrt
+from time import perf_counter
+
+import numpy as np
+
+from . import mcts as mctsModule
+from .bitboard import BitBoard, getBitIndices
+from .search import Search
+from .transposition import TranspositionTable
+from .threatSpace import ThreatSpaceSearch
+from .mcts import MCTS, ROLLOUT_POLICIES
+from .setup import THREAT_SEARCH_MIN_CELLS, THREAT_SEARCH_WIN_LENGTHS, THREAT_SEARCH_NODES
+
+
+ARENA_TT_SIZE_MB = 16 # Transposition table of every alpha-beta player in a game. Small, since every game gets new ones
+ARENA_SEED = 2024 # Seed of the openings and of the randomness in every game
+ELO_Z = 1.96 # Width of the confidence intervals in standard errors (95%)
+
+
+class WinOnlyBoard(BitBoard):
+    """BitBoard without the line evaluation: every position that isn't won or lost scores 0,
+    so the search only sees wins, losses and threats."""
+
+    def getLineGain(self, index: int, stones: int) -> int:
+        return 0
+
+
+# Evaluators a player can use, as the BitBoard class its search runs on
+EVALUATORS = {
+    "lines": BitBoard,
+    "none": WinOnlyBoard,
+}
+
+# A player is a dict of these settings. Missing ones are taken from here
+PLAYER_DEFAULTS = {
+    "name": None, # Shown in the results. Defaults to a description of the settings
+    "type": "alphabeta", # "alphabeta", "mcts" or "random"
+    "depth": 10, # Deepest search for alphabeta, counting the player's own move
+    "timeBudgetMS": None, # Time per move. None for alphabeta searches exactly `depth`, every time
+    "evaluator": "lines", # One of EVALUATORS
+    "threatSearch": True, # Look for a forced win with threats first, on the boards where the game AI does
+    "maxPlayouts": None, # Playouts per move for mcts. Set this or timeBudgetMS
+    "batchSize": 64, # Games mcts plays out at once
+    "rollout": "numpy", # One of ROLLOUT_POLICIES
+}
+
+# Played by `python -m TicTacToeGame.arena` without arguments
+DEFAULT_MATCH = {
+    "board": [7, 7, 4], # numCellsX, numCellsY, winLength
+    "games": 40, # Per pair of players
+    "openingMoves": 2, # Random stones placed before the players take over
+    "players": [
+        {"name": "depth 2", "depth": 2},
+        {"name": "depth 4", "depth": 4},
+        {"name": "mcts 2000", "type": "mcts", "maxPlayouts": 2000},
+    ],
+}
+
+
+def makePlayer(settings: dict) -> dict:
+    """The player's settings with the defaults filled in. Raises ValueError for unknown settings."""
+
+    unknown = set(settings) - set(PLAYER_DEFAULTS)
+    if unknown: raise ValueError(f"Unknown player settings: {', '.join(sorted(unknown))}")
+
+    player = {**PLAYER_DEFAULTS, **settings}
+    if player["type"] not in ("alphabeta", "mcts", "random"): raise ValueError(f"Unknown player type: {player['type']}")
+    if player["evaluator"] not in EVALUATORS: raise ValueError(f"Unknown evaluator: {player['evaluator']}")
+    if player["type"] == "mcts" and player["timeBudgetMS"] is None and player["maxPlayouts"] is None:
+        raise ValueError("An mcts player needs a timeBudgetMS or maxPlayouts")
+
+    if player["name"] is None:
+        if player["type"] == "alphabeta": player["name"] = f"alphabeta d{player['depth']} {player['evaluator']}"
+        elif player["type"] == "mcts" and player["maxPlayouts"] is not None: player["name"] = f"mcts {player['maxPlayouts']} playouts"
+        elif player["type"] == "mcts": player["name"] = f"mcts {player['timeBudgetMS']} ms"
+        else: player["name"] = "random"
+
+    return player
+
+
+def getOpenings(numCellsX: int, numCellsY: int, winLength: int, count: int, numMoves: int, seed: int = ARENA_SEED) -> list[list[int]]:
+    """`count` random openings of `numMoves` cells each, played by the players in turn, that nobody has won."""
+
+    rng = random.Random(seed)
+    openings = []
+
+    while len(openings) < count:
+        board = BitBoard(numCellsX, numCellsY, winLength)
+        opening = []
+        player = 1
+
+        for _ in range(min(numMoves, numCellsX * numCellsY - 1)):
+            index = rng.choice(getBitIndices(board.cellMask & ~board.occupied)) # Any empty cell: getActions is only the center on big empty boards
+            board.makeMove(index, player)
+            if board.hasWon(index, player): break
+            opening.append(index)
+            player = -player
+        else:
+            openings.append(opening)
+
+    return openings
+
+
+def chooseMove(settings: dict, board: BitBoard, player: int, tt: TranspositionTable | None, rng: random.Random) -> int | None:
+    """The move of a player with the given settings, searched on its own board."""
+
+    if settings["type"] == "random":
+        actions = getBitIndices(board.cellMask & ~board.occupied) # Every legal move, not just the ones getActions would search
+        return rng.choice(actions) if actions else None
+
+    if settings["type"] == "mcts":
+        search = MCTS(board, ROLLOUT_POLICIES[settings["rollout"]], settings["batchSize"])
+        return search.search(player, settings["timeBudgetMS"], settings["maxPlayouts"])
+
+    # Alpha-beta, the way BoardCore.iterativeDeepening searches
+    if settings["threatSearch"] and board.numCellsX * board.numCellsY >= THREAT_SEARCH_MIN_CELLS and board.winLength in THREAT_SEARCH_WIN_LENGTHS:
+        sequence = ThreatSpaceSearch(board, THREAT_SEARCH_NODES).findWin(player)
+        if sequence is not None: return sequence[0]
+
+    search = Search(board, tt)
+    if settings["timeBudgetMS"] is None:
+        _, action = search.bestAction(player, settings["depth"])
+    else:
+        _, action, _ = search.iterativeDeepening(player, settings["timeBudgetMS"], settings["depth"])
+
+    return action
+
+
+def playGame(task: dict) -> dict:
+    """Play one game. Runs in a worker process.
+
+    Args:
+        task (dict): The game: its number and seed, the board size, the opening, the start player, and the settings
+            of the player starting ("first") and the other one ("second").
+    Returns:
+        dict: The result record: which player won (1 for first, -1 for second, 0 for a draw), the moves, the time
+            each player thought and its number of moves, and if a player made an illegal move (it loses the game).
+    """
+
+    numCellsX, numCellsY, winLength = task["board"]
+    startPlayer = task["startPlayer"]
+    settings = {startPlayer: task["first"], -startPlayer: task["second"]} # By the player value they play
+    rng = random.Random(task["seed"])
+
+    # The same seed gives the same game, as long as no search is limited by time
+    random.seed(task["seed"])
+    mctsModule._rng = np.random.default_rng(task["seed"])
+
+    # Every player searches on its own board, since they can use different evaluators
+    boards = {player: EVALUATORS[settings[player]["evaluator"]](numCellsX, numCellsY, winLength) for player in (1, -1)}
+    tts = {player: TranspositionTable(ARENA_TT_SIZE_MB) if settings[player]["type"] == "alphabeta" else None for player in (1, -1)}
+    thinkSeconds = {1: 0.0, -1: 0.0}
+    numMoves = {1: 0, -1: 0}
+
+    moves = []
+    player = startPlayer
+    winner = None
+    illegal = False
+
+    def play(index, player):
+        for board in boards.values(): board.makeMove(index, player)
+        moves.append(index)
+
+    for index in task["opening"]:
+        play(index, player)
+        player = -player
+
+    board = boards[1]
+    while winner is None:
+        if board.isFull():
+            winner = 0
+            break
+
+        startTime = perf_counter()
+        index = chooseMove(settings[player], boards[player], player, tts[player], rng)
+        thinkSeconds[player] += perf_counter() - startTime
+        numMoves[player] += 1
+
+        if index is None or index < 0 or not board.cellMask >> index & 1 or board.occupied >> index & 1:
+            winner, illegal = -player, True
+            break
+
+        play(index, player)
+        if board.hasWon(index, player): winner = player
+        player = -player
+
+    return {
+        "game": task["game"],
+        "seed": task["seed"],
+        "board": task["board"],
+        "startPlayer": task["startPlayer"],
+        "first": task["first"]["name"],
+        "second": task["second"]["name"],
+        "winner": winner * startPlayer,
+        "illegal": illegal,
+        "opening": [list(board.toPos(index)) for index in task["opening"]],
+        "moves": [list(board.toPos(index)) for index in moves[len(task["opening"]):]],
+        "firstSeconds": round(thinkSeconds[startPlayer], 4),
+        "secondSeconds": round(thinkSeconds[-startPlayer], 4),
+        "firstMoves": numMoves[startPlayer],
+        "secondMoves": numMoves[-startPlayer],
+    }
+
+
+def makeTasks(match: dict) -> list[dict]:
+    """The games of a match: `games` per pair of players, on a new random opening every two games.
+
+    Both games on an opening start with the same player value, and the players swap who starts, so each gets the
+    same position once. The start player alternates between 1 and -1 from one opening to the next, like the
+    game does between rounds.
+    """
+
+    numCellsX, numCellsY, winLength = match["board"]
+    players = [makePlayer(settings) for settings in match["players"]]
+    numOpenings = (match["games"] + 1) // 2
+    openings = getOpenings(numCellsX, numCellsY, winLength, numOpenings, match.get("openingMoves", 0))
+
+    tasks = []
+    for playerA, playerB in combinations(players, 2):
+        for game in range(match["games"]):
+            pair, swap = divmod(game, 2)
+            tasks.append({
+                "game": len(tasks),
+                "seed": ARENA_SEED + len(tasks),
+                "board": [numCellsX, numCellsY, winLength],
+                "opening": openings[pair],
+                "startPlayer": 1 if pair % 2 == 0 else -1,
+                "first": playerB if swap else playerA,
+                "second": playerA if swap else playerB,
+            })
+
+    return tasks
+
+
+def runMatch(match: dict, outPath: str, numWorkers: int | None = None, log=print) -> list[dict]:
+    """Play all games of a match in a process pool, writing every result to `outPath` as a JSON line when it finishes.
+
+    Args:
+        match (dict): The board, games per pair of players, opening moves and players, like DEFAULT_MATCH.
+        outPath (str): JSON Lines file for the results. It is overwritten.
+        numWorkers (int | None, optional): Processes to play in. Defaults to the number of CPUs.
+        log (optional): Called with a line of text every 10% of the games. None for quiet.
+    Returns:
+        list[dict]: The result records, in the order the games finished.
+    """
+
+    tasks = makeTasks(match)
+    results = []
+    startTime = perf_counter()
+
+    with open(outPath, "w") as outFile, ProcessPoolExecutor(max_workers=numWorkers or os.cpu_count()) as executor:
+        futures = [executor.submit(playGame, task) for task in tasks]
+
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            outFile.write(json.dumps(result) + "\n")
+            outFile.flush()
+
+            if log is not None and len(results) % max(1, len(tasks) // 10) == 0:
+                log(f"{len(results):>6} / {len(tasks)} games, {perf_counter() - startTime:.0f} s")
+
+    return results
+
+
+def loadResults(path: str) -> list[dict]:
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def scoreToElo(score: float) -> float:
+    """Elo difference that gives the expected score (1 win, 0.5 draw, 0 loss). Infinite at 0 and 1."""
+    if score <= 0: return float("-inf")
+    if score >= 1: return float("inf")
+    return 400 * log10(score / (1 - score))
+
+
+def eloInterval(wins: int, draws: int, losses: int, z: float = ELO_Z) -> tuple[float, float, float]:
+    """Elo difference from a player's results against one opponent, with a confidence interval.
+
+    The interval is a Wilson score interval on the mean score per game, using the variance of the game
+    scores, so draws narrow it. Unlike the plain normal interval, a perfect score still gets a finite
+    lower bound. Both ends are turned into Elo.
+
+    Returns:
+        tuple[float, float, float]: The Elo difference and the low and high end of the interval.
+    """
+
+    games = wins + draws + losses
+    if games == 0: return 0.0, float("-inf"), float("inf")
+
+    score = (wins + 0.5 * draws) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+
+    zz = z * z / games
+    center = (score + zz / 2) / (1 + zz)
+    error = z * sqrt(variance / games + zz / (4 * games)) / (1 + zz)
+
+    low = scoreToElo(center - error) if score > 0 else float("-inf")
+    high = scoreToElo(center + error) if score < 1 else float("inf")
+
+    return scoreToElo(score), low, high
+
+
+def getPairResults(results: list[dict]) -> dict:
+    """Wins, draws and losses of every pair of players, from the first named player's side.
+
+    Returns:
+        dict: (playerA, playerB) -> [wins, draws, losses] of playerA, with the names in sorted order.
+    """
+
+    pairs = {}
+    for result in results:
+        first, second, winner = result["first"], result["second"], result["winner"]
+        a, b = sorted((first, second))
+        counts = pairs.setdefault((a, b), [0, 0, 0])
+
+        if winner == 0: counts[1] += 1
+        elif (winner == 1) == (a == first): counts[0] += 1
+        else: counts[2] += 1
+
+    return pairs
+
+
+def getRatings(results: list[dict], iterations: int = 200) -> dict[str, float]:
+    """Elo rating of every player from all games together (Bradley-Terry, fitted with minorization-maximization).
+
+    A draw counts as half a win for both. Every player also gets one virtual draw against every other, so a
+    player that won every game still gets a finite rating. The ratings average 0.
+    """
+
+    names = list(dict.fromkeys(name for result in results for name in (result["first"], result["second"])))
+    if not names: return {}
+
+    wins = {(a, b): 0.5 for a in names for b in names if a != b} # Score of a against b, with the virtual draw
+    for (a, b), (aWins, draws, losses) in getPairResults(results).items():
+        wins[(a, b)] += aWins + 0.5 * draws
+        wins[(b, a)] += losses + 0.5 * draws
+
+    strength = {name: 1.0 for name in names}
+    for _ in range(iterations):
+        for a in names:
+            total = sum(wins[(a, b)] for b in names if b != a)
+            games = sum((wins[(a, b)] + wins[(b, a)]) / (strength[a] + strength[b]) for b in names if b != a)
+            strength[a] = total / games
+
+    ratings = {name: 400 * log10(strength[name]) for name in names}
+    mean = sum(ratings.values()) / len(ratings)
+    return {name: rating - mean for name, rating in ratings.items()}
+
+
+def printReport(results: list[dict]):
+    print(f"{len(results)} games, {sum(result['illegal'] for result in results)} illegal moves")
+
+    print(f"\n{'Player':>24} {'Opponent':>24} {'W':>5} {'D':>5} {'L':>5} {'Elo':>7}  95% interval")
+    for (a, b), (wins, draws, losses) in sorted(getPairResults(results).items()):
+        elo, low, high = eloInterval(wins, draws, losses)
+        print(f"{a:>24} {b:>24} {wins:>5} {draws:>5} {losses:>5} {elo:>+7.0f}  [{low:+.0f}, {high:+.0f}]")
+
+    thinking = {}
+    for result in results:
+        for side in ("first", "second"):
+            seconds, moves = thinking.get(result[side], (0.0, 0))
+            thinking[result[side]] = (seconds + result[f"{side}Seconds"], moves + result[f"{side}Moves"])
+
+    print(f"\n{'Player':>24} {'Rating':>7} {'ms/move':>8}")
+    for name, rating in sorted(getRatings(results).items(), key=lambda item: -item[1]):
+        seconds, moves = thinking[name]
+        print(f"{name:>24} {rating:>+7.0f} {1000 * seconds / max(1, moves):>8.1f}")
+
+
+
+if __name__ == '__main__':
+    # Run from the repository root, no display needed:
+    #   python -m TicTacToeGame.arena                           play DEFAULT_MATCH to arena.jsonl
+    #   python -m TicTacToeGame.arena match.json results.jsonl  play a match described like DEFAULT_MATCH
+    #   python -m TicTacToeGame.arena results.jsonl             print the report of finished games
+    import sys
+
+    if len(sys.argv) == 2:
+        printReport(loadResults(sys.argv[1]))
+
+    else:
+        if len(sys.argv) == 3:
+            with open(sys.argv[1]) as file: match = json.load(file)
+            outPath = sys.argv[2]
+        else:
+            match, outPath = DEFAULT_MATCH, "arena.jsonl"
+
+        printReport(runMatch(match, outPath))
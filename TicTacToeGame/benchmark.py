@@ -0,0 +1,240 @@
+import json
+import platform
+import random
+import subprocess
+from datetime import datetime, timezone
+from time import perf_counter
+
+from .bitboard import BitBoard, getBitIndices
+from .search import Search, SearchTimeout
+from .transposition import TranspositionTable
+from .setup import AI_TIME_BUDGET, TT_SIZE_MB
+
+
+# (numCellsX, numCellsY, winLength) of the boards in the depth table of structs.py
+TABLE_BOARDS = [
+    (3, 3, 3), (3, 4, 3), (4, 4, 3), (4, 5, 3), (5, 5, 3), (5, 6, 3), (6, 6, 3), (6, 7, 3), (7, 7, 3),
+    (7, 8, 3), (8, 8, 3), (8, 9, 3), (9, 9, 3), (9, 10, 3), (10, 10, 3), (15, 15, 3), (20, 20, 3),
+]
+NUM_POSITIONS = 3 # Positions searched per board: the empty board and random openings
+OPENING_STONES = 4 # Stones in the random openings
+POSITION_SEED = 2024 # Fixed, so every run searches the same positions
+TIMEOUT_FACTOR = 4 # A search is aborted after this many times the time budget
+
+
+def getPositions(numCellsX: int, numCellsY: int, winLength: int, numPositions: int = NUM_POSITIONS) -> list[list[tuple[int, int]]]:
+    """The fixed positions searched on a board, as lists of (index, player) moves. The first one is the empty board,
+    the others are random openings with OPENING_STONES stones that nobody has won yet."""
+
+    rng = random.Random(POSITION_SEED ^ (numCellsX << 16) ^ (numCellsY << 8) ^ winLength)
+    positions = [[]]
+
+    while len(positions) < numPositions:
+        board = BitBoard(numCellsX, numCellsY, winLength)
+        moves = []
+        player = 1
+
+        for _ in range(min(OPENING_STONES, numCellsX * numCellsY - 1)):
+            index = rng.choice(getBitIndices(board.cellMask & ~board.occupied)) # Any empty cell: getActions is only the center on big empty boards
+            board.makeMove(index, player)
+            if board.hasWon(index, player): break
+            moves.append((index, player))
+            player = -player
+        else:
+            positions.append(moves)
+
+    return positions
+
+
+def searchPosition(numCellsX: int, numCellsY: int, winLength: int, moves: list[tuple[int, int]], depth: int,
+                   timeoutMS: float | None = None) -> dict:
+    """Search one position to a fixed depth with a fresh transposition table.
+
+    Returns:
+        dict: The record of the search: board, position, depth, nodes, seconds, nodes per second, the chosen
+            move as [x, y] and its value, and if the search finished before the timeout.
+    """
+
+    board = BitBoard(numCellsX, numCellsY, winLength)
+    for index, player in moves:
+        board.makeMove(index, player)
+    player = -moves[-1][1] if moves else 1
+
+    search = Search(board, TranspositionTable(TT_SIZE_MB))
+    search.deadline = None if timeoutMS is None else perf_counter() + timeoutMS / 1000
+
+    startTime = perf_counter()
+    try:
+        value, action = search.bestAction(player, depth)
+        completed = True
+    except SearchTimeout:
+        value, action = None, None
+        completed = False
+    seconds = perf_counter() - startTime
+
+    return {
+        "type": "search",
+        "board": f"{numCellsX}x{numCellsY} k{winLength}",
+        "numCellsX": numCellsX,
+        "numCellsY": numCellsY,
+        "winLength": winLength,
+        "stones": len(moves),
+        "depth": depth,
+        "nodes": search.nodes,
+        "seconds": round(seconds, 6),
+        "nodesPerSecond": round(search.nodes / seconds) if seconds > 0 else None,
+        "move": None if action is None else list(board.toPos(action)),
+        "value": value,
+        "completed": completed,
+    }
+
+
+def runInfo() -> dict:
+    """First record of every results file: when and on what the benchmark ran."""
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "type": "run",
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def runBenchmark(boards: list[tuple[int, int, int]] = TABLE_BOARDS, timeBudgetMS: float = AI_TIME_BUDGET,
+                 maxDepth: int = 12, outPath: str | None = None, log=print) -> list[dict]:
+    """Search every position of every board at depth 1, 2, 3, ... until the average time of a depth is
+    over the budget (or a search is aborted at TIMEOUT_FACTOR times the budget, or the board is full).
+
+    Args:
+        boards (list, optional): (numCellsX, numCellsY, winLength) of the boards. Defaults to TABLE_BOARDS.
+        timeBudgetMS (float, optional): Time a depth may take on average to count as acceptable. Defaults to AI_TIME_BUDGET.
+        maxDepth (int, optional): Deepest search to try. Defaults to 12.
+        outPath (str | None, optional): JSON Lines file to write the records to, one per line, after a run record.
+        log (optional): Called with a line of text after every depth. None for quiet.
+    Returns:
+        list[dict]: The run record followed by the search records.
+    """
+
+    records = [runInfo()]
+    outFile = None if outPath is None else open(outPath, "w")
+
+    def write(record):
+        records.append(record)
+        if outFile is not None:
+            outFile.write(json.dumps(record) + "\n")
+            outFile.flush()
+
+    if outFile is not None: outFile.write(json.dumps(records[0]) + "\n")
+
+    try:
+        for numCellsX, numCellsY, winLength in boards:
+            positions = getPositions(numCellsX, numCellsY, winLength)
+
+            for depth in range(1, min(maxDepth, numCellsX * numCellsY) + 1):
+                results = []
+                for position, moves in enumerate(positions):
+                    record = searchPosition(numCellsX, numCellsY, winLength, moves, depth, timeBudgetMS * TIMEOUT_FACTOR)
+                    record["position"] = position # Index in getPositions, to match the searches of two runs
+                    results.append(record)
+                    write(record)
+
+                meanSeconds = sum(record["seconds"] for record in results) / len(results)
+                if log is not None:
+                    nodes = sum(record["nodes"] for record in results)
+                    log(f"{results[0]['board']:>12} depth {depth:>2}: {meanSeconds:8.3f} s, {nodes:>10,} nodes")
+
+                if not all(record["completed"] for record in results) or meanSeconds * 1000 > timeBudgetMS: break
+    finally:
+        if outFile is not None: outFile.close()
+
+    return records
+
+
+def loadRecords(path: str) -> list[dict]:
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def depthTable(records: list[dict], timeBudgetMS: float = AI_TIME_BUDGET) -> list[tuple[int, int, int, str, float]]:
+    """The deepest depth per board where every position finished and the average time is within the budget.
+
+    Returns:
+        list[tuple[int, int, int, str, float]]: (numCellsX, numCellsY, winLength, depth, average seconds at that depth), in the order the boards were run.
+            The depth is "Full" if it searches to the end of the game, and ends with "+" if no deeper search was tried.
+    """
+
+    byDepth = {} # (numCellsX, numCellsY, winLength, depth) -> search records
+    for record in records:
+        if record["type"] == "search":
+            byDepth.setdefault((record["numCellsX"], record["numCellsY"], record["winLength"], record["depth"]), []).append(record)
+
+    table = {} # (numCellsX, numCellsY, winLength) -> (deepest acceptable depth, its average seconds, deepest depth tried, number of cells)
+    for (numCellsX, numCellsY, winLength, depth), results in byDepth.items():
+        board = (numCellsX, numCellsY, winLength)
+        meanSeconds = sum(record["seconds"] for record in results) / len(results)
+        numCells = numCellsX * numCellsY
+        bestDepth, bestSeconds, triedDepth, _ = table.get(board, (0, 0.0, 0, numCells))
+
+        if all(record["completed"] for record in results) and meanSeconds * 1000 <= timeBudgetMS and depth > bestDepth:
+            bestDepth, bestSeconds = depth, meanSeconds
+        table[board] = (bestDepth, bestSeconds, max(triedDepth, depth), numCells)
+
+    rows = []
+    for board, (depth, seconds, triedDepth, numCells) in table.items():
+        if depth >= numCells: depthText = "Full"
+        elif depth == triedDepth: depthText = f"{depth}+"
+        else: depthText = str(depth)
+        rows.append((*board, depthText, seconds))
+
+    return rows
+
+
+def compareRecords(oldRecords: list[dict], newRecords: list[dict]) -> list[tuple]:
+    """Match the searches of two runs by board, position and depth.
+
+    Returns:
+        list[tuple]: (board, position, depth, old nodes, new nodes, old seconds, new seconds, same move) for every search in both runs.
+    """
+
+    key = lambda record: (record["board"], record["position"], record["depth"])
+    old = {key(record): record for record in oldRecords if record["type"] == "search"}
+
+    rows = []
+    for record in newRecords:
+        if record["type"] != "search" or key(record) not in old: continue
+        before = old[key(record)]
+        rows.append((*key(record), before["nodes"], record["nodes"], before["seconds"], record["seconds"], before["move"] == record["move"]))
+
+    return rows
+
+
+
+if __name__ == '__main__':
+    # Run from the repository root, no display needed:
+    #   python -m TicTacToeGame.benchmark [results.jsonl]          search the TABLE_BOARDS and print the depth table
+    #   python -m TicTacToeGame.benchmark old.jsonl new.jsonl      compare two results files
+    import sys
+
+    if len(sys.argv) == 3:
+        rows = compareRecords(loadRecords(sys.argv[1]), loadRecords(sys.argv[2]))
+
+        print(f"{'Board':>12} {'Pos':>3} {'Depth':>5} {'Old nodes':>10} {'New nodes':>10} {'Nodes':>7} {'Time':>7} {'Move':>5}")
+        for board, position, depth, oldNodes, newNodes, oldSeconds, newSeconds, sameMove in rows:
+            nodeRatio = newNodes / oldNodes if oldNodes else 1
+            timeRatio = newSeconds / oldSeconds if oldSeconds else 1
+            print(f"{board:>12} {position:>3} {depth:>5} {oldNodes:>10,} {newNodes:>10,} {nodeRatio:>6.2f}x {timeRatio:>6.2f}x {'same' if sameMove else 'diff':>5}")
+
+    else:
+        records = runBenchmark(outPath=sys.argv[1] if len(sys.argv) == 2 else None)
+
+        print(f"\nDeepest search within {AI_TIME_BUDGET} ms (depth counts the move itself, minimax depth is one less):")
+        print("# X, Y, WinLen: Depth")
+        for numCellsX, numCellsY, winLength, depth, seconds in depthTable(records):
+            print(f"# {numCellsX}, {numCellsY}, {winLength}: {depth} ({seconds:.2f} s)")
@@ -0,0 +1,612 @@
+import random
+from functools import lru_cache
+
+from .symmetry import getSymmetries
+from .setup import CANDIDATE_MIN_CELLS, CANDIDATE_DISTANCE
+
+
+ZOBRIST_SEED = 0x7177AC # Fixed, so every process and every search agrees on the hash of a position
+
+
+# Relative index steps for the four line directions on a board with `stride` bits per row.
+# Each row has one extra, always empty, sentinel bit so that lines stop at the edge of the board
+# instead of wrapping around to the next row.
+def getDirShifts(stride: int) -> tuple[int, ...]:
+    return (
+        1,          # Right
+        stride,     # Down
+        stride + 1, # Down Right
+        stride - 1, # Down Left
+    )
+
+
+def getBitIndices(mask: int) -> list[int]:
+    """Bit indices of the set bits of the mask, lowest first."""
+
+    indices = []
+    while mask:
+        low = mask & -mask
+        indices.append(low.bit_length() - 1)
+        mask ^= low
+
+    return indices
+
+
+@lru_cache(maxsize=None)
+def getCellMask(numCellsX: int, numCellsY: int) -> int:
+    """Bitmask with a bit set for every cell on the board (sentinel bits excluded)."""
+    stride = numCellsX + 1
+    rowMask = (1 << numCellsX) - 1
+
+    mask = 0
+    for y in range(numCellsY):
+        mask |= rowMask << (y * stride)
+
+    return mask
+
+
+@lru_cache(maxsize=None)
+def getWinMasks(numCellsX: int, numCellsY: int, winLength: int) -> tuple[int, ...]:
+    """Precompute a bitmask for every window of `winLength` cells in a row on the board.
+    The result is cached, so boards of the same size share the same tuple.
+
+    Args:
+        numCellsX (int): Number of cells in the x direction.
+        numCellsY (int): Number of cells in the y direction.
+        winLength (int): Number of cells in a row needed to win.
+    Returns:
+        tuple[int, ...]: One mask per winning window. Empty if nobody can ever win.
+    """
+
+    stride = numCellsX + 1
+    cellMask = getCellMask(numCellsX, numCellsY)
+
+    masks = []
+    for shift in getDirShifts(stride):
+        for y in range(numCellsY):
+            for x in range(numCellsX):
+                start = y * stride + x
+
+                mask = 0
+                for i in range(winLength):
+                    mask |= 1 << (start + i * shift)
+
+                # The window is only valid if every cell is on the board
+                if mask & cellMask == mask:
+                    masks.append(mask)
+
+    # With winLength 1 all four directions give the same windows
+    return tuple(dict.fromkeys(masks))
+
+
+@lru_cache(maxsize=None)
+def getCellWinMasks(numCellsX: int, numCellsY: int, winLength: int) -> tuple[tuple[int, ...], ...]:
+    """For every bit index, the winning windows that contain that cell. Sentinel bits get an empty tuple."""
+
+    stride = numCellsX + 1
+    cellWinMasks = [[] for _ in range(stride * numCellsY)]
+
+    for mask in getWinMasks(numCellsX, numCellsY, winLength):
+        bits = mask
+        while bits:
+            low = bits & -bits
+            cellWinMasks[low.bit_length() - 1].append(mask)
+            bits ^= low
+
+    return tuple(tuple(masks) for masks in cellWinMasks)
+
+
+@lru_cache(maxsize=None)
+def getWindowCells(numCellsX: int, numCellsY: int, winLength: int) -> tuple[tuple[int, ...], ...]:
+    """The bit indices of the cells of every window, in the order of `getWinMasks`."""
+
+    windowCells = []
+    for mask in getWinMasks(numCellsX, numCellsY, winLength):
+        cells = []
+        while mask:
+            low = mask & -mask
+            cells.append(low.bit_length() - 1)
+            mask ^= low
+        windowCells.append(tuple(cells))
+
+    return tuple(windowCells)
+
+
+@lru_cache(maxsize=None)
+def getCellWindows(numCellsX: int, numCellsY: int, winLength: int) -> tuple[tuple[int, ...], ...]:
+    """For every bit index, the numbers of the windows (positions in `getWinMasks`) that contain that cell."""
+
+    cellWindows = [[] for _ in range((numCellsX + 1) * numCellsY)]
+    for window, cells in enumerate(getWindowCells(numCellsX, numCellsY, winLength)):
+        for index in cells:
+            cellWindows[index].append(window)
+
+    return tuple(tuple(windows) for windows in cellWindows)
+
+
+@lru_cache(maxsize=None)
+def getCellLineMasks(numCellsX: int, numCellsY: int, winLength: int) -> tuple[int, ...]:
+    """For every bit index, a mask of the cells that share a window with that cell (the cell itself included)."""
+
+    lineMasks = []
+    for masks in getCellWinMasks(numCellsX, numCellsY, winLength):
+        lineMask = 0
+        for mask in masks:
+            lineMask |= mask
+        lineMasks.append(lineMask)
+
+    return tuple(lineMasks)
+
+
+@lru_cache(maxsize=None)
+def getNeighborMasks(numCellsX: int, numCellsY: int, distance: int = 1) -> tuple[int, ...]:
+    """For every bit index, a mask of the cells at most `distance` steps away in any of the 8 directions (the cell itself excluded)."""
+
+    stride = numCellsX + 1
+    neighborMasks = [0] * (stride * numCellsY)
+
+    for y in range(numCellsY):
+        for x in range(numCellsX):
+            mask = 0
+            for nearY in range(max(0, y - distance), min(numCellsY, y + distance + 1)):
+                for nearX in range(max(0, x - distance), min(numCellsX, x + distance + 1)):
+                    mask |= 1 << (nearY * stride + nearX)
+
+            neighborMasks[y * stride + x] = mask & ~(1 << (y * stride + x))
+
+    return tuple(neighborMasks)
+
+
+@lru_cache(maxsize=None)
+def getZobristKeys(numCellsX: int, numCellsY: int) -> dict[int, tuple[int, ...]]:
+    """Random 64-bit Zobrist keys, one per player and bit index. The hash of a position is the XOR
+    of the keys of all its stones, so it can be updated with a single XOR per move."""
+
+    rng = random.Random(ZOBRIST_SEED ^ (numCellsX << 16) ^ numCellsY)
+    size = (numCellsX + 1) * numCellsY
+
+    return {
+        1: tuple(rng.getrandbits(64) for _ in range(size)),
+        -1: tuple(rng.getrandbits(64) for _ in range(size)),
+    }
+
+
+@lru_cache(maxsize=None)
+def getSymmetricZobristKeys(numCellsX: int, numCellsY: int) -> dict[int, tuple[tuple[int, ...], ...]]:
+    """For every player and bit index, the Zobrist key of the cell each board symmetry moves it to.
+    XOR'ing these in keeps the hash of every mirrored and rotated version of the position up to date."""
+
+    keys = getZobristKeys(numCellsX, numCellsY)
+    symmetries = getSymmetries(numCellsX, numCellsY)
+    size = (numCellsX + 1) * numCellsY
+
+    return {
+        player: tuple(
+            tuple(keys[player][permutation[index]] for permutation, _ in symmetries)
+            for index in range(size)
+        )
+        for player in (1, -1)
+    }
+
+
+
+class BitBoard:
+    """Tic Tac Toe board where each player's stones are stored as one integer bitmask.
+
+    Cells are numbered row by row as `y * stride + x`, where `stride = numCellsX + 1`.
+    The extra column is never occupied, so shifting a mask by a direction step never wraps a line
+    onto the next row. Making a move, undoing it, checking for a win and checking for a full board
+    are all a handful of integer operations.
+    """
+
+    def __init__(self, numCellsX: int, numCellsY: int, winLength: int = 3, state: list[list[int]] = None):
+
+        self.numCellsX = numCellsX
+        self.numCellsY = numCellsY
+        self.winLength = winLength
+        self.stride = numCellsX + 1
+
+        self.dirShifts = getDirShifts(self.stride)
+        self.cellMask = getCellMask(numCellsX, numCellsY)
+        self.cellWinMasks = getCellWinMasks(numCellsX, numCellsY, winLength)
+        self.zobristKeys = getZobristKeys(numCellsX, numCellsY)
+        self.symmetries = getSymmetries(numCellsX, numCellsY)
+        self.symZobristKeys = getSymmetricZobristKeys(numCellsX, numCellsY)
+
+        # Large boards only generate moves close to the stones. None means every empty cell is a move
+        self.windowCells = getWindowCells(numCellsX, numCellsY, winLength)
+        self.cellWindows = getCellWindows(numCellsX, numCellsY, winLength)
+
+        self.candidateDistance = CANDIDATE_DISTANCE if numCellsX * numCellsY >= CANDIDATE_MIN_CELLS else None
+        self.candidateMasks = getNeighborMasks(numCellsX, numCellsY, self.candidateDistance or 1)
+        self.centerIndex = self.toIndex(numCellsX // 2, numCellsY // 2)
+
+        self.stones = {1: 0, -1: 0}
+        self.occupied = 0
+        self.moves = [] # Stack of (index, player) for every stone on the board, in the order they were placed
+        self.score = 0 # Running value of evaluate(), updated by makeMove and unmakeMove
+        self.scoreStack = [] # Value of score before every move, so unmakeMove doesn't have to recount the lines
+        self.hash = 0 # Zobrist hash of the stones on the board
+        # Hashes of every symmetric version of the board (identity first) after 0, 1, 2, ... moves. Only brought up
+        # to date when they are read, so moves that are never hashed (like the leaves of the search) cost nothing
+        self.symHashStack = [(0,) * len(self.symmetries)]
+        # Windows stay live while only one player has stones in them. A cell in no live window can't
+        # help anyone win, and when no live window is left the game is a draw whatever happens
+        numWindows = len(self.windowCells)
+        self.windowCounts = {1: [0] * numWindows, -1: [0] * numWindows} # Stones of each player in every window
+        self.numLiveWindows = numWindows
+        # Cells in at least one live window, as (number of moves, mask) for the positions where it was read. Like the
+        # symmetric hashes, it is only brought up to date when read: see the liveCells property
+        self.cellLineMasks = getCellLineMasks(numCellsX, numCellsY, winLength)
+        self.liveCellStack = [(0, sum(1 << index for index, windows in enumerate(self.cellWindows) if windows))]
+
+        # Live windows that a player is a few stones away from completing, by player and number of missing stones.
+        # Only the levels something has asked for are kept up to date: the search reads 2 (forks), the
+        # proof-number and threat-space searches add 1 and 3 through getThreatCells
+        self.winMasks = getWinMasks(numCellsX, numCellsY, winLength)
+        self.threatWindows = {1: {}, -1: {}}
+        self.threatsByCount = {1: [None] * (winLength + 1), -1: [None] * (winLength + 1)} # Stones in a live window -> its threat set, None if not tracked
+        self.trackThreats(2)
+
+        self.near = 0 # Cells within candidateDistance of any stone
+        self.nearStack = [] # Value of near before every move, so unmakeMove can restore it
+
+        if state is not None:
+            for y, row in enumerate(state):
+                for x, val in enumerate(row):
+                    if val != 0: self.makeMove(self.toIndex(x, y), val)
+
+
+    @classmethod
+    def fromState(cls, state: list[list[int]], winLength: int = 3):
+        """Create a BitBoard from a 2D list state like the one stored in `Board.state`."""
+        return cls(len(state[0]), len(state), winLength, state)
+
+
+    def toState(self) -> list[list[int]]:
+        """Convert back to a 2D list state with 1, -1 and 0 values."""
+        return [
+            [self.getValAtIndex(self.toIndex(x, y)) for x in range(self.numCellsX)]
+            for y in range(self.numCellsY)
+        ]
+
+
+    def toIndex(self, x: int, y: int) -> int:
+        return int(y) * self.stride + int(x)
+
+
+    def toPos(self, index: int) -> tuple[int, int]:
+        y, x = divmod(index, self.stride)
+        return x, y
+
+
+    def getValAtIndex(self, index: int) -> int:
+        if self.stones[1] >> index & 1: return 1
+        if self.stones[-1] >> index & 1: return -1
+        return 0
+
+
+    def makeMove(self, index: int, player: int):
+        """Place a stone for the player. The cell must be empty."""
+        bit = 1 << index
+        self.scoreStack.append(self.score)
+        self.score += player * self.getLineGain(index, self.stones[player])
+        self.stones[player] |= bit
+        self.occupied |= bit
+        self.moves.append((index, player))
+        self.hash ^= self.zobristKeys[player][index]
+        self.nearStack.append(self.near)
+        self.near |= self.candidateMasks[index]
+        self.updateWindows(index, player, 1)
+
+
+    def unmakeMove(self, index: int, player: int):
+        """Remove the player's stone that was placed with `makeMove`."""
+        bit = 1 << index
+        self.stones[player] ^= bit
+        self.occupied ^= bit
+        self.score = self.scoreStack.pop()
+        self.moves.pop()
+        self.hash ^= self.zobristKeys[player][index]
+        if len(self.symHashStack) > len(self.moves) + 1: self.symHashStack.pop()
+        if self.liveCellStack[-1][0] > len(self.moves): self.liveCellStack.pop()
+        self.near = self.nearStack.pop()
+        self.updateWindows(index, player, -1)
+
+
+    def updateWindows(self, index: int, player: int, change: int):
+        """Add (change 1) or remove (change -1) the player's stone at index from the window counts,
+        and keep the number of live windows and the tracked threat windows up to date."""
+
+        own, other = self.windowCounts[player], self.windowCounts[-player]
+        ownThreats, otherThreats = self.threatsByCount[player], self.threatsByCount[-player]
+
+        for window in self.cellWindows[index]:
+            before = own[window]
+            after = before + change
+            own[window] = after
+
+            if not other[window]:
+                # Still live for the player, who is now one stone closer to (or further from) completing it
+                threats = ownThreats[before]
+                if threats is not None: threats.discard(window)
+                threats = ownThreats[after]
+                if threats is not None: threats.add(window)
+                continue
+
+            # The window dies when the first stone of the player goes into a window the opponent already has a stone in
+            if (before if change > 0 else after) == 0:
+                self.numLiveWindows -= change
+
+                threats = otherThreats[other[window]]
+                if threats is not None:
+                    if change > 0: threats.discard(window)
+                    else: threats.add(window)
+
+
+    def trackThreats(self, missing: int):
+        """Start keeping the live windows that are `missing` stones short of a win up to date, for both players.
+        Does nothing if they are already tracked. Only windows with a stone in them are tracked."""
+
+        if missing in self.threatWindows[1]: return
+        count = self.winLength - missing
+
+        for player in (1, -1):
+            own, other = self.windowCounts[player], self.windowCounts[-player]
+            windows = set()
+            if 0 < count < self.winLength:
+                windows.update(window for window, stones in enumerate(own) if stones == count and not other[window])
+                self.threatsByCount[player][count] = windows
+
+            self.threatWindows[player][missing] = windows
+
+
+    def makesThreat(self, index: int, player: int) -> bool:
+        """True if the player's stone at index (already placed) leaves a live window one stone short of a win,
+        so the opponent has to block on the next move."""
+
+        own, other = self.windowCounts[player], self.windowCounts[-player]
+        threatCount = self.winLength - 1
+
+        for window in self.cellWindows[index]:
+            if own[window] == threatCount and not other[window]: return True
+
+        return False
+
+
+    def getThreatCells(self, player: int, missing: int = 2) -> int:
+        """Mask of the empty cells in the player's live windows that are `missing` stones short of a win.
+        With the default of 2, these are the moves that make a threat: a window one stone short of a win.
+        Other levels are tracked from the first time they are asked for."""
+
+        if missing not in self.threatWindows[player]: self.trackThreats(missing)
+
+        cells = 0
+        for window in self.threatWindows[player][missing]:
+            cells |= self.winMasks[window]
+
+        return cells & ~self.occupied
+
+
+    def getForkCells(self, player: int) -> int:
+        """Mask of the empty cells where the player would make two threats at once (for example an open line
+        of winLength - 1). The opponent can only block one of them, so a stone there wins on the move after.
+
+        Every live window two stones short of a win with both empty cells a and b gives a threat at b when
+        the player takes a, and the other way around. A fork cell gets threats at two different cells.
+        Only windows with a stone in them are tracked, so with winLength 2 no forks are found.
+        """
+
+        occupied = self.occupied
+        threatsAfter = {} # Cell -> mask of the cells where it would make the player win
+
+        for window in self.threatWindows[player][2]:
+            empty = self.winMasks[window] & ~occupied
+            a = empty & -empty
+            b = empty ^ a
+            threatsAfter[a] = threatsAfter.get(a, 0) | b
+            threatsAfter[b] = threatsAfter.get(b, 0) | a
+
+        forks = 0
+        for cell, threats in threatsAfter.items():
+            if threats & (threats - 1): forks |= cell
+
+        return forks
+
+
+    def undoTo(self, numMoves: int):
+        """Undo the latest moves until only `numMoves` stones are left. Used to recover after an aborted search."""
+        while len(self.moves) > numMoves:
+            self.unmakeMove(*self.moves[-1])
+
+
+    def hasWon(self, index: int, player: int) -> bool:
+        """Check if the player has a winning window through the cell at index."""
+        stones = self.stones[player]
+
+        for mask in self.cellWinMasks[index]:
+            if stones & mask == mask: return True
+
+        return False
+
+
+    @property
+    def symHashes(self) -> tuple[int, ...]:
+        """Hash of every symmetric version of the board, identity first. Updated for the moves made since the last read."""
+
+        stack = self.symHashStack
+        moves = self.moves
+        symZobristKeys = self.symZobristKeys
+
+        while len(stack) <= len(moves):
+            index, player = moves[len(stack) - 1]
+            stack.append(tuple([h ^ key for h, key in zip(stack[-1], symZobristKeys[player][index])]))
+
+        return stack[-1]
+
+
+    @property
+    def liveCells(self) -> int:
+        """Mask of the cells in at least one live window. Updated for the moves made since the last read: only the
+        cells that share a window with one of those moves can have lost their last live window."""
+
+        stack = self.liveCellStack
+        numMoves, live = stack[-1]
+        moves = self.moves
+
+        if numMoves < len(moves):
+            xStones, oStones = self.stones[1], self.stones[-1]
+            cellWinMasks = self.cellWinMasks
+
+            changed = 0
+            for index, _ in moves[numMoves:]:
+                changed |= self.cellLineMasks[index]
+
+            for cell in getBitIndices(changed & live):
+                for mask in cellWinMasks[cell]:
+                    if not (xStones & mask and oStones & mask): break # Still live
+                else:
+                    live ^= 1 << cell
+
+            stack.append((len(moves), live))
+
+        return live
+
+
+    def canonicalHash(self) -> tuple[int, int]:
+        """Hash shared by all mirrored and rotated versions of the position.
+
+        Returns:
+            tuple[int, int]: The smallest hash among the symmetric versions, and the index of the symmetry that gives it.
+        """
+        symHashes = self.symHashes
+        minHash = min(symHashes)
+        return minHash, symHashes.index(minHash)
+
+
+    def getStabilizer(self) -> list[int]:
+        """Indices of the symmetries (other than the identity) that leave the position unchanged."""
+        symHashes = self.symHashes
+        return [i for i in range(1, len(symHashes)) if symHashes[i] == symHashes[0]]
+
+
+    def getWinningCells(self, player: int) -> int:
+        """Mask of the empty cells where the player would complete a window of winLength, i.e. win on the spot.
+
+        For every direction the window starts are found for all cells at once: a window with its hole at
+        position j has stones on every other position and an empty cell on position j. The ANDs of the
+        shifted stone masks before and after j are shared between all j, so this is O(winLength) shifts.
+        """
+
+        stones = self.stones[player]
+        empty = self.cellMask & ~self.occupied
+        winLength = self.winLength
+        cells = 0
+
+        for shift in self.dirShifts:
+            shifted = [stones >> (i * shift) for i in range(winLength)]
+
+            # prefix[j] has every position before j filled, suffix[j] every position from j on
+            prefix = [-1] * (winLength + 1)
+            suffix = [-1] * (winLength + 1)
+            for i in range(winLength):
+                prefix[i + 1] = prefix[i] & shifted[i]
+                suffix[winLength - 1 - i] = suffix[winLength - i] & shifted[winLength - 1 - i]
+
+            for j in range(winLength):
+                starts = prefix[j] & suffix[j + 1] & (empty >> (j * shift))
+                cells |= starts << (j * shift)
+
+        return cells & empty
+
+
+    def isFull(self) -> bool:
+        return self.occupied == self.cellMask
+
+
+    def countEmpty(self) -> int:
+        return (self.cellMask & ~self.occupied).bit_count()
+
+
+    def isDeadDraw(self) -> bool:
+        """True when every window has stones of both players, so nobody can win anymore."""
+        return self.numLiveWindows == 0
+
+
+    def getActions(self) -> list[int]:
+        """Bit indices of the moves to consider, in row-major order. These are all empty cells, or on boards
+        with a candidateDistance, the empty cells near a stone (only the center on an empty board).
+        Every winning or blocking move is next to a stone, so none of them is ever left out.
+
+        Cells in no live window are left out too. A stone there can't be part of any win, so it is no
+        better than passing, and an extra stone on a live cell never hurts. Only in a dead draw, where
+        every cell is dead, are they returned, so there is always a move until the board is full."""
+
+        actions = []
+        empty = self.cellMask & ~self.occupied
+        if self.candidateDistance is not None:
+            empty &= self.near if self.occupied else 1 << self.centerIndex
+        liveCells = self.liveCells
+        if empty & liveCells:
+            empty &= liveCells
+
+        while empty:
+            low = empty & -empty
+            actions.append(low.bit_length() - 1)
+            empty ^= low
+
+        return actions
+
+
+    def getLineGain(self, index: int, stones: int) -> int:
+        """How much a stone at index adds to the line score of its player, given the player's other stones.
+
+        Only the four lines through the cell change: in each direction the lines of length `before` and `after`
+        on either side are joined into one line of length `before + after + 1`.
+        """
+
+        gain = 0
+        for shift in self.dirShifts:
+            after = 1
+            while stones >> (index + after * shift) & 1:
+                after += 1
+
+            before = 1
+            while index - before * shift >= 0 and stones >> (index - before * shift) & 1:
+                before += 1
+
+            after, before = after - 1, before - 1
+            gain += (before + after + 1) ** 3 - before ** 3 - after ** 3
+
+        return gain
+
+
+    def evaluate(self) -> int:
+        """Same score as `Board.evaluateState`: every stone adds the squared length of the line it is part of,
+        in each of the four directions, with the sign of its player. This rescans the whole board;
+        the search reads the running `score` instead, which always holds the same value.
+
+        A line of length L has L stones that each add L^2, so every line adds L^3 in total. The lines are
+        counted for all cells at once with shifts: `runs` holds the start of every line that is at least
+        `length` long, and each step from length-1 to length adds `length^3 - (length-1)^3` per line.
+        """
+
+        score = 0
+
+        for player, stones in self.stones.items():
+            if not stones: continue
+
+            for shift in self.dirShifts:
+                runs = stones & ~(stones << shift) # First stone of every line in this direction
+                length = 1
+
+                while runs:
+                    score += player * runs.bit_count() * (3 * length * length - 3 * length + 1)
+                    runs &= stones >> (length * shift)
+                    length += 1
+
+        return score
+
+
+    def __str__(self):
+        return str(self.toState())
@@ -0,0 +1,429 @@
+from functools import cached_property
+from time import perf_counter
+from typing import NamedTuple
+
+from .setup import DEPTH, TT_SIZE_MB, NUMPY_EVAL_MIN_CELLS, AI_WORKERS, AI_PARALLEL_MODE
+from .setup import THREAT_SEARCH_MIN_CELLS, THREAT_SEARCH_WIN_LENGTHS, THREAT_SEARCH_NODES, PROOF_MAX_NODES
+from .setup import MCTS_MAX_PLAYOUTS, MCTS_BATCH_SIZE, MCTS_ROLLOUT
+
+from .bitboard import BitBoard
+from .search import Search, SearchStats, INF as SEARCH_INF, WIN_SCORE as SEARCH_WIN_SCORE
+from .transposition import TranspositionTable
+from .parallel import parallelIterativeDeepening
+from .lazySmp import lazySmpSearch
+from .threatSpace import ThreatSpaceSearch
+from .proofNumber import ProofNumberSearch
+from .mcts import MCTS, ROLLOUT_POLICIES
+from . import vectorEval
+
+INF = float('inf')
+
+
+class Pos(NamedTuple):
+    """A cell of the board. Has the same `x` and `y` as the pygame Vector2 the game uses, without needing pygame."""
+    x: int
+    y: int
+
+
+class BoardCore:
+    """ The rules of the game and the AI, without anything that needs pygame: the state, moves, the win check
+    and the searches. `structs.Board` adds the drawing on top. A BoardCore is quick to create, needs no display
+    and pickles as just its size and state, so it can be used in tests, benchmarks and worker processes.
+    Actions are anything with `x` and `y`. The actions it returns are made by `toAction`, which gives a Pos here.
+    """
+    
+    # Searching directions as integer steps: Horizontal Up Left, Up, Horizontal Up Right, Right
+    dirSteps = [(-1, -1), (0, -1), (1, -1), (1, 0)]
+    
+    def __init__(self, numCellsX: int, numCellsY: int, winLength: int = 3, startPlayer: int = 1, state = None):
+        
+        self.numCellsX = numCellsX
+        self.numCellsY = numCellsY
+        self.winLength = winLength
+        self.startPlayer = startPlayer
+        
+        # Initialize the board with all zeros with correct dimensions
+        self.state = [ [0] * numCellsX for _ in range(numCellsY) ] if state is None else state
+        
+        self.moveStack = [] # (x, y, previous value) of every move made with makeMove, latest last
+        
+        # The same stones as a BitBoard, kept in step by makeMove and unmakeMove. Its stone count per window
+        # (from tables built once per board size and win length) makes checkHasWon a look at the windows through one cell
+        self.bits = BitBoard.fromState(self.state, winLength)
+    
+    
+    @cached_property
+    def transpositionTable(self) -> TranspositionTable:
+        """ Kept for the whole game, so every AI move can reuse the positions searched for earlier moves.
+        Made by the first search that needs it: a full-size table takes longer to set up than the rest of the board. """
+        return TranspositionTable(TT_SIZE_MB)
+    
+    
+    def __reduce__(self):
+        """ Pickle as a BoardCore with the same size and stones, also for subclasses like Board.
+        The transposition table, the move history and anything used for drawing are left out. """
+        return BoardCore, (self.numCellsX, self.numCellsY, self.winLength, self.startPlayer, [row[:] for row in self.state])
+    
+    
+    def toAction(self, x: int, y: int) -> Pos:
+        """ The action for the cell at (x, y), as returned by getActions and the searches. """
+        return Pos(x, y)
+    
+    
+    def isOutOfBounds(self, action: Pos) -> bool:
+        return not (0 <= action.x < self.numCellsX and 0 <= action.y < self.numCellsY)
+    
+    
+    def checkHasWon(self, action: Pos, player: int, state = None):
+        """Check if the player has won the game by performing the action.
+        This function checks for winning conditions only where the action is included.
+        Args:
+            action (Pos): The position where the player has made their move.
+            player (int): The player identifier (e.g., 1 or 2).
+            state (optional): The current state of the game board. If not provided, the function will use the instance's state.
+        Returns:
+            bool: True if the player has won the game, False otherwise.
+        """
+        
+        if state is None: state = self.state
+        x, y = int(action.x), int(action.y)
+        
+        # The player's stone is on the board: one of the windows through it has to be full of the player's stones
+        bits = self.bits
+        index = bits.toIndex(x, y)
+        if state is self.state and bits.getValAtIndex(index) == player:
+            counts = bits.windowCounts[player]
+            return any(counts[window] == self.winLength for window in bits.cellWindows[index])
+        
+        # Otherwise count along the lines through the cell, as if the action was made
+        for dx, dy in self.dirSteps:
+            # Skip lines that are too short to ever hold winLength in a row, like the diagonals near the corners
+            if self.getLineLength(x, y, dx, dy) < self.winLength: continue
+            
+            # Count the player's cells in both directions from the action, plus the action itself
+            equalCount = 1 + self.countInDirection(state, x, y, dx, dy, player) + self.countInDirection(state, x, y, -dx, -dy, player)
+            
+            if equalCount >= self.winLength: return True # player has won
+        
+        # For-loop never found a winning case, so player did not win
+        return False
+    
+    
+    def getLineLength(self, x: int, y: int, dx: int, dy: int) -> int:
+        """Number of cells on the board in the line through (x, y) with direction (dx, dy), from edge to edge."""
+        
+        numCellsX, numCellsY = self.numCellsX, self.numCellsY
+        
+        # Steps from (x, y) to the edge of the board, going forwards and backwards along each axis
+        forwardX, backwardX = {1: (numCellsX - 1 - x, x), -1: (x, numCellsX - 1 - x), 0: (INF, INF)}[dx]
+        forwardY, backwardY = {1: (numCellsY - 1 - y, y), -1: (y, numCellsY - 1 - y), 0: (INF, INF)}[dy]
+        
+        return 1 + min(forwardX, forwardY) + min(backwardX, backwardY)
+    
+    
+    def countInDirection(self, state, x: int, y: int, dx: int, dy: int, value: int) -> int:
+        """Count how many cells in a row have the value, starting next to (x, y) and stepping (dx, dy) until another value or the edge of the board."""
+        
+        numCellsX, numCellsY = self.numCellsX, self.numCellsY
+        count = 0
+        
+        x, y = x + dx, y + dy
+        while 0 <= x < numCellsX and 0 <= y < numCellsY and state[y][x] == value:
+            count += 1
+            x, y = x + dx, y + dy
+        
+        return count
+    
+    
+    def makeMove(self, action: Pos, player: int):
+        """ Set the player's value in `state` in place, without drawing anything. The previous value is pushed
+        onto `moveStack`, so the move can be taken back with unmakeMove.
+        Args:
+            action (Pos): The position of the move. Must be an empty cell on the board.
+            player (int): The player's value to put in the cell.
+        """
+        
+        x, y = int(action.x), int(action.y)
+        self.moveStack.append((x, y, self.state[y][x]))
+        self.state[y][x] = player
+        if player != 0: self.bits.makeMove(self.bits.toIndex(x, y), player)
+    
+    
+    def unmakeMove(self):
+        """ Take back the latest move made with makeMove (or performAction), restoring the cell's previous value.
+        Returns:
+            Pos: The position of the move that was taken back.
+        """
+        
+        x, y, previous = self.moveStack.pop()
+        player = self.state[y][x]
+        self.state[y][x] = previous
+        if player != 0: self.bits.unmakeMove(self.bits.toIndex(x, y), player)
+        
+        return self.toAction(x, y)
+    
+    
+    def getActions(self, state = None) -> list[Pos]:
+        """Retrieve a list of valid actions for the current or given game state.
+        Args:
+            state (list[list[int]], optional): The current game state represented 
+                as a 2D list of integers. Each integer represents a cell in the 
+                game grid. Defaults to None, in which case the method uses the 
+                instance's current state.
+        Returns:
+            list[Pos]: A list of Pos objects, where each object represents 
+                the coordinates ([x, y]) of a valid action (empty cell) in the game grid.
+        """
+
+        if state is None: state = self.state
+        
+        actions = []
+        for y, yList in enumerate(state):
+            for x, val in enumerate(yList):
+                if val == 0:
+                    actions.append(self.toAction(x, y))
+                
+                
+        return actions
+    
+    
+    def getValAtPos(self, action: Pos, state = None):
+        if state is None: state = self.state
+        if self.isOutOfBounds(action): return 0
+        else: return state[int(action.y)][int(action.x)]
+        
+    def isStateFull(self, state = None):
+        if state is None: state = self.state
+        
+        for yList in state:
+            for val in yList:
+                if val == 0: return False
+        
+        return True
+    
+    
+    
+    def result(self, state, action, playerVal):
+        
+        newState = [row[:] for row in state]
+        newState[int(action.y)][int(action.x)] = playerVal
+        return newState
+        
+    
+          
+    def minimax(self, state, player, depth=10, alpha=-INF, beta=INF, root=False, tracer=None):
+        """ Alpha-beta search from the given state, run on a BitBoard copy of it.
+        Args:
+            state (list[list[int]]): The state to search from.
+            player (int): The player to move.
+            depth (int, optional): Number of moves to look ahead after the next one. Defaults to 10.
+            alpha (optional): Lowest value player 1 is already guaranteed.
+            beta (optional): Highest value player -1 is already guaranteed.
+            root (bool, optional): Return the best action instead of the value. Defaults to False.
+            tracer (SearchTracer, optional): Records every node of the search to a file. Off if None.
+        Returns:
+            Pos | None if root, else the value of the state (positive is good for player 1).
+        """
+        
+        bits = BitBoard.fromState(state, self.winLength)
+        search = Search(bits, self.transpositionTable)
+        
+        if tracer is not None:
+            tracer.attach(bits)
+            search.tracer = tracer
+        
+        # The search sees values from the player to move, so flip the window for player -1
+        alpha, beta = (alpha, beta) if player == 1 else (-beta, -alpha)
+        alpha, beta = max(alpha, -SEARCH_INF), min(beta, SEARCH_INF)
+        
+        # depth + 1 keeps the old meaning of DEPTH, where depth 0 still tried every move
+        value, action = search.bestAction(player, depth + 1, alpha, beta)
+        
+        if not root: return player * value
+        if action is None: return None
+        
+        return self.toAction(*bits.toPos(action))
+    
+    
+    
+    def iterativeDeepening(self, state, player, timeBudgetMS, maxDepth=10, shouldStop=None, onProgress=None, tracer=None):
+        """ Search deeper and deeper from the given state until the time budget runs out.
+        Args:
+            state (list[list[int]]): The state to search from.
+            player (int): The player to move.
+            timeBudgetMS (float): How long to search, in milliseconds.
+            maxDepth (int, optional): Deepest search to try, with the same meaning as depth in minimax. Defaults to 10.
+            shouldStop (optional): Function that ends the search early when it returns True, like `Search.shouldStop`.
+            onProgress (optional): Called with the depth being searched and the number of nodes so far.
+            tracer (SearchTracer, optional): Records every node of the alpha-beta search to a file, like in minimax.
+                Only the search in this process is traced: not the threat search, nor the parallel searches.
+        Returns:
+            tuple[Pos | None, SearchStats]: The best action of the deepest finished search (None if there are no moves),
+                and what the search did. The parallel searches only fill in the depth, nodes, value and time.
+        """
+        
+        bits = BitBoard.fromState(state, self.winLength)
+        startTime = perf_counter()
+        if tracer is not None: tracer.attach(bits) # Fail before searching if the board is too large to trace
+        
+        # On large gomoku-like boards, a forced win with threats is found much faster than alpha-beta could
+        if bits.numCellsX * bits.numCellsY >= THREAT_SEARCH_MIN_CELLS and self.winLength in THREAT_SEARCH_WIN_LENGTHS:
+            threatSearch = ThreatSpaceSearch(bits, THREAT_SEARCH_NODES, shouldStop)
+            sequence = threatSearch.findWin(player)
+            
+            if sequence is not None:
+                stats = SearchStats()
+                stats.nodes = threatSearch.nodes
+                stats.seconds = perf_counter() - startTime
+                stats.value = SEARCH_WIN_SCORE
+                stats.pv = [bits.toPos(action) for action in sequence]
+                stats.depths = [(len(sequence), stats.seconds, stats.nodes)]
+                return self.toAction(*bits.toPos(sequence[0])), stats
+            
+            timeBudgetMS -= (perf_counter() - startTime) * 1000
+        
+        if AI_WORKERS > 1:
+            # The searches run in other processes, only their progress reports come back
+            progress = [0, 0]
+            def trackProgress(depth, nodes):
+                progress[:] = depth, nodes
+                if onProgress is not None: onProgress(depth, nodes)
+            
+            parallelSearch = lazySmpSearch if AI_PARALLEL_MODE == "lazysmp" else parallelIterativeDeepening
+            value, action, depth = parallelSearch(bits, player, timeBudgetMS, maxDepth + 1, AI_WORKERS, TT_SIZE_MB, shouldStop, trackProgress)
+            
+            stats = SearchStats()
+            stats.seconds = perf_counter() - startTime
+            stats.nodes = progress[1]
+            stats.value = value
+            stats.depths = [(depth, stats.seconds, progress[1])]
+        else:
+            search = Search(bits, self.transpositionTable)
+            search.shouldStop = shouldStop
+            search.onProgress = onProgress
+            search.tracer = tracer
+            _, action, _ = search.iterativeDeepening(player, timeBudgetMS, maxDepth + 1)
+            stats = search.stats
+        
+        if action is None: return None, stats
+        
+        return self.toAction(*bits.toPos(action)), stats
+    
+    
+    
+    def mcts(self, state, player, timeBudgetMS, shouldStop=None, onProgress=None):
+        """ Choose a move with Monte Carlo Tree Search instead of alpha-beta. Meant for large boards, where
+        alpha-beta only reaches a few moves deep and random games played to the end say more about a move.
+        Args:
+            state (list[list[int]]): The state to search from.
+            player (int): The player to move.
+            timeBudgetMS (float): How long to search, in milliseconds.
+            shouldStop (optional): Function that ends the search early when it returns True.
+            onProgress (optional): Called with the deepest position in the tree and the number of games played out so far.
+        Returns:
+            Pos | None: The move that was tried the most, or None if there are no moves.
+        """
+        
+        bits = BitBoard.fromState(state, self.winLength)
+        search = MCTS(bits, ROLLOUT_POLICIES[MCTS_ROLLOUT], MCTS_BATCH_SIZE)
+        search.shouldStop = shouldStop
+        search.onProgress = onProgress
+        
+        action = search.search(player, timeBudgetMS, MCTS_MAX_PLAYOUTS)
+        if action is None: return None
+        
+        return self.toAction(*bits.toPos(action))
+    
+    
+    
+    def solve(self, state, player, maxNodes=PROOF_MAX_NODES, shouldStop=None):
+        """ Find out exactly if the state is won, drawn or lost, with a proof-number search.
+        Unlike minimax, nothing is estimated: the answer holds for any play, but only small boards (about 5x5) finish in time.
+        Args:
+            state (list[list[int]]): The state to solve.
+            player (int): The player to move.
+            maxNodes (int, optional): Give up after this many positions. Defaults to PROOF_MAX_NODES.
+            shouldStop (optional): Function that ends the search early when it returns True.
+        Returns:
+            tuple: The result for the player to move ("win", "draw", "loss" or "unknown"), a move that keeps it
+                (Pos, or None if lost, unknown or the board is full), the number of positions searched and the time taken in seconds.
+        """
+        
+        bits = BitBoard.fromState(state, self.winLength)
+        status, action, nodes, seconds = ProofNumberSearch(bits, TT_SIZE_MB, maxNodes, shouldStop).solve(player)
+        
+        move = None if action is None else self.toAction(*bits.toPos(action))
+        return status, move, nodes, seconds
+    
+    
+    
+    def ponder(self, state, player, shouldStop):
+        """ Search the state for the player to move, until `shouldStop` returns True or DEPTH is reached.
+        Used during the human's turn: the positions after every human reply end up in the transposition table,
+        so the AI's own search afterwards starts from a warm cache. Only the single process search shares its table.
+        Args:
+            state (list[list[int]]): The state where the human is to move.
+            player (int): The human player's value.
+            shouldStop: Function that returns True when the human has moved.
+        """
+        
+        bits = BitBoard.fromState(state, self.winLength)
+        search = Search(bits, self.transpositionTable)
+        search.shouldStop = shouldStop
+        
+        # One move deeper than the AI's own search, so every reply is searched to the AI's depth
+        search.iterativeDeepening(player, timeBudgetMS=INF, maxDepth=DEPTH + 2)
+    
+    
+    
+    def getLengthOfAllLinesThroughPos(self, state, pos: Pos, value):
+        
+        x, y = int(pos.x), int(pos.y)
+        
+        return [
+            1 + self.countInDirection(state, x, y, dx, dy, value) + self.countInDirection(state, x, y, -dx, -dy, value)
+            for dx, dy in self.dirSteps
+        ]
+    
+    
+
+    def evaluateState(self, state):
+        """ Evaluated the state based on the lengths of all lines on the board. Lengths are wheighted with the square, so longer lines get more points.
+        The board's own state is already scored by its BitBoard, which keeps the same score up to date on every move.
+        Other states need a full rescan: large boards use the NumPy version, which gives the same score without looping
+        over every cell in Python. The search never rescans (its leaves read the running score), so the rescan is only
+        used by tools and callers that evaluate states of their own.
+        """
+        if state is self.state: return self.bits.score
+        
+        if self.numCellsX * self.numCellsY >= NUMPY_EVAL_MIN_CELLS:
+            return vectorEval.evaluateState(state)
+        
+        return self.evaluateStatePython(state)
+    
+    
+    def evaluateStatePython(self, state):
+        """ Pure Python version of evaluateState, walking the lines through every occupied cell. """
+        score = 0
+            
+        for y, row in enumerate(state):
+            for x, val in enumerate(row):
+                if val == 0: continue
+                
+                lengths = self.getLengthOfAllLinesThroughPos(state, Pos(x, y), val)
+                
+                for v in lengths:
+                    score += v**2 * val # Keep the sign
+                
+        
+        return score
+
+    
+    
+    def __str__(self):
+        return str(self.state)
+    
+    
+    def print(self):
+        for row in self.state:
+            print(row)
@@ -0,0 +1,279 @@
+import atexit
+from multiprocessing import util
+from multiprocessing.shared_memory import SharedMemory
+from time import perf_counter, time
+
+from .bitboard import BitBoard
+from .search import Search, SearchTimeout, WIN_BOUND
+from .parallel import getPool
+
+
+HEADER_WORDS = 4 # stop flag, number of slots, generation, unused
+WORDS_PER_ENTRY = 2 # key ^ data, data
+MASK_64 = (1 << 64) - 1
+
+# Layout of the data word of an entry
+VALUE_OFFSET = 1 << 31 # Values are stored as unsigned 32-bit numbers
+DEPTH_SHIFT, DEPTH_MASK = 32, 0xFF
+FLAG_SHIFT, FLAG_MASK = 40, 0x3
+MOVE_SHIFT, MOVE_MASK = 42, 0x1FFFF # Stored as move + 1, so 0 means no move
+GENERATION_SHIFT, GENERATION_MASK = 59, 0x1F
+
+# Depths the helpers skip, by (workerId - 1) % len: a helper skips depth d if (d + phase) // size is odd.
+# Every helper gets its own pattern, so the helpers are spread over the depths instead of all working on the same one
+SKIP_SIZE = (1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 3, 3, 4, 4, 4, 4, 4, 4, 4, 4)
+SKIP_PHASE = (0, 1, 0, 1, 2, 3, 0, 1, 2, 3, 4, 5, 0, 1, 2, 3, 4, 5, 6, 7)
+
+
+class SharedTranspositionTable:
+    """Transposition table in shared memory, so several processes can search with the same table.
+
+    It has the same `probe`/`store` interface and depth-preferred replacement as `TranspositionTable`.
+    Every slot is two 64-bit words: the packed entry data, and the key XOR'ed with that data. There are
+    no locks. When two processes write a slot at the same time, the words can come from different
+    writes, but then the key no longer matches and the entry is simply treated as missing.
+    The header holds a stop flag and the search generation, which all processes share.
+    """
+
+    def __init__(self, sizeMB: float = 64, name: str = None):
+        """
+        Args:
+            sizeMB (float, optional): Size of the table when creating it. Defaults to 64.
+            name (str, optional): Name of an existing table to attach to. Creates a new table if None.
+        """
+
+        if name is None:
+            maxSlots = max(1, int(sizeMB * 1024 * 1024 / (8 * WORDS_PER_ENTRY)))
+            numSlots = 1 << (maxSlots.bit_length() - 1)
+
+            self.shm = SharedMemory(create=True, size=8 * (HEADER_WORDS + WORDS_PER_ENTRY * numSlots))
+            self.words = self.shm.buf.cast("Q")
+            self.words[1] = numSlots
+        else:
+            self.shm = SharedMemory(name=name)
+            self.words = self.shm.buf.cast("Q")
+
+            # Worker processes exit without running atexit, release the memory view before the memory is closed
+            util.Finalize(self, self.close, exitpriority=10)
+
+        self.name = self.shm.name
+        self.numSlots = self.words[1]
+        self.indexMask = self.numSlots - 1
+
+        self.probes = 0
+        self.hits = 0
+
+
+    @property
+    def generation(self) -> int:
+        return self.words[2]
+
+
+    @property
+    def stopped(self) -> bool:
+        return self.words[0] != 0
+
+
+    @stopped.setter
+    def stopped(self, value: bool):
+        self.words[0] = 1 if value else 0
+
+
+    def newSearch(self):
+        self.words[2] = (self.words[2] + 1) & GENERATION_MASK
+
+
+    def clear(self):
+        for i in range(HEADER_WORDS, len(self.words)):
+            self.words[i] = 0
+
+
+    def probe(self, key: int):
+        """Look up a position. Returns the same `(key, depth, flag, value, move, generation)` tuple as `TranspositionTable.probe`, or None."""
+
+        self.probes += 1
+        slot = HEADER_WORDS + WORDS_PER_ENTRY * (key & self.indexMask)
+        data = self.words[slot + 1]
+
+        if data == 0 or self.words[slot] ^ data != key: return None
+
+        self.hits += 1
+        move = (data >> MOVE_SHIFT & MOVE_MASK) - 1
+
+        return (
+            key,
+            data >> DEPTH_SHIFT & DEPTH_MASK,
+            data >> FLAG_SHIFT & FLAG_MASK,
+            (data & 0xFFFFFFFF) - VALUE_OFFSET,
+            None if move < 0 else move,
+            data >> GENERATION_SHIFT & GENERATION_MASK,
+        )
+
+
+    def store(self, key: int, depth: int, flag: int, value: int, move: int | None):
+        """Store the result of searching a position, using depth-preferred replacement."""
+
+        slot = HEADER_WORDS + WORDS_PER_ENTRY * (key & self.indexMask)
+        generation = self.words[2]
+
+        old = self.words[slot + 1]
+        if old and (old >> GENERATION_SHIFT & GENERATION_MASK) == generation and (old >> DEPTH_SHIFT & DEPTH_MASK) > depth:
+            return # Keep the deeper entry from the current search
+
+        if move is None and old and self.words[slot] ^ old == key:
+            move = (old >> MOVE_SHIFT & MOVE_MASK) - 1
+            if move < 0: move = None
+
+        data = (
+            (value + VALUE_OFFSET) & 0xFFFFFFFF
+            | min(depth, DEPTH_MASK) << DEPTH_SHIFT
+            | flag << FLAG_SHIFT
+            | (0 if move is None else move + 1) << MOVE_SHIFT
+            | generation << GENERATION_SHIFT
+        )
+
+        self.words[slot] = (key ^ data) & MASK_64
+        self.words[slot + 1] = data
+
+
+    def close(self):
+        if self.words is None: return
+        self.words.release()
+        self.words = None
+        self.shm.close()
+
+
+    def __len__(self):
+        return sum(1 for slot in range(self.numSlots) if self.words[HEADER_WORDS + WORDS_PER_ENTRY * slot + 1])
+
+
+
+# The table owned by the game process, and the tables worker processes have attached to, by name
+_ownTable = None
+_attachedTables = {}
+_workerSearches = {}
+
+
+def getSharedTable(sizeMB: float = 64) -> SharedTranspositionTable:
+    """The game process' shared table. Created on first use and removed when the program exits."""
+    global _ownTable
+
+    if _ownTable is None:
+        _ownTable = SharedTranspositionTable(sizeMB)
+        atexit.register(_removeOwnTable)
+
+    return _ownTable
+
+
+def _removeOwnTable():
+    global _ownTable
+    if _ownTable is None: return
+
+    _ownTable.close()
+    _ownTable.shm.unlink()
+    _ownTable = None
+
+
+def _lazySmpWorker(tableName: str, position: tuple, player: int, maxDepth: int, deadline: float, workerId: int):
+    """Runs in a helper process: iterative deepening on the shared table until the stop flag is set.
+
+    Every helper skips its own pattern of depths (SKIP_SIZE, SKIP_PHASE) and orders quiet moves with its own
+    seeded noise, so that at any time the processes are working on different parts of the tree, and every
+    entry one of them stores can save work for the others.
+
+    Returns:
+        tuple: `(value, action, depth, nodes)` of the deepest finished search, with action None if none finished.
+    """
+
+    if tableName not in _attachedTables:
+        _attachedTables[tableName] = SharedTranspositionTable(name=tableName)
+    table = _attachedTables[tableName]
+
+    numCellsX, numCellsY, winLength, moves = position
+
+    key = (numCellsX, numCellsY, winLength)
+    if key not in _workerSearches:
+        _workerSearches[key] = Search(BitBoard(numCellsX, numCellsY, winLength), table)
+
+    search = _workerSearches[key]
+    search.tt = table
+    board = search.board
+    board.undoTo(0)
+    for index, stonePlayer in moves:
+        board.makeMove(index, stonePlayer)
+
+    search.nodes = 0
+    search.nextTimeCheck = 0
+    search.ordering.newSearch()
+    search.ordering.perturb(workerId)
+    search.rootAction = None
+    search.deadline = perf_counter() + (deadline - time())
+    search.shouldStop = lambda: table.stopped
+
+    numEmpty = board.countEmpty()
+    result = (0, None, 0)
+
+    skipSize = SKIP_SIZE[(workerId - 1) % len(SKIP_SIZE)]
+    skipPhase = SKIP_PHASE[(workerId - 1) % len(SKIP_PHASE)]
+
+    for depth in range(1, min(maxDepth, numEmpty) + 1):
+        if (depth + skipPhase) // skipSize % 2: continue
+
+        try:
+            value = search.negamax(player, depth)
+        except SearchTimeout:
+            break
+
+        result = (value, search.rootAction, depth)
+        if abs(value) > WIN_BOUND: break
+
+    return (*result, search.nodes)
+
+
+def lazySmpSearch(board: BitBoard, player: int, timeBudgetMS: float, maxDepth: int, numWorkers: int,
+                  ttSizeMB: float = 64, shouldStop=None, onProgress=None) -> tuple[int, int | None, int]:
+    """Lazy SMP: the game process and `numWorkers - 1` helper processes all search the same position with
+    iterative deepening, sharing one transposition table. The game process decides when to stop, exactly
+    like `Search.iterativeDeepening`, and the result of the deepest finished search of any process is used.
+    The helpers only pay off with a free core each: on fewer cores they take time from the game process' search.
+    There is no measured speedup yet. It has only been timed on a single CPU, where a 1 second search from one
+    stone on 6x6 and 7x7 (win length 4) finished one depth less than `Search.iterativeDeepening` or the same.
+
+    Args:
+        board (BitBoard): The position to search. It is not changed.
+        player (int): The player to move.
+        timeBudgetMS (float): Wall-clock time budget in milliseconds.
+        maxDepth (int): Deepest search to try.
+        numWorkers (int): Total number of searching processes, including this one.
+        ttSizeMB (float, optional): Size of the shared table, only used when it is first created.
+        shouldStop (optional): Function that stops every process when it returns True, like `Search.shouldStop`.
+        onProgress (optional): Called with the depth and nodes of the game process' search, like `Search.onProgress`.
+    Returns:
+        tuple[int, int | None, int]: The value, the best action and the depth it comes from.
+    """
+
+    table = getSharedTable(ttSizeMB)
+    table.stopped = False
+
+    pool, _, _ = getPool(numWorkers - 1)
+    position = (board.numCellsX, board.numCellsY, board.winLength, tuple(board.moves))
+    deadline = time() + timeBudgetMS / 1000
+
+    search = Search(board, table)
+    search.shouldStop = lambda: table.stopped or (shouldStop is not None and shouldStop())
+    search.onProgress = onProgress
+
+    futures = [
+        pool.submit(_lazySmpWorker, table.name, position, player, maxDepth, deadline, workerId)
+        for workerId in range(1, numWorkers)
+    ]
+
+    value, action, depth = search.iterativeDeepening(player, timeBudgetMS, maxDepth)
+
+    table.stopped = True
+    for future in futures:
+        helperValue, helperAction, helperDepth, _ = future.result()
+        if helperAction is not None and helperDepth > depth:
+            value, action, depth = helperValue, helperAction, helperDepth
+
+    return value, action, depth
@@ -5,8 +5,8 @@ import sys
 from common.ui_elements import Text
 from common.setup import FPS, GAMEPLAY_BG_COLOR
 
-from TicTacToeGame.setup import HUMAN_THINKING_TEXT, AI_THINKING_TEXT
-from TicTacToeGame.structs import Grid, Board, AIPlayer, HumanPlayer
+from TicTacToeGame.setup import HUMAN_THINKING_TEXT, AI_THINKING_TEXT, AI_PONDER, AI_STATS_OVERLAY
+from TicTacToeGame.structs import Grid, Board, AISearch, AIPonder, HumanPlayer
 
 
 
@@ -41,23 +41,35 @@ def gameplayLoop(window: pygame.Surface, grid: Grid, board: Board, initPlayer: i
         center = Vector2(window.get_width() // 2, 140)
     )
     
-    AICooldownFrames = 5 # Hard wait for AI to start. Used to ensure screen is drawn before AI starts thinking 
+    AIProgressText = Text(
+        window,
+        text = "",
+        font = pygame.font.Font(None, 24),
+        color = "black",
+        center = Vector2(window.get_width() // 2, 165)
+    )
+    
+    statsFont = pygame.font.Font(None, 20)
+    statsTexts = [] # Overlay with the stats of the AI's last search, if AI_STATS_OVERLAY is on
     
     winner = None
     terminal = False
 
     lastAIMoveTime = 0
+    aiSearch = None # The AI's search for the current move, running in the background
+    aiPonder = None # The AI's search during the human's turn
+    ponder = AI_PONDER and "AI" in players.values()
 
     while not terminal:
 
-        AICooldownFrames -= 1
-        
         currentPlayerType = players[currentPlayer]
         validMove = False
     
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 terminal = True
+                if aiSearch is not None: aiSearch.cancel()
+                if aiPonder is not None: aiPonder.stop()
                 pygame.quit()
                 sys.exit()
             
@@ -66,11 +78,34 @@ def gameplayLoop(window: pygame.Surface, grid: Grid, board: Board, initPlayer: i
                 validMove, didWin = HumanPlayer(event, currentPlayer, grid, board)
                 
         
-        # Player is AI and should make a move regardless of the event  
-        if currentPlayerType == "AI" and AICooldownFrames <= 0:
-            validMove, didWin = AIPlayer(board, currentPlayer, lastMoveTime=lastAIMoveTime)
-            lastAIMoveTime = pygame.time.get_ticks()
-            AICooldownFrames = 5 # Reset
+        # Player is human: let the AI search the human's possible moves in the meantime
+        if currentPlayerType == "Human" and ponder and aiPonder is None and not validMove:
+            aiPonder = AIPonder(board, currentPlayer)
+        
+        # Player is AI (alpha-beta or MCTS): start searching, and make the move once the search is done and the minimum delay has passed
+        if currentPlayerType != "Human":
+            if aiPonder is not None:
+                aiPonder.stop()
+                aiPonder = None
+            
+            if aiSearch is None:
+                aiSearch = AISearch(board, currentPlayer, lastMoveTime=lastAIMoveTime, playerType=currentPlayerType)
+                AIProgressText.updateText(aiSearch.progressText())
+            
+            elif aiSearch.isReady():
+                validMove, didWin = aiSearch.perform()
+                lastAIMoveTime = pygame.time.get_ticks()
+                
+                if AI_STATS_OVERLAY and aiSearch.stats is not None:
+                    statsTexts = [
+                        Text(window, line, statsFont, "black", topLeftPos=Vector2(10, 10 + 16 * i))
+                        for i, line in enumerate(aiSearch.stats.summaryLines())
+                    ]
+                
+                aiSearch = None
+            
+            else:
+                AIProgressText.updateText(aiSearch.progressText())
             
         
         # If a valid move was made this frame, check for win or draw
@@ -101,9 +136,13 @@ def gameplayLoop(window: pygame.Surface, grid: Grid, board: Board, initPlayer: i
         if not terminal:
             currentPlayerText.draw()
             currentPlayerDescription.draw()
+            if aiSearch is not None: AIProgressText.draw()
         
         grid.draw(window)
         board.draw(window)
+        
+        for text in statsTexts:
+            text.draw()
 
         pygame.display.flip()
 
@@ -112,4 +151,6 @@ def gameplayLoop(window: pygame.Surface, grid: Grid, board: Board, initPlayer: i
         clock.tick(FPS)
     
     
+    if aiPonder is not None: aiPonder.stop()
+    
     return winner
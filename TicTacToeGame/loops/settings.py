@@ -63,9 +63,11 @@ def settingsLoop(window, clock, initSettings):
 
     setPlayerXHuman = SettingButton(window, "Human", buttonFont, buttonColor, buttonTextColor, center + Vector2(75, -50), buttonPadding, buttonBorderRadius, lambda s: s.update({"playerX": "Human"}), "playerX", playerXtext)
     setPlayerXAI    = SettingButton(window,    "AI", buttonFont, buttonColor, buttonTextColor, center + Vector2(160, -50), buttonPadding, buttonBorderRadius, lambda s: s.update({"playerX": "AI"}), "playerX", playerXtext)
+    setPlayerXMCTS  = SettingButton(window,  "MCTS", buttonFont, buttonColor, buttonTextColor, center + Vector2(240, -50), buttonPadding, buttonBorderRadius, lambda s: s.update({"playerX": "MCTS"}), "playerX", playerXtext)
     
     setPlayerOHuman = SettingButton(window, "Human", buttonFont, buttonColor, buttonTextColor, center + Vector2(75, 0), buttonPadding, buttonBorderRadius, lambda s: s.update({"playerO": "Human"}), "playerO", playerOtext)
     setPlayerOAI    = SettingButton(window,    "AI", buttonFont, buttonColor, buttonTextColor, center + Vector2(160, 0), buttonPadding, buttonBorderRadius, lambda s: s.update({"playerO": "AI"}), "playerO", playerOtext)
+    setPlayerOMCTS  = SettingButton(window,  "MCTS", buttonFont, buttonColor, buttonTextColor, center + Vector2(240, 0), buttonPadding, buttonBorderRadius, lambda s: s.update({"playerO": "MCTS"}), "playerO", playerOtext)
 
 
     settingTexts = [
@@ -75,8 +77,8 @@ def settingsLoop(window, clock, initSettings):
     settingButtons = [
         increaseSizeX, increaseSizeY, decreaseSizeX, decreaseSizeY,
         increaseWinLen, decreaseWinLen,
-        setPlayerXHuman, setPlayerXAI,
-        setPlayerOHuman, setPlayerOAI
+        setPlayerXHuman, setPlayerXAI, setPlayerXMCTS,
+        setPlayerOHuman, setPlayerOAI, setPlayerOMCTS
     ]
     
     
@@ -0,0 +1,291 @@
+import random
+from functools import lru_cache
+from math import log, sqrt
+from time import perf_counter
+
+import numpy as np
+
+from .bitboard import BitBoard, getWindowCells
+
+
+EXPLORATION = 1.4 # How much UCT favours rarely tried moves over moves that scored well so far
+
+
+def getEmptyCells(board: BitBoard) -> list[int]:
+    """Bit indices of every empty cell, in row-major order."""
+
+    cells = []
+    empty = board.cellMask & ~board.occupied
+    while empty:
+        low = empty & -empty
+        cells.append(low.bit_length() - 1)
+        empty ^= low
+
+    return cells
+
+
+def randomRollouts(board: BitBoard, player: int, count: int) -> list[int]:
+    """Play `count` games from the position with uniformly random moves, one after the other.
+
+    Args:
+        board (BitBoard): The position to play from. It is not changed.
+        player (int): The player to move.
+        count (int): Number of games to play.
+    Returns:
+        list[int]: The winner of every game: 1, -1, or 0 for a draw.
+    """
+
+    empty = getEmptyCells(board)
+    cellWinMasks = board.cellWinMasks
+    results = []
+
+    for _ in range(count):
+        stones = {1: board.stones[1], -1: board.stones[-1]}
+        mover, winner = player, 0
+
+        for index in random.sample(empty, len(empty)):
+            stones[mover] |= 1 << index
+            if any(stones[mover] & mask == mask for mask in cellWinMasks[index]):
+                winner = mover
+                break
+            mover = -mover
+
+        results.append(winner)
+
+    return results
+
+
+@lru_cache(maxsize=None)
+def getWindowArray(numCellsX: int, numCellsY: int, winLength: int) -> np.ndarray:
+    """The bit indices of the cells of every window as a (numWindows, winLength) array."""
+    windowCells = getWindowCells(numCellsX, numCellsY, winLength)
+    return np.array(windowCells, dtype=np.intp).reshape(len(windowCells), winLength)
+
+
+_rng = np.random.default_rng()
+
+def numpyRollouts(board: BitBoard, player: int, count: int) -> np.ndarray:
+    """Play `count` random games from the position all at once with NumPy. Same result as `randomRollouts`.
+
+    Every game is a random order of the empty cells, with the players taking turns. Instead of playing the
+    moves one by one, every cell gets the move number it is played at, and every window is completed at the
+    largest move number of its cells, if all its cells belong to one player. The window that is completed
+    first decides the game. That is a handful of array operations for the whole batch, whatever its size.
+    """
+
+    empty = np.array(getEmptyCells(board), dtype=np.intp)
+    windows = getWindowArray(board.numCellsX, board.numCellsY, board.winLength)
+    if not len(windows) or not len(empty): return np.zeros(count, dtype=np.int8)
+
+    size = board.stride * board.numCellsY
+
+    # Move number of every empty cell in every game, a random permutation per game. Stones already placed count as move -1
+    moveNumbers = _rng.permuted(np.tile(np.arange(len(empty), dtype=np.int16), (count, 1)), axis=1)
+    times = np.full((count, size), -1, dtype=np.int16)
+    times[:, empty] = moveNumbers
+
+    owners = np.zeros((count, size), dtype=np.int8)
+    for stonePlayer in (1, -1):
+        stones = board.stones[stonePlayer]
+        owners[:, [index for index in range(size) if stones >> index & 1]] = stonePlayer
+    owners[:, empty] = np.where(moveNumbers % 2 == 0, player, -player)
+
+    completedAt = times[:, windows].max(axis=2)
+    ownerSums = owners[:, windows].sum(axis=2, dtype=np.int16)
+    completedAt[np.abs(ownerSums) != board.winLength] = np.iinfo(np.int16).max # Windows with both players' stones are never completed
+
+    first = completedAt.argmin(axis=1)
+    games = np.arange(count)
+    winners = np.sign(ownerSums[games, first]).astype(np.int8)
+    winners[completedAt[games, first] == np.iinfo(np.int16).max] = 0
+
+    return winners
+
+
+ROLLOUT_POLICIES = {
+    "python": randomRollouts,
+    "numpy": numpyRollouts,
+}
+
+
+
+class MCTSNode:
+    """A position in the search tree, reached by `action` of `player`."""
+
+    __slots__ = ("action", "player", "parent", "children", "untried", "visits", "score", "winner")
+
+    def __init__(self, action: int | None, player: int, parent, untried: list[int], winner: int | None = None):
+        self.action = action
+        self.player = player # The player who made the move into this position
+        self.parent = parent
+        self.children = []
+        self.untried = untried # Moves that have no child yet, tried from the back
+        self.visits = 0 # Number of played out games through this position
+        self.score = 0.0 # 1 for every game `player` won, 0.5 for every draw
+        self.winner = winner # 1, -1 or 0 if the game is over in this position, otherwise None
+
+
+
+class MCTS:
+    """Monte Carlo Tree Search with UCT, for boards where alpha-beta can't look far enough ahead.
+
+    Every iteration walks down the tree choosing the child with the best UCT value, adds one new position,
+    plays a batch of random games from it and counts the results back up the tree. The games are played by
+    a rollout policy, a function `(board, player, count) -> winners` (see ROLLOUT_POLICIES), so a batch can
+    be played out all at once with NumPy. The move that was tried the most is played.
+
+    Like `Search`, moves are made and undone on one BitBoard, and the same threat rules cut the moves down:
+    a player that can win only wins, and a player facing a win has to block it.
+    """
+
+    def __init__(self, board: BitBoard, rollout=numpyRollouts, batchSize: int = 64, exploration: float = EXPLORATION):
+        """
+        Args:
+            board (BitBoard): The position to search. It is unchanged afterwards.
+            rollout (optional): The rollout policy. Defaults to numpyRollouts.
+            batchSize (int, optional): Games played out from every new position. Defaults to 64.
+            exploration (float, optional): The UCT exploration constant. Defaults to EXPLORATION.
+        """
+
+        self.board = board
+        self.rollout = rollout
+        self.batchSize = batchSize
+        self.exploration = exploration
+
+        self.shouldStop = None # Optional function, checked every iteration. The search stops when it returns True
+        self.onProgress = None # Optional function, called with (deepest tree depth, games played) every iteration
+        self.playouts = 0
+        self.maxDepth = 0
+
+
+    def search(self, player: int, timeBudgetMS: float | None = None, maxPlayouts: int | None = None) -> int | None:
+        """Search the position until the time or playout budget runs out.
+
+        Args:
+            player (int): The player to move.
+            timeBudgetMS (float | None, optional): Wall-clock budget in milliseconds. None for no limit.
+            maxPlayouts (int | None, optional): Stop after this many played out games. None for no limit.
+        Returns:
+            int | None: Bit index of the move tried the most, or None if there are no moves.
+                If the budget ran out before the first playout, one of the moves at random.
+        """
+
+        board = self.board
+        numMoves = len(board.moves)
+        deadline = None if timeBudgetMS is None else perf_counter() + timeBudgetMS / 1000
+
+        root = MCTSNode(None, -player, None, self.getMoves(player))
+        if not root.untried: return None
+        if len(root.untried) == 1: return root.untried[0] # A win or a forced block
+
+        self.playouts = 0
+        self.maxDepth = 0
+
+        while True:
+            if maxPlayouts is not None and self.playouts >= maxPlayouts: break
+            if deadline is not None and perf_counter() >= deadline: break
+            if self.shouldStop is not None and self.shouldStop(): break
+
+            node = self.selectAndExpand(root)
+            self.maxDepth = max(self.maxDepth, len(board.moves) - numMoves)
+
+            if node.winner is not None:
+                winners = [node.winner] * self.batchSize
+            else:
+                winners = self.rollout(board, -node.player, self.batchSize)
+
+            self.backpropagate(node, winners)
+            board.undoTo(numMoves)
+
+            if self.onProgress is not None: self.onProgress(self.maxDepth, self.playouts)
+
+        if not root.children: return root.untried[-1] # No budget for a single playout, the move that would be tried first
+        return max(root.children, key=lambda child: child.visits).action
+
+
+    def selectAndExpand(self, root: MCTSNode) -> MCTSNode:
+        """Walk down to a position with untried moves (or the end of the game) and add a child for one of them.
+        The moves are left made on the board."""
+
+        board = self.board
+        node = root
+
+        # Select: follow the best UCT value through the positions where every move has been tried
+        while not node.untried and node.children:
+            logVisits = log(node.visits)
+            exploration = self.exploration
+            node = max(
+                node.children,
+                key=lambda child: child.score / child.visits + exploration * sqrt(logVisits / child.visits)
+            )
+            board.makeMove(node.action, node.player)
+
+        if node.winner is not None or not node.untried: return node
+
+        # Expand
+        action = node.untried.pop()
+        player = -node.player
+        board.makeMove(action, player)
+
+        if board.hasWon(action, player): child = MCTSNode(action, player, node, [], winner=player)
+        elif board.isFull() or board.isDeadDraw(): child = MCTSNode(action, player, node, [], winner=0)
+        else: child = MCTSNode(action, player, node, self.getMoves(-player))
+
+        node.children.append(child)
+        return child
+
+
+    def backpropagate(self, node: MCTSNode, winners):
+        """Add the results of a batch of games to the node and every position above it."""
+
+        count = len(winners)
+        wins = {1: 0, -1: 0, 0: 0}
+        for winner, num in zip(*np.unique(np.asarray(winners), return_counts=True)):
+            wins[int(winner)] = int(num)
+
+        self.playouts += count
+
+        while node is not None:
+            node.visits += count
+            node.score += wins[node.player] + 0.5 * wins[0]
+            node = node.parent
+
+
+    def getMoves(self, player: int) -> list[int]:
+        """The moves to try for the player to move, in random order."""
+
+        board = self.board
+
+        winning = board.getWinningCells(player)
+        if winning: return [(winning & -winning).bit_length() - 1]
+
+        threats = board.getWinningCells(-player)
+        if threats: return [(threats & -threats).bit_length() - 1]
+
+        actions = board.getActions()
+        random.shuffle(actions)
+        return actions
+
+
+
+if __name__ == '__main__':
+    # Games per second of the rollout policies on an empty board, at different batch sizes. Run with: python -m TicTacToeGame.mcts
+    cases = [(3, 3, 3), (7, 7, 4), (15, 15, 5)] # numCellsX, numCellsY, winLength
+
+    print(f"{'Board':>10} {'Policy':>7} {'Batch':>6} {'Playouts/s':>11}")
+
+    for numCellsX, numCellsY, winLength in cases:
+        board = BitBoard(numCellsX, numCellsY, winLength)
+
+        for name, policy in ROLLOUT_POLICIES.items():
+            for batchSize in (1, 16, 64, 256):
+                if name == "python" and batchSize > 1: continue # Plays one game at a time anyway
+
+                playouts = 0
+                startTime = perf_counter()
+                while perf_counter() - startTime < 1:
+                    policy(board, 1, batchSize)
+                    playouts += batchSize
+
+                rate = playouts / (perf_counter() - startTime)
+                print(f"{f'{numCellsX}x{numCellsY} k{winLength}':>10} {name:>7} {batchSize:>6} {rate:>11,.0f}")
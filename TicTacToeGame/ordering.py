@@ -0,0 +1,118 @@
+import random
+from functools import lru_cache
+
+from .bitboard import BitBoard, getNeighborMasks
+
+
+# Scores that put whole groups of moves ahead of the rest. Within a group, moves keep their history/bias order.
+TT_MOVE_SCORE = 1 << 40
+WIN_MOVE_SCORE = 1 << 39
+BLOCK_MOVE_SCORE = 1 << 38
+KILLER_MOVE_SCORE = 1 << 37
+
+ADJACENCY_WEIGHT = 16 # Bias for every stone next to the move
+NUM_KILLERS = 2 # Killer moves kept per ply
+
+
+@lru_cache(maxsize=None)
+def getCenterBias(numCellsX: int, numCellsY: int) -> tuple[int, ...]:
+    """For every bit index, a small bonus that is largest in the center of the board."""
+
+    stride = numCellsX + 1
+    centerBias = [0] * (stride * numCellsY)
+
+    for y in range(numCellsY):
+        for x in range(numCellsX):
+            # Twice the distance, to stay in integers on boards with an even number of cells
+            distance = abs(2 * x - (numCellsX - 1)) + abs(2 * y - (numCellsY - 1))
+            centerBias[y * stride + x] = numCellsX + numCellsY - distance
+
+    return tuple(centerBias)
+
+
+
+class MoveOrdering:
+    """Sorts the moves of a position so that alpha-beta finds cutoffs early. Moves are tried in this order:
+
+    1. The move from the transposition table (or the previous iteration's best move at the root)
+    2. Moves that win on the spot
+    3. Moves that block a win of the opponent on the next move
+    4. Killer moves: moves that caused a cutoff in another position at the same ply
+    5. Everything else, by history score (how often and how deep the move caused cutoffs),
+       then by the number of stones next to it and closeness to the center.
+    """
+
+    def __init__(self, board: BitBoard):
+        self.board = board
+        self.centerBias = getCenterBias(board.numCellsX, board.numCellsY)
+        self.neighborMasks = getNeighborMasks(board.numCellsX, board.numCellsY)
+
+        size = board.stride * board.numCellsY
+        self.history = {1: [0] * size, -1: [0] * size}
+        self.killers = []
+
+
+    def perturb(self, seed: int | None):
+        """Add a small seeded amount to the center bias of every cell, or restore the plain bias with None.
+        Quiet moves with equal history and neighbors are then tried in a different order for every seed."""
+
+        centerBias = getCenterBias(self.board.numCellsX, self.board.numCellsY)
+        if seed is None:
+            self.centerBias = centerBias
+            return
+
+        rng = random.Random(seed)
+        self.centerBias = tuple(bias + rng.randrange(ADJACENCY_WEIGHT) for bias in centerBias)
+
+
+    def newSearch(self):
+        """Forget the killer moves and halve the history scores, so old information fades out between moves."""
+        self.killers = []
+        for scores in self.history.values():
+            for i, score in enumerate(scores):
+                if score: scores[i] = score >> 1
+
+
+    def orderMoves(self, actions: list[int], player: int, ply: int, ttMove: int | None = None,
+                   winning: int | None = None, blocking: int | None = None) -> list[int]:
+        """Return the actions sorted from most to least promising for the player to move.
+        `winning` and `blocking` are the masks of `getWinningCells` for the player and the opponent,
+        computed here if the caller doesn't already have them."""
+
+        if len(actions) <= 1: return actions
+
+        board = self.board
+        occupied = board.occupied
+        if winning is None: winning = board.getWinningCells(player)
+        if blocking is None: blocking = board.getWinningCells(-player)
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        history = self.history[player]
+        centerBias = self.centerBias
+        neighborMasks = self.neighborMasks
+
+        def score(action):
+            bit = 1 << action
+            if action == ttMove: return TT_MOVE_SCORE
+            if winning & bit: return WIN_MOVE_SCORE
+            if blocking & bit: return BLOCK_MOVE_SCORE
+
+            value = history[action] * 1024 + (neighborMasks[action] & occupied).bit_count() * ADJACENCY_WEIGHT + centerBias[action]
+            if action in killers: value += KILLER_MOVE_SCORE
+            return value
+
+        return sorted(actions, key=score, reverse=True)
+
+
+    def recordCutoff(self, action: int, player: int, ply: int, depth: int):
+        """Remember a quiet move that caused a beta cutoff."""
+
+        self.history[player][action] += depth * depth
+
+        while len(self.killers) <= ply:
+            self.killers.append([])
+
+        killers = self.killers[ply]
+        if action in killers: return
+
+        killers.insert(0, action)
+        del killers[NUM_KILLERS:]
@@ -0,0 +1,244 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import count
+from time import perf_counter, time
+
+from .bitboard import BitBoard
+from .search import Search, SearchTimeout, WIN_BOUND, INF
+from .transposition import TranspositionTable
+
+
+STOP_POLL_INTERVAL = 0.05 # Seconds between checks of shouldStop while waiting for the workers
+
+# One pool per worker count, kept alive between moves since starting processes is slow
+_pools = {}
+_searchIds = count(1) # Tells the workers when a new search starts, see _searchRootMove
+
+# Set in every worker process by _initWorker
+_sharedAlpha = None
+_sharedStop = None
+_workerTTSizeMB = 64
+_workerSearches = {}
+_workerSearchIds = {} # Board size -> id of the search the worker's tables were last used for
+
+
+def _initWorker(sharedAlpha, sharedStop, ttSizeMB: float):
+    global _sharedAlpha, _sharedStop, _workerTTSizeMB
+    _sharedAlpha = sharedAlpha
+    _sharedStop = sharedStop
+    _workerTTSizeMB = ttSizeMB
+
+
+def getPool(numWorkers: int, ttSizeMB: float = 64) -> tuple[ProcessPoolExecutor, multiprocessing.Value, multiprocessing.Value]:
+    """Get the process pool for this number of workers, the shared root alpha its workers read,
+    and the shared stop flag: while it is set, running tasks give up at their next time check."""
+
+    if numWorkers not in _pools:
+        context = multiprocessing.get_context("spawn") # Never fork the pygame window into the workers
+        sharedAlpha = context.Value("q", -INF)
+        sharedStop = context.Value("b", 0)
+
+        pool = ProcessPoolExecutor(
+            max_workers=numWorkers,
+            mp_context=context,
+            initializer=_initWorker,
+            initargs=(sharedAlpha, sharedStop, ttSizeMB / numWorkers),
+        )
+        _pools[numWorkers] = (pool, sharedAlpha, sharedStop)
+
+    return _pools[numWorkers]
+
+
+def shutdownPools(waitForWorkers: bool = False):
+    for pool, _, _ in _pools.values():
+        pool.shutdown(wait=waitForWorkers, cancel_futures=True)
+    _pools.clear()
+
+
+def _searchRootMove(position: tuple, action: int, player: int, depth: int, deadline: float | None, searchId: int):
+    """Runs in a worker process: search one root move of the position.
+
+    Args:
+        position (tuple): `(numCellsX, numCellsY, winLength, moves)`, where moves is the BitBoard move stack.
+            Plain tuples pickle cheaply and need nothing from pygame.
+        action (int): The root move to search.
+        player (int): The player making the root move.
+        depth (int): Search depth, counting the root move.
+        deadline (float | None): `time.time()` at which to give up, or None.
+        searchId (int): Id of the search the task belongs to. The first task of every search
+            starts a new generation in the worker's tables, like `Search.bestAction` does.
+    Returns:
+        tuple: `(action, value, nodes)`, with value None if the deadline was reached.
+    """
+
+    numCellsX, numCellsY, winLength, moves = position
+
+    # Every worker keeps its search (and transposition table) between tasks on the same board size
+    key = (numCellsX, numCellsY, winLength)
+    if key not in _workerSearches:
+        _workerSearches[key] = Search(BitBoard(numCellsX, numCellsY, winLength), TranspositionTable(_workerTTSizeMB))
+
+    search = _workerSearches[key]
+    if _workerSearchIds.get(key) != searchId:
+        _workerSearchIds[key] = searchId
+        search.tt.newSearch()
+        search.ordering.newSearch()
+
+    search.shouldStop = lambda: _sharedStop.value
+    board = search.board
+    board.undoTo(0)
+    for index, stonePlayer in moves:
+        board.makeMove(index, stonePlayer)
+
+    search.nodes = 0
+    search.nextTimeCheck = 0
+    search.deadline = None if deadline is None else perf_counter() + (deadline - time())
+
+    try:
+        value = search.valueOfMove(action, player, depth, alpha=_sharedAlpha.value)
+    except SearchTimeout:
+        value = None
+
+    return action, value, search.nodes
+
+
+def rootParallelSearch(board: BitBoard, player: int, depth: int, numWorkers: int, firstMove: int | None = None,
+                       deadline: float | None = None, ttSizeMB: float = 64, shouldStop=None,
+                       searchId: int | None = None) -> tuple[int | None, int | None, int]:
+    """Search the root moves of the position in parallel, one move per task.
+
+    The most promising move is searched first on its own, to get a good alpha bound. The remaining
+    moves are then spread over the worker processes. Whenever a move finishes with a better value,
+    the shared alpha is raised, so every task started after that searches with the tighter window.
+    When the search ends early (a win, the deadline or shouldStop), the shared stop flag makes the
+    tasks that are still running give up, and they are waited for so they don't slow down the next search.
+
+    This has no measured speedup yet. It has only been timed on a single CPU, where it is slower than
+    `Search.bestAction` (0.3x to 0.9x with 1 to 4 workers, see `__main__`), so it stays off by default.
+
+    Args:
+        board (BitBoard): The position to search. It is not changed.
+        player (int): The player to move.
+        depth (int): Search depth, counting the root move.
+        numWorkers (int): Number of worker processes.
+        firstMove (int | None, optional): Move to search first, e.g. the best move of a shallower search.
+        deadline (float | None, optional): `time.time()` at which to give up.
+        ttSizeMB (float, optional): Transposition table memory, split between the workers.
+        shouldStop (optional): Function that is polled while waiting for the workers. The search gives up when it returns True.
+        searchId (int | None, optional): Id shared by the depths of one iterative deepening search, so the
+            workers keep their table entries between them. None starts a new search.
+    Returns:
+        tuple: `(value, action, nodes)`. Value and action are None if the deadline was reached (or the search
+            was stopped) before every move was searched.
+    """
+
+    pool, sharedAlpha, sharedStop = getPool(numWorkers, ttSizeMB)
+    sharedAlpha.value = -INF
+    sharedStop.value = 0
+
+    actions, forced = Search(board, TranspositionTable(0)).getOrderedActions(player, 0, firstMove)
+    if not actions: return 0, None, 0
+
+    # The same extension as the root of Search.negamax, so both searches score the forced block alike
+    if forced: depth += 1
+
+    if searchId is None: searchId = next(_searchIds)
+    position = (board.numCellsX, board.numCellsY, board.winLength, tuple(board.moves))
+    submit = lambda action: pool.submit(_searchRootMove, position, action, player, depth, deadline, searchId)
+
+    bestValue, bestAction, nodes = -INF, None, 0
+    pending = {submit(actions[0])}
+    remaining = iter(actions[1:])
+    timedOut = False
+
+    while pending:
+        done, pending = wait(pending, timeout=STOP_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+        if shouldStop is not None and shouldStop(): timedOut = True
+
+        for future in done:
+            action, value, taskNodes = future.result()
+            nodes += taskNodes
+
+            if value is None:
+                timedOut = True
+                continue
+
+            if value > bestValue:
+                bestValue, bestAction = value, action
+                sharedAlpha.value = max(sharedAlpha.value, value)
+
+        if timedOut or bestValue > WIN_BOUND:
+            sharedStop.value = 1
+            for future in pending: future.cancel()
+            for future in wait(pending).done:
+                if not future.cancelled(): nodes += future.result()[2]
+            break
+
+        # Keep every worker busy once the first move has set alpha
+        for action in remaining:
+            pending.add(submit(action))
+            if len(pending) >= numWorkers: break
+
+    if timedOut: return None, None, nodes
+    return bestValue, bestAction, nodes
+
+
+def parallelIterativeDeepening(board: BitBoard, player: int, timeBudgetMS: float, maxDepth: int, numWorkers: int,
+                               ttSizeMB: float = 64, shouldStop=None, onProgress=None) -> tuple[int, int | None, int]:
+    """Iterative deepening where every depth is a root-parallel search. Same result as `Search.iterativeDeepening`.
+    `shouldStop` and `onProgress` work like the attributes of `Search`, but progress is only reported between depths."""
+
+    startTime = time()
+    deadline = None # Depth 1 always finishes
+    numEmpty = board.countEmpty()
+    searchId = next(_searchIds)
+    result = (0, None, 0)
+    nodes = 0
+
+    for depth in range(1, min(maxDepth, numEmpty) + 1):
+        value, action, depthNodes = rootParallelSearch(board, player, depth, numWorkers, result[1], deadline, ttSizeMB,
+                                                       None if depth == 1 else shouldStop, searchId)
+        nodes += depthNodes
+        if onProgress is not None: onProgress(depth, nodes)
+        if action is None: break
+
+        result = (value, action, depth)
+        deadline = startTime + timeBudgetMS / 1000
+
+        if abs(value) > WIN_BOUND: break
+        if time() - startTime > timeBudgetMS / 2000: break
+
+    return result
+
+
+
+if __name__ == '__main__':
+    # Speedup of root splitting over the plain search at fixed depth. Run with: python -m TicTacToeGame.parallel
+    # Only run on a single CPU so far, where every worker count is slower than the serial search
+    import os
+
+    cases = [(5, 5, 4, 7), (6, 6, 4, 6)] # numCellsX, numCellsY, winLength, depth
+    workerCounts = sorted({1, 2, 4, os.cpu_count() or 1})
+
+    print(f"CPU count: {os.cpu_count()}")
+    print(f"{'Board':>10} {'Depth':>6} {'Workers':>8} {'Time (s)':>9} {'Speedup':>8} {'Move':>6}")
+
+    for numCellsX, numCellsY, winLength, depth in cases:
+        board = BitBoard(numCellsX, numCellsY, winLength)
+
+        search = Search(board)
+        startTime = perf_counter()
+        _, action = search.bestAction(1, depth)
+        baseTime = perf_counter() - startTime
+        print(f"{f'{numCellsX}x{numCellsY} k{winLength}':>10} {depth:>6} {'serial':>8} {baseTime:>9.2f} {1:>7.2f}x {action:>6}")
+
+        for numWorkers in workerCounts:
+            rootParallelSearch(board, 1, 1, numWorkers) # Start the processes before timing
+
+            startTime = perf_counter()
+            _, action, _ = rootParallelSearch(board, 1, depth, numWorkers)
+            elapsed = perf_counter() - startTime
+            print(f"{'':>10} {depth:>6} {numWorkers:>8} {elapsed:>9.2f} {baseTime / elapsed:>7.2f}x {action:>6}")
+
+            # Fresh processes (and transposition tables) for the next run, and no leftover tasks competing for the CPU
+            shutdownPools(waitForWorkers=True)
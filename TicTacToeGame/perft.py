@@ -0,0 +1,161 @@
+from time import perf_counter
+from typing import NamedTuple
+
+from .bitboard import BitBoard
+from .core import BoardCore
+
+
+# Every game of 3x3 tic-tac-toe from the empty board with X to move, by ply (index 0 is the first move)
+KNOWN_3X3 = {
+    "nodes": [9, 72, 504, 3024, 15120, 54720, 148176, 200448, 127872],
+    "wins": [0, 0, 0, 0, 1440, 5328, 47952, 72576, 81792],
+    "draws": [0, 0, 0, 0, 0, 0, 0, 0, 46080],
+}
+
+
+class PerftResult(NamedTuple):
+    """Counts of a perft run, per ply. Index 0 is the first move from the starting position."""
+    nodes: list[int] # Positions reached after this many moves
+    wins: list[int] # Of those, positions where the player who just moved has won. The game ends there
+    draws: list[int] # Positions where the board is full without a win
+    seconds: float
+
+    @property
+    def games(self) -> int:
+        """Finished games, if the depth reached the end of every game."""
+        return sum(self.wins) + sum(self.draws)
+
+    @property
+    def positionsPerSecond(self) -> float:
+        return sum(self.nodes) / self.seconds if self.seconds else 0.0
+
+
+
+def perftBoard(board: BoardCore, player: int, depth: int, lineScan: bool = False) -> PerftResult:
+    """Count every legal continuation of the board's state to `depth` moves, with the BoardCore rules:
+    getActions, makeMove/unmakeMove, checkHasWon and isStateFull. The state is unchanged afterwards.
+
+    Args:
+        board (BoardCore): The position to start from (a Board works too).
+        player (int): The player to move.
+        depth (int): Number of moves to look ahead.
+        lineScan (bool, optional): Check for wins by counting along the lines before the move is made,
+            instead of with the window counters after it. Defaults to False.
+    """
+
+    nodes, wins, draws = [0] * depth, [0] * depth, [0] * depth
+
+    def visit(player: int, ply: int):
+        for action in board.getActions():
+            if lineScan: won = board.checkHasWon(action, player) # The cell is still empty, so the lines are counted
+            board.makeMove(action, player)
+            if not lineScan: won = board.checkHasWon(action, player)
+
+            nodes[ply] += 1
+            if won: wins[ply] += 1
+            elif board.isStateFull(): draws[ply] += 1
+            elif ply + 1 < depth: visit(-player, ply + 1)
+
+            board.unmakeMove()
+
+    startTime = perf_counter()
+    if depth > 0: visit(player, 0)
+
+    return PerftResult(nodes, wins, draws, perf_counter() - startTime)
+
+
+def perftBits(board: BitBoard, player: int, depth: int) -> PerftResult:
+    """The same count as perftBoard, on a BitBoard with makeMove/unmakeMove, hasWon and isFull.
+
+    Moves are every empty cell, read from the occupied bits. BitBoard.getActions is not used: it leaves out
+    cells far from the stones and in no live window, which is right for the search but not every legal move.
+    """
+
+    nodes, wins, draws = [0] * depth, [0] * depth, [0] * depth
+    cellMask = board.cellMask
+
+    def visit(player: int, ply: int):
+        empty = cellMask & ~board.occupied
+        while empty:
+            low = empty & -empty
+            empty ^= low
+            action = low.bit_length() - 1
+
+            board.makeMove(action, player)
+
+            nodes[ply] += 1
+            if board.hasWon(action, player): wins[ply] += 1
+            elif board.isFull(): draws[ply] += 1
+            elif ply + 1 < depth: visit(-player, ply + 1)
+
+            board.unmakeMove(action, player)
+
+    startTime = perf_counter()
+    if depth > 0: visit(player, 0)
+
+    return PerftResult(nodes, wins, draws, perf_counter() - startTime)
+
+
+# The move generators and win checks that can be compared, by name
+ENGINES = {
+    "board": lambda board, player, depth: perftBoard(board, player, depth),
+    "lineScan": lambda board, player, depth: perftBoard(board, player, depth, lineScan=True),
+    "bitboard": lambda board, player, depth: perftBits(BitBoard.fromState(board.state, board.winLength), player, depth),
+}
+
+
+def perft(board: BoardCore, player: int, depth: int, engine: str = "bitboard") -> PerftResult:
+    """Count every legal continuation of the board's state to `depth` moves with one of the ENGINES."""
+    return ENGINES[engine](board, player, depth)
+
+
+def verify(engines: list[str] = None, log=print) -> bool:
+    """Check the engines against the known counts of 3x3, and against each other on a few larger boards.
+
+    Returns:
+        bool: True if every count matched.
+    """
+
+    engines = list(ENGINES) if engines is None else engines
+    allMatch = True
+
+    cases = [(3, 3, 3, 9), (4, 3, 3, 6), (4, 4, 3, 5), (5, 5, 4, 4)] # numCellsX, numCellsY, winLength, depth
+
+    for numCellsX, numCellsY, winLength, depth in cases:
+        expected = KNOWN_3X3 if (numCellsX, numCellsY, winLength) == (3, 3, 3) else None
+
+        for engine in engines:
+            result = perft(BoardCore(numCellsX, numCellsY, winLength), 1, depth, engine)
+            counts = {"nodes": result.nodes, "wins": result.wins, "draws": result.draws}
+
+            if expected is None: expected = counts # The first engine is the reference for boards without known counts
+            match = counts == expected
+            allMatch &= match
+
+            if log is not None:
+                log(f"{f'{numCellsX}x{numCellsY} k{winLength}':>8} depth {depth} {engine:>9}: {sum(result.nodes):>9,} positions, "
+                    f"{result.positionsPerSecond:>9,.0f}/s  {'ok' if match else 'MISMATCH'}")
+
+    return allMatch
+
+
+
+if __name__ == '__main__':
+    # Run from the repository root:
+    #   python -m TicTacToeGame.perft                        check every engine against the known counts
+    #   python -m TicTacToeGame.perft X Y WinLen Depth       count from the empty board, per ply
+    import sys
+
+    if len(sys.argv) == 5:
+        numCellsX, numCellsY, winLength, depth = map(int, sys.argv[1:])
+        board = BoardCore(numCellsX, numCellsY, winLength)
+
+        for engine in ENGINES:
+            result = perft(board, 1, depth, engine)
+            print(f"\n{engine}: {sum(result.nodes):,} positions in {result.seconds:.2f} s ({result.positionsPerSecond:,.0f}/s)")
+            print(f"{'Ply':>4} {'Nodes':>12} {'Wins':>10} {'Draws':>10}")
+            for ply in range(depth):
+                print(f"{ply + 1:>4} {result.nodes[ply]:>12,} {result.wins[ply]:>10,} {result.draws[ply]:>10,}")
+
+    else:
+        sys.exit(0 if verify() else 1)
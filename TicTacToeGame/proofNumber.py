@@ -0,0 +1,298 @@
+from time import perf_counter
+
+from .bitboard import BitBoard, getBitIndices
+from .search import SearchTimeout, SIDE_KEY, TIME_CHECK_INTERVAL
+from .symmetry import uniqueActions
+
+
+PN_INF = 1 << 40 # Proof number of a position that can't be proven
+PN_EPSILON = 1.25 # Let the best move run until the second best is this much cheaper, so the search switches between moves less often
+PN_ENTRY_SIZE_BYTES = 120 # Rough size of one stored entry (tuple + ints) in CPython, used to turn megabytes into slots
+
+# Results of ProofNumberSearch.solve, for the player to move
+WIN = "win"
+DRAW = "draw"
+LOSS = "loss"
+UNKNOWN = "unknown" # The node budget ran out first
+
+PHI, DELTA = 1, 2 # Positions of the numbers in a child [action, phi, delta]
+
+
+class ProofTable:
+    """Fixed-size hash table of proof and disproof numbers, indexed by canonical Zobrist hash.
+
+    Every slot holds one entry `(key, phi, delta, work)`, where work is the number of nodes it took to
+    get the numbers. When two positions map to the same slot, the one that took the most work is kept,
+    so the table stays useful when it is much smaller than the tree.
+    """
+
+    def __init__(self, sizeMB: float = 64):
+        maxSlots = max(1, int(sizeMB * 1024 * 1024 / PN_ENTRY_SIZE_BYTES))
+        self.numSlots = 1 << (maxSlots.bit_length() - 1)
+        self.indexMask = self.numSlots - 1
+        self.slots = [None] * self.numSlots
+
+
+    def clear(self):
+        self.slots = [None] * self.numSlots
+
+
+    def probe(self, key: int) -> tuple[int, int] | None:
+        """The stored `(phi, delta)` of the position, or None."""
+        entry = self.slots[key & self.indexMask]
+        if entry is None or entry[0] != key: return None
+        return entry[1], entry[2]
+
+
+    def store(self, key: int, phi: int, delta: int, work: int):
+        index = key & self.indexMask
+        entry = self.slots[index]
+
+        # Solved positions are always kept, they never have to be searched again
+        if entry is not None and entry[0] != key and entry[3] > work and phi and delta: return
+
+        self.slots[index] = (key, phi, delta, PN_INF if not phi or not delta else work)
+
+
+    def __len__(self):
+        return sum(1 for entry in self.slots if entry is not None)
+
+
+
+class ProofNumberSearch:
+    """Depth-first proof-number search (df-pn), which solves positions exactly instead of estimating them.
+
+    Every position gets a proof number (how many leaves still have to be proven to show the goal is
+    reached) and a disproof number (the same, to show it is not). The search always expands the
+    position that is cheapest to settle, and goes depth-first as long as the numbers stay below the
+    thresholds handed down by the parent, so it only needs the transposition table for memory.
+
+    The numbers are stored from the view of the player to move (phi for "this player reaches its goal",
+    delta for "it doesn't"), so the same code works for both players. The attacker's goal is to win,
+    the defender's goal is to at least draw. Solving a position takes two such proofs: one with the
+    player to move as attacker (win or not), and one with the opponent as attacker (draw or loss).
+
+    Moves are made and undone on the BitBoard, like in `Search`. All empty cells are tried, not just
+    the candidate moves near the stones, so the result is exact on every board size.
+    """
+
+    def __init__(self, board: BitBoard, ttSizeMB: float = 64, maxNodes: int | None = None, shouldStop=None):
+        """
+        Args:
+            board (BitBoard): The position to solve. It is unchanged afterwards.
+            ttSizeMB (float, optional): Memory cap for the table of proof numbers. Defaults to 64.
+            maxNodes (int | None, optional): Give up after this many nodes. None for no limit.
+            shouldStop (optional): Function checked every TIME_CHECK_INTERVAL nodes. The search gives up when it returns True.
+        """
+
+        self.board = board
+        self.table = ProofTable(ttSizeMB)
+        self.maxNodes = maxNodes
+        self.shouldStop = shouldStop
+
+        self.nodes = 0
+        self.attacker = 1
+        self.rootChildren = [] # [action, phi, delta] of the root moves after the latest proof
+
+
+    def solve(self, player: int) -> tuple[str, int | None, int, float]:
+        """Find the game-theoretic value of the position.
+
+        Args:
+            player (int): The player to move.
+        Returns:
+            tuple[str, int | None, int, float]: The result for the player to move (WIN, DRAW, LOSS or UNKNOWN),
+                a move that keeps it (None if unknown, lost, or the board is full), the number of nodes
+                searched and the time taken in seconds.
+        """
+
+        board = self.board
+        startTime = perf_counter()
+        self.nodes = 0
+
+        # Remove the restriction to moves near the stones while solving
+        candidateDistance, board.candidateDistance = board.candidateDistance, None
+
+        try:
+            status, move = UNKNOWN, None
+
+            # Nobody can win anymore, whatever is played
+            if board.isFull() or board.isDeadDraw(): canWin = None; status = DRAW
+            else: canWin = self.prove(player, attacker=player)
+
+            if canWin:
+                status, move = WIN, self.getProvingMove()
+
+            elif canWin is False:
+                # Proven for the opponent means a loss, disproven means the player always gets at least a draw
+                opponentWins = self.prove(player, attacker=-player)
+                if opponentWins is False: status, move = DRAW, self.getProvingMove()
+                elif opponentWins: status = LOSS
+
+            # Proven without trying a move (a dead draw, or the opponent has no live window left): every move keeps the draw
+            if status == DRAW and move is None and not board.isFull():
+                move = getBitIndices(board.cellMask & ~board.occupied)[0]
+
+        finally:
+            board.candidateDistance = candidateDistance
+
+        return status, move, self.nodes, perf_counter() - startTime
+
+
+    def prove(self, player: int, attacker: int) -> bool | None:
+        """Prove or disprove that the attacker wins the position with `player` to move.
+
+        Returns:
+            bool | None: True if the attacker wins, False if it doesn't, None if the search gave up.
+        """
+
+        board = self.board
+        numMoves = len(board.moves)
+        self.attacker = attacker
+        self.rootChildren = []
+        self.table.clear()
+
+        try:
+            phi, delta = self.mid(player, PN_INF, PN_INF, root=True)
+        except SearchTimeout:
+            board.undoTo(numMoves)
+            return None
+
+        # phi and delta are from the view of the player to move, whose goal depends on who attacks
+        reached = phi == 0
+        if delta != 0 and not reached: return None
+        return reached if player == attacker else not reached
+
+
+    def getProvingMove(self) -> int | None:
+        """Root move that reaches the player's goal in the latest proof: one whose position fails for the opponent."""
+        for action, _, delta in self.rootChildren:
+            if delta == 0: return action
+        return None
+
+
+    def countNode(self):
+        self.nodes += 1
+        if self.maxNodes is not None and self.nodes >= self.maxNodes: raise SearchTimeout
+        if self.nodes % TIME_CHECK_INTERVAL == 0 and self.shouldStop is not None and self.shouldStop(): raise SearchTimeout
+
+
+    def getKey(self, player: int) -> int:
+        key, _ = self.board.canonicalHash()
+        if player == -1: key ^= SIDE_KEY
+        return key
+
+
+    def mid(self, player: int, thPhi: int, thDelta: int, root: bool = False) -> tuple[int, int]:
+        """Search the position with `player` to move until its phi reaches thPhi or its delta reaches thDelta.
+
+        Args:
+            player (int): The player to move.
+            thPhi (int): Give up on this position when its proof number gets this large.
+            thDelta (int): Give up on this position when its disproof number gets this large.
+            root (bool, optional): Keep the moves and their numbers in `rootChildren`.
+        Returns:
+            tuple[int, int]: The phi and delta of the position for the player to move.
+        """
+
+        self.countNode()
+        board = self.board
+        startNodes = self.nodes
+        key = self.getKey(player)
+
+        # Once every window has a defender stone in it, the attacker can't win anymore, whoever else still can
+        if 0 not in board.windowCounts[-self.attacker]:
+            phi, delta = (PN_INF, 0) if player == self.attacker else (0, PN_INF)
+            self.table.store(key, phi, delta, 0)
+            return phi, delta
+
+        # Cells in a live window one stone short of a win, the same as getWinningCells but read from the tracked windows
+        winning = board.getThreatCells(player, missing=1)
+        if winning:
+            if root: self.rootChildren = [[(winning & -winning).bit_length() - 1, PN_INF, 0]]
+            self.table.store(key, 0, PN_INF, 0)
+            return 0, PN_INF
+
+        threats = board.getThreatCells(-player, missing=1)
+        if threats & (threats - 1): # Two threats: block one and lose to the other
+            self.table.store(key, PN_INF, 0, 0)
+            return PN_INF, 0
+
+        children = self.getChildren(player, threats)
+        if root: self.rootChildren = children
+
+        while True:
+            # The player reaches its goal if any move makes the opponent fail, and fails if every move lets the opponent reach its goal
+            phi = min([child[DELTA] for child in children], default=PN_INF)
+            delta = min(PN_INF, sum([child[PHI] for child in children]))
+
+            if phi >= thPhi or delta >= thDelta: break
+
+            # Expand the move whose position is cheapest to make fail, until the second cheapest gets cheaper
+            best = second = None
+            for child in children:
+                if best is None or child[DELTA] < best[DELTA]: best, second = child, best
+                elif second is None or child[DELTA] < second[DELTA]: second = child
+
+            secondDelta = PN_INF if second is None else second[DELTA]
+            childThPhi = min(PN_INF, thDelta + best[PHI] - delta)
+            childThDelta = min(thPhi, int(secondDelta * PN_EPSILON) + 1)
+
+            board.makeMove(best[0], player)
+            best[PHI], best[DELTA] = self.mid(-player, childThPhi, childThDelta)
+            board.unmakeMove(best[0], player)
+
+        self.table.store(key, phi, delta, self.nodes - startNodes)
+        return phi, delta
+
+
+    def getChildren(self, player: int, threats: int) -> list[list]:
+        """The moves of the position, as `[action, phi, delta]` of the position after each move.
+        The numbers come from the table, from the game result if the move fills the board, or are 1 for new positions."""
+
+        board = self.board
+
+        if threats:
+            actions = [(threats & -threats).bit_length() - 1] # Forced to block the only threat
+        else:
+            actions = board.getActions()
+
+            # Against a fork, only moves that stop it in time can hold, the same cut as in Search.getOrderedActions
+            if board.getForkCells(-player):
+                defence = board.getThreatCells(-player) | board.getThreatCells(player)
+                actions = [action for action in actions if defence >> action & 1] or actions
+
+            actions = uniqueActions(actions, board.symmetries, board.getStabilizer())
+
+        # The positions after the moves are looked up without making them: the hash of every symmetric version
+        # changes by one key, and none of them is a win, since the player would have won on the spot already
+        symHashes, symKeys = board.symHashes, board.symZobristKeys[player]
+        side = SIDE_KEY if player == 1 else 0
+        lastMove = board.countEmpty() == 1
+
+        children = []
+        for action in actions:
+            if lastMove:
+                phi, delta = (PN_INF, 0) if -player == self.attacker else (0, PN_INF) # A draw is only good for the defender
+            else:
+                key = min([h ^ k for h, k in zip(symHashes, symKeys[action])]) ^ side
+                entry = self.table.probe(key)
+                phi, delta = (1, 1) if entry is None else entry
+
+            children.append([action, phi, delta])
+
+        return children
+
+
+
+if __name__ == '__main__':
+    # Solve the empty board of some small games. Run with: python -m TicTacToeGame.proofNumber
+    cases = [(3, 3, 3), (4, 4, 3), (4, 4, 4), (5, 4, 4), (5, 5, 3)] # numCellsX, numCellsY, winLength
+
+    print(f"{'Board':>10} {'Result':>8} {'Move':>6} {'Nodes':>10} {'Time (s)':>9}")
+
+    for numCellsX, numCellsY, winLength in cases:
+        board = BitBoard(numCellsX, numCellsY, winLength)
+        status, move, nodes, seconds = ProofNumberSearch(board).solve(1)
+        move = '-' if move is None else str(board.toPos(move))
+        print(f"{f'{numCellsX}x{numCellsY} k{winLength}':>10} {status:>8} {move:>6} {nodes:>10} {seconds:>9.2f}")
@@ -0,0 +1,421 @@
+from time import perf_counter
+
+from .bitboard import BitBoard
+from .transposition import TranspositionTable, EXACT, LOWER, UPPER
+from .symmetry import uniqueActions
+from .ordering import MoveOrdering
+from .tracer import REASON_PV, REASON_CUTOFF, REASON_ALL, REASON_TT, REASON_WIN, REASON_LEAF, REASON_TERMINAL
+
+
+WIN_SCORE = 1_000_000_000 # Score of a win on the next move. Wins further away score a little less
+WIN_BOUND = WIN_SCORE // 2 # Any value beyond this is a win or a loss, not an evaluation
+INF = 2 * WIN_SCORE
+
+SIDE_KEY = 0x9E3779B97F4A7C15 # XOR'ed into the hash when player -1 is to move
+TIME_CHECK_INTERVAL = 1024 # Nodes between checks of the clock
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget has run out or the search was told to stop."""
+
+
+class SearchStats:
+    """What one search did, to see where the time goes when a move takes too long.
+
+    Filled in by `Search.bestAction` and `Search.iterativeDeepening`, and returned by `BoardCore.iterativeDeepening`.
+    """
+
+    def __init__(self):
+        self.nodes = 0 # Moves made during the search
+        self.leafEvals = 0 # Positions scored with the evaluation instead of searched deeper
+        self.cutoffs = {} # Index of the move in the ordered moves -> number of beta cutoffs it caused
+        self.ttProbes = 0
+        self.ttHits = 0
+        self.depths = [] # (depth, seconds, nodes) of every finished iteration
+        self.value = 0 # Value of the deepest finished search for the player to move
+        self.pv = [] # Principal variation: (x, y) of the expected moves of both players, from the transposition table
+        self.seconds = 0.0
+
+
+    @property
+    def depth(self) -> int:
+        return self.depths[-1][0] if self.depths else 0
+
+
+    @property
+    def ttHitRate(self) -> float:
+        return self.ttHits / self.ttProbes if self.ttProbes else 0.0
+
+
+    @property
+    def firstMoveCutoffRate(self) -> float:
+        """Share of the cutoffs caused by the first move tried. Close to 1 means the move ordering works."""
+        total = sum(self.cutoffs.values())
+        return self.cutoffs.get(0, 0) / total if total else 0.0
+
+
+    @property
+    def branchingFactor(self) -> float:
+        """Effective branching factor: how many times more nodes every extra depth costs, averaged over the
+        iterations. With a single iteration, the number b with b ** depth == nodes."""
+
+        if len(self.depths) >= 2:
+            (firstDepth, _, firstNodes), (lastDepth, _, lastNodes) = self.depths[0], self.depths[-1]
+            if firstNodes: return (lastNodes / firstNodes) ** (1 / (lastDepth - firstDepth))
+        if self.depths and self.nodes: return self.nodes ** (1 / self.depth)
+        return 0.0
+
+
+    def summaryLines(self) -> list[str]:
+        """The stats as a few short lines of text, for the gameplay overlay."""
+
+        cutoffs = ", ".join(f"{index + 1}: {count:,}" for index, count in sorted(self.cutoffs.items())[:4])
+        pv = " ".join(f"{x},{y}" for x, y in self.pv)
+
+        return [
+            f"Depth {self.depth}, {self.nodes:,} nodes in {self.seconds:.2f} s ({self.nodes / self.seconds if self.seconds else 0:,.0f}/s)",
+            f"Leaf evaluations: {self.leafEvals:,}, branching factor: {self.branchingFactor:.2f}",
+            f"TT: {self.ttHits:,} of {self.ttProbes:,} probes hit ({self.ttHitRate:.0%})",
+            f"Cutoffs by move: {cutoffs or '-'} ({self.firstMoveCutoffRate:.0%} on the first)",
+            "Time per depth: " + " ".join(f"{depth}:{seconds * 1000:.0f}ms" for depth, seconds, _ in self.depths),
+            f"PV: {pv or '-'}",
+        ]
+
+
+    def toDict(self) -> dict:
+        return {
+            "nodes": self.nodes,
+            "leafEvals": self.leafEvals,
+            "cutoffs": {str(index): count for index, count in sorted(self.cutoffs.items())},
+            "ttProbes": self.ttProbes,
+            "ttHits": self.ttHits,
+            "branchingFactor": round(self.branchingFactor, 3),
+            "depths": [[depth, round(seconds, 6), nodes] for depth, seconds, nodes in self.depths],
+            "value": self.value,
+            "pv": [list(pos) for pos in self.pv],
+            "seconds": round(self.seconds, 6),
+        }
+
+
+
+def valueToTT(value: int, ply: int) -> int:
+    """Win scores depend on the distance from the root. Store them relative to the position instead."""
+    if value > WIN_BOUND: return value + ply
+    if value < -WIN_BOUND: return value - ply
+    return value
+
+
+def valueFromTT(value: int, ply: int) -> int:
+    if value > WIN_BOUND: return value - ply
+    if value < -WIN_BOUND: return value + ply
+    return value
+
+
+
+class Search:
+    """Alpha-beta search on a BitBoard.
+
+    The search is written as negamax: every value is seen from the player to move, so a position
+    worth `v` for one player is worth `-v` for the other. Moves are made and undone on the same
+    BitBoard, so no board is ever copied during the search.
+
+    Positions are stored in the transposition table under their canonical hash, so every mirrored
+    or rotated version of a position shares one entry. Stored moves are mapped to and from the
+    canonical orientation. In positions that are themselves symmetric, only one move of every
+    group of mirror-image moves is searched.
+    """
+
+    def __init__(self, board: BitBoard, transpositionTable: TranspositionTable = None):
+        self.board = board
+        self.tt = transpositionTable if transpositionTable is not None else TranspositionTable()
+        self.ordering = MoveOrdering(board)
+        self.nodes = 0
+        self.rootAction = None # Best move found at ply 0 by the latest search
+        self.deadline = None # perf_counter() time at which the search is aborted, None for no limit
+        self.nextTimeCheck = 0
+        self.shouldStop = None # Optional function, checked with the clock. The search is aborted when it returns True
+        self.onProgress = None # Optional function, called with (depth, nodes) every time the clock is checked
+        self.depth = 0 # Depth of the iteration iterativeDeepening is running
+        self.stats = SearchStats() # Stats of the latest bestAction or iterativeDeepening
+        self.tracer = None # Optional SearchTracer, records every node the search leaves
+
+
+    def negamax(self, player: int, depth: int, alpha: int = -INF, beta: int = INF, ply: int = 0) -> int:
+        """Value of the position for `player`, who is about to move.
+
+        Args:
+            player (int): The player to move (1 or -1).
+            depth (int): Number of moves to look ahead. The positions after the last move are evaluated.
+            alpha (int): Lowest value the player to move is already guaranteed.
+            beta (int): Highest value the opponent will allow.
+            ply (int): Number of moves made since the root. Used to prefer faster wins.
+        Returns:
+            int: The value of the position for the player to move.
+        """
+
+        if self.nodes >= self.nextTimeCheck:
+            self.nextTimeCheck = self.nodes + TIME_CHECK_INTERVAL
+            if self.deadline is not None and perf_counter() >= self.deadline: raise SearchTimeout
+            if self.shouldStop is not None and self.shouldStop(): raise SearchTimeout
+            if self.onProgress is not None: self.onProgress(self.depth, self.nodes)
+
+        board = self.board
+        tracer = self.tracer
+        alphaOrig = alpha
+        key, symIndex = board.canonicalHash()
+        if player == -1: key ^= SIDE_KEY
+        toCanonical, fromCanonical = board.symmetries[symIndex]
+
+        # Reuse an earlier search of this position if it went at least as deep
+        ttMove = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            _, entryDepth, flag, entryValue, ttMove, _ = entry
+            if ttMove is not None: ttMove = fromCanonical[ttMove]
+
+            if entryDepth >= depth and ply > 0:
+                entryValue = valueFromTT(entryValue, ply)
+
+                if flag == EXACT or (flag == LOWER and entryValue >= beta) or (flag == UPPER and entryValue <= alpha):
+                    if tracer is not None and ply <= tracer.maxPly: self.traceNode(ply, depth, player, alpha, beta, entryValue, REASON_TT)
+                    return entryValue
+
+        # At the root, the best move of the previous iteration goes first
+        if ply == 0 and self.rootAction is not None: ttMove = self.rootAction
+
+        actions, forced = self.getOrderedActions(player, ply, ttMove)
+
+        # A forced block doesn't use up depth, so forcing sequences are followed past the horizon.
+        # Threats made on the last move of the search arrive here with depth 0: then the opponent either wins or blocks
+        if forced: depth += 1
+
+        bestValue, bestAction = -INF, None
+        winValue = WIN_SCORE - ply # Nothing is better than winning on this move
+
+        for index, action in enumerate(actions):
+            self.nodes += 1
+            board.makeMove(action, player)
+
+            # Check for terminal states (win, draw, or depth limit)
+            if board.hasWon(action, player):
+                value = winValue
+                if tracer is not None and ply < tracer.maxPly: self.traceNode(ply + 1, 0, -player, -beta, -alpha, -value, REASON_TERMINAL)
+            elif board.isFull() or board.isDeadDraw():
+                value = 0
+                if tracer is not None and ply < tracer.maxPly: self.traceNode(ply + 1, 0, -player, -beta, -alpha, 0, REASON_TERMINAL)
+            elif depth <= 1 and not board.makesThreat(action, player):
+                value = player * board.score
+                self.stats.leafEvals += 1
+                if tracer is not None and ply < tracer.maxPly: self.traceNode(ply + 1, 0, -player, -beta, -alpha, -value, REASON_LEAF)
+            else:
+                value = -self.negamax(-player, depth - 1, -beta, -alpha, ply + 1)
+
+            board.unmakeMove(action, player)
+
+            if value > bestValue:
+                bestValue, bestAction = value, action
+                if ply == 0: self.rootAction = action
+                if value > alpha: alpha = value
+                if alpha >= beta:
+                    if value != winValue: self.ordering.recordCutoff(action, player, ply, depth)
+                    cutoffs = self.stats.cutoffs
+                    cutoffs[index] = cutoffs.get(index, 0) + 1
+                    break
+                if value == winValue: break
+
+        if bestAction is not None:
+            flag = UPPER if bestValue <= alphaOrig else LOWER if bestValue >= beta else EXACT
+            self.tt.store(key, depth, flag, valueToTT(bestValue, ply), toCanonical[bestAction])
+
+        if tracer is not None and ply <= tracer.maxPly:
+            if bestValue == winValue: reason = REASON_WIN
+            elif bestValue >= beta: reason = REASON_CUTOFF
+            elif bestValue <= alphaOrig: reason = REASON_ALL
+            else: reason = REASON_PV
+            self.traceNode(ply, depth, player, alphaOrig, beta, bestValue, reason)
+
+        return bestValue
+
+
+    def traceNode(self, ply: int, depth: int, player: int, alpha: int, beta: int, value: int, reason: int):
+        """Hand the current position to the tracer, with the move into it and the root move it is under."""
+        if not self.tracer.hasHeader: self.tracer.attach(self.board) # Also when the tracer was set without BoardCore
+        moves = self.board.moves
+        if ply == 0: self.tracer.record(0, depth, -1, -1, player, alpha, beta, value, reason)
+        else: self.tracer.record(ply, depth, moves[-1][0], moves[-ply][0], player, alpha, beta, value, reason)
+
+
+    def getOrderedActions(self, player: int, ply: int = 0, firstMove: int | None = None) -> tuple[list[int], bool]:
+        """The moves of the current position without mirror-image duplicates, most promising first.
+
+        Threats cut the moves down to the ones that matter:
+        - If the player can win on the spot, only the winning move is returned.
+        - If the opponent threatens to win, only the block is returned, and the player is forced.
+          With two threats the game is lost, and blocking one of them lets the search see that.
+        - If the opponent can fork (make two threats with one stone), only moves that stop it in time are
+          returned: stones in the opponent's nearly complete windows, and the player's own threats.
+          Any other move lets the opponent fork, and the player can only block one threat.
+
+        Returns:
+            tuple[list[int], bool]: The moves, and if the player is forced to block.
+        """
+
+        board = self.board
+
+        winning = board.getWinningCells(player)
+        if winning: return [(winning & -winning).bit_length() - 1], False
+
+        threats = board.getWinningCells(-player)
+        if threats: return [(threats & -threats).bit_length() - 1], True
+
+        actions = board.getActions()
+        if board.getForkCells(-player):
+            defence = board.getThreatCells(-player) | board.getThreatCells(player)
+            actions = [action for action in actions if defence >> action & 1] or actions
+
+        actions = uniqueActions(actions, board.symmetries, board.getStabilizer())
+        return self.ordering.orderMoves(actions, player, ply, firstMove, winning=0, blocking=0), False
+
+
+    def valueOfMove(self, action: int, player: int, depth: int, alpha: int = -INF, beta: int = INF) -> int:
+        """Value for `player` of making `action` in the current position and searching the rest to `depth`
+        (counting the action itself), as the root loop of negamax would score it.
+        Values at or below alpha are only an upper bound."""
+
+        board = self.board
+        self.nodes += 1
+        board.makeMove(action, player)
+
+        if board.hasWon(action, player):
+            value = WIN_SCORE
+        elif board.isFull() or board.isDeadDraw():
+            value = 0
+        elif depth <= 1 and not board.makesThreat(action, player):
+            value = player * board.score
+        else:
+            value = -self.negamax(-player, depth - 1, -beta, -alpha, 1)
+
+        board.unmakeMove(action, player)
+        return value
+
+
+    def bestAction(self, player: int, depth: int, alpha: int = -INF, beta: int = INF) -> tuple[int, int | None]:
+        """Search the root position and return both its value and the best move.
+
+        Returns:
+            tuple[int, int | None]: The value for the player to move and the bit index of the best action,
+                or None if there are no moves left.
+        """
+
+        self.tt.newSearch()
+        self.ordering.newSearch()
+        self.rootAction = None
+        self.startStats()
+
+        value = self.negamax(player, depth, alpha, beta)
+
+        startTime, startNodes = self.statsStart[:2]
+        self.finishStats(player, value, [(depth, perf_counter() - startTime, self.nodes - startNodes)])
+        return value, self.rootAction
+
+
+    def startStats(self):
+        self.stats = SearchStats()
+        self.statsStart = (perf_counter(), self.nodes, self.tt.probes, self.tt.hits)
+
+
+    def finishStats(self, player: int, value: int, depths: list[tuple[int, float, int]]):
+        """Fill in the totals of the stats of the search that started with startStats, and the principal variation."""
+
+        startTime, startNodes, startProbes, startHits = self.statsStart
+        stats = self.stats
+
+        stats.seconds = perf_counter() - startTime
+        stats.nodes = self.nodes - startNodes
+        stats.ttProbes = self.tt.probes - startProbes
+        stats.ttHits = self.tt.hits - startHits
+        stats.value = value
+        stats.depths = depths
+
+        if depths:
+            stats.pv = [self.board.toPos(action) for action in self.getPrincipalVariation(player, depths[-1][0])]
+
+
+    def getPrincipalVariation(self, player: int, maxLength: int) -> list[int]:
+        """The moves both players are expected to make from the current position: the root move, then the best
+        moves stored in the transposition table, until a stored move is missing or the game is over."""
+
+        board = self.board
+        numMoves = len(board.moves)
+        pv = []
+        action = self.rootAction
+
+        while action is not None and len(pv) < maxLength:
+            if board.occupied >> action & 1: break # From a different position with the same hash
+
+            board.makeMove(action, player)
+            pv.append(action)
+            if board.hasWon(action, player) or board.isFull(): break
+
+            player = -player
+            key, symIndex = board.canonicalHash()
+            if player == -1: key ^= SIDE_KEY
+
+            entry = self.tt.probe(key)
+            if entry is None or entry[4] is None: break
+            action = board.symmetries[symIndex][1][entry[4]]
+
+        board.undoTo(numMoves)
+        return pv
+
+
+    def iterativeDeepening(self, player: int, timeBudgetMS: float, maxDepth: int = 100) -> tuple[int, int | None, int]:
+        """Search depth 1, 2, 3, ... until the time budget runs out, and return the result of the deepest
+        search that finished. Every iteration starts with the best move of the previous one, and the
+        transposition table carries the rest of the previous iterations over, so the repeated shallow
+        searches cost little.
+
+        Args:
+            player (int): The player to move.
+            timeBudgetMS (float): Wall-clock time budget in milliseconds. Depth 1 is always finished.
+            maxDepth (int, optional): Never search deeper than this. Defaults to 100.
+        Returns:
+            tuple[int, int | None, int]: The value, the best action (None if there are no moves) and the depth that was completed.
+        """
+
+        board = self.board
+        startTime = perf_counter()
+        numMoves = len(board.moves)
+        numEmpty = board.countEmpty()
+
+        self.tt.newSearch()
+        self.ordering.newSearch()
+        self.rootAction = None
+        self.deadline = None # Depth 1 always finishes, so there is a move to return
+        self.startStats()
+
+        result = (0, None, 0)
+        depths = []
+
+        for depth in range(1, min(maxDepth, numEmpty) + 1):
+            self.depth = depth
+            depthStart, depthNodes = perf_counter(), self.nodes
+            try:
+                value = self.negamax(player, depth)
+            except SearchTimeout:
+                board.undoTo(numMoves)
+                break
+            finally:
+                self.deadline = startTime + timeBudgetMS / 1000
+
+            result = (value, self.rootAction, depth)
+            depths.append((depth, perf_counter() - depthStart, self.nodes - depthNodes))
+
+            # Stop early when the game is decided, or when the next depth is unlikely to finish in time
+            if abs(value) > WIN_BOUND: break
+            if perf_counter() - startTime > timeBudgetMS / 2000: break
+
+        self.deadline = None
+        self.rootAction = result[1]
+        self.finishStats(player, result[0], depths)
+        return result
@@ -8,7 +8,24 @@ INIT_SETTINGS = {
     "playerO": "Human",
 }
 
-DEPTH = 10
+DEPTH = 10 # Deepest search the AI tries
+AI_WORKERS = 1 # Processes the AI searches with. 1 searches in the game process only. More has no measured speedup: only timed on one CPU, where it is slower
+AI_PARALLEL_MODE = "root" # With more than one worker: "root" splits the root moves, "lazysmp" searches the same position in every process with a shared transposition table. Neither is measured to be faster yet
+AI_TIME_BUDGET = 1000 # ms the AI searches for each move, going one depth deeper at a time
+AI_PONDER = True # Let the AI keep searching during the human player's turn
+AI_STATS_OVERLAY = False # Show what the AI's last search did (nodes, cutoffs, TT hits, ...) in the top left corner
+TT_SIZE_MB = 64 # Memory cap for the AI's transposition table
+NUMPY_EVAL_MIN_CELLS = 100 # Board.evaluateState rescans states of boards with at least this many cells with NumPy. The search uses the running score instead
+CANDIDATE_MIN_CELLS = 49 # On boards with at least this many cells the AI only considers moves near the stones
+CANDIDATE_DISTANCE = 2 # How far from the nearest stone those moves can be
+THREAT_SEARCH_MIN_CELLS = 81 # On boards with at least this many cells, and a win length below, the AI first looks for a forced win with threats
+THREAT_SEARCH_WIN_LENGTHS = (4, 5)
+THREAT_SEARCH_NODES = 5000 # Moves the threat search may try before giving up (about half a second)
+PROOF_MAX_NODES = 1_000_000 # Positions Board.solve may search before giving up (a few minutes)
+MCTS_TIME_BUDGET = 1000 # ms the MCTS player searches for each move
+MCTS_MAX_PLAYOUTS = None # Also stop after this many random games. None for only the time budget
+MCTS_BATCH_SIZE = 64 # Random games MCTS plays out at once from every new position
+MCTS_ROLLOUT = "numpy" # "numpy" plays a batch of games out at once, "python" one game at a time
 SHAPE_SIZE_FACTOR = 0.8
 
 
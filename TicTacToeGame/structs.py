@@ -1,89 +1,37 @@
-
-import numpy as np
 import pygame
 from pygame import Vector2
-from copy import deepcopy
 
+import threading
 from time import sleep
+from concurrent.futures import ThreadPoolExecutor, wait
 
-from .setup import SHAPE_SIZE_FACTOR, DEPTH, TEXTURE_PACK, AI_PERFORM_DELAY
+from .setup import SHAPE_SIZE_FACTOR, DEPTH, TEXTURE_PACK, AI_PERFORM_DELAY, AI_TIME_BUDGET, MCTS_TIME_BUDGET
 from common.grid import Grid
 from common.utils import loadTextures
 from common.tileSprite import TileSprite
 
-INF = float('inf')
+from .core import BoardCore
 
-class Board:
-    
-    # Searching directions with relative vectors
-    HUL = Vector2([-1, -1]) # Horizontal Up Left
-    U = Vector2([0, -1]) # Up
-    HUR = Vector2([1, -1]) # Horizontal Up Right
-    R = Vector2([1, 0]) # Right
-    
-    dirVectors = [HUL, U, HUR, R]
+
+class Board(BoardCore):
+    """ BoardCore with the textures and tile sprites to draw it in the game window. """
     
     def __init__(self, grid: Grid, winLength: int = 3, startPlayer: int = 1, state = None):
         
+        super().__init__(grid.numCellsX, grid.numCellsY, winLength, startPlayer, state)
+        
         self.grid = grid 
-        self.winLength = winLength
-        self.startPlayer = startPlayer
                 
         self.textures = loadTextures(
             texturePack=TEXTURE_PACK,
             size=grid.cellSizePX
         )
         
-        # Initialize the board with all zeros with correct dimensions
-        self.state = [ [0] * grid.numCellsX for _ in range(grid.numCellsY) ] if state is None else state
-        
         self.tileSpriteList = []
-
-
-    def checkHasWon(self, action: Vector2, player: int, state = None):
-        """Check if the player has won the game by performing the action.
-        This function checks for winning conditions only where the action is included.
-        Args:
-            action (Vector2): The position where the player has made their move.
-            player (int): The player identifier (e.g., 1 or 2).
-            state (optional): The current state of the game board. If not provided, the function will use the instance's state.
-        Returns:
-            bool: True if the player has won the game, False otherwise.
-        """
-        
-        if state is None: state = self.state
-
-        for i, r in enumerate(self.dirVectors):
-            # TODO: Use i to calculate if there is any possibility for the diagonals to be valid (i=0, i=2) in the corners.
-            # Possible early return to save computation time over a small arithmetic calculation
-                     
-            inverted = False # Flag to only invert once
-            equal = True # Store if each checked cell has the same value as the player's value
-            equalCount = 1 # The player has won if this count is the same as winlength
-            
-            checkPos = deepcopy(action)
-            
-            while equal:
-                checkPos += r # Add the relative direction vector to the current position
-                
-                valueAtCheck = self.getValAtPos(checkPos, state)
-                equal = valueAtCheck == player
-
-                if equal: equalCount += 1
-                else:
-                    if inverted: continue
-                    
-                    # Invert the searching direction and start searching form original position
-                    checkPos = deepcopy(action)
-                    r *= -1
-                    inverted = True
-                    equal = True
-                    
-                if equalCount == self.winLength: return True # player has won
-                      
-        
-        # For-loop never found a winning case, so player did not win
-        return False
+    
+    
+    def toAction(self, x: int, y: int) -> Vector2:
+        return Vector2(x, y)
     
     
     def performAction(self, action: Vector2, player = 0) -> list[list[int]]:
@@ -101,7 +49,7 @@ class Board:
         outOfBounds = self.grid.isOutOfBounds(action)
         
         if not outOfBounds and valueAtCell == 0:
-            self.state[int(action.y)][int(action.x)] = player # Set the value at the correct index
+            self.makeMove(action, player) # Set the value at the correct index
             tileSprite = TileSprite(
                 self.grid,
                 self.textures,
@@ -117,170 +65,13 @@ class Board:
     
     
     
-    def getActions(self, state = None) -> list[Vector2]:
-        """Retrieve a list of valid actions for the current or given game state.
-        Args:
-            state (list[list[int]], optional): The current game state represented 
-                as a 2D list of integers. Each integer represents a cell in the 
-                game grid. Defaults to None, in which case the method uses the 
-                instance's current state.
-        Returns:
-            list[Vector2]: A list of Vector2 objects, where each object represents 
-                the coordinates ([x, y]) of a valid action (empty cell) in the game grid.
-        """
-
-        if state is None: state = self.state
-        
-        actions = []
-        for y, yList in enumerate(state):
-            for x, val in enumerate(yList):
-                action = Vector2(x, y)
-                if val == 0:
-                    actions.append(Vector2(action))
-                
-                
-        return actions
-    
-    
-    def getValAtPos(self, action: Vector2, state = None):
-        if state is None: state = self.state
-        if self.grid.isOutOfBounds(action): return 0
-        else: return state[int(action.y)][int(action.x)]
-        
-    def isStateFull(self, state = None):
-        if state is None: state = self.state
-        
-        for yList in state:
-            for val in yList:
-                if val == 0: return False
-        
-        return True
-    
-    
-    
-    def result(self, state, action, playerVal):
-        
-        newState = deepcopy(state)
-        newState[int(action.y)][int(action.x)] = playerVal
-        return newState
-        
-    
-          
-    def minimax(self, state, player, depth=10, alpha=-INF, beta=INF, root=False):
-        bestValue = INF * -player # The opposite of the player's goal
-        bestAction = None
-        
-        # Loop through all possible moves and evaluate their results
-        for action in self.getActions(state):
-            checkState = self.result(state, action, player)
-            immidiateWin = self.checkHasWon(action, player, checkState)
-            isDraw = self.isStateFull(checkState)
-            
-            # Check for terminal states (win, draw, or depth limit)
-            if immidiateWin:
-                bestValue, bestAction = player * INF, action
-                continue
-
-            if isDraw:
-                bestValue, bestAction = 0, action
-                continue
-
-            if depth == 0:
-                bestValue, bestAction = self.evaluateState(checkState), action
-                continue
-            
-            # Recursive minimax call for opponent
-            newValue = self.minimax(state=checkState, player=-player, depth=depth-1, alpha=alpha, beta=beta)
-            
-            isBetter = newValue > bestValue if player == 1 else newValue < bestValue
-            if not isBetter: continue
-            
-            # If this move is better than previous best, update its value
-            bestValue = newValue
-            bestAction = action
-            if player == 1:
-                alpha = max(alpha, newValue)
-            else:
-                beta = min(beta, newValue)
-            
-            if beta <= alpha: break
-            
-            
-        if root: return bestAction # Return the best action because minimax was called at the top level
-        else: return bestValue # Return the value of the state because minimax was called at a lower level
-            
-    
-    
-    
-    def getLengthOfAllLinesThroughPos(self, state, pos: Vector2, value):
-        
-        lines = []
-        
-        for r in self.dirVectors:                     
-            inverted = False # Flag to only invert once
-            equal = True # Store if each checked cell has the same value as the player's value
-            equalCount = 1 # The player has won if this count is the same as winlength
-            
-            checkPos = deepcopy(pos)
-            
-            while equal:
-                checkPos += r # Add the relative direction vector to the current position
-                
-                valueAtCheck = self.getValAtPos(checkPos, state)
-                equal = valueAtCheck == value
-
-                if equal: equalCount += 1
-                else:
-                    if inverted: continue
-                    
-                    # Invert the searching direction and start searching form original position
-                    checkPos = deepcopy(pos)
-                    r *= -1
-                    inverted = True
-                    equal = True
-            
-            lines.append(equalCount)
-                    
-        return lines
-    
-    
-
-    def evaluateState(self, state):
-        """ Evaluated the state based on the lengths of all lines on the board. Lengths are wheighted with the square, so longer lines get more points.
-        """ 
-        score = 0
-            
-        for y, row in enumerate(state):
-            for x, val in enumerate(row):
-                if val == 0: continue
-                
-                lengths = self.getLengthOfAllLinesThroughPos(state, Vector2(x, y), val)
-                
-                for v in lengths:
-                    score += v**2 * val # Keep the sign
-                
-        
-        return score
-
-    
-    
     def draw(self, window: pygame.Surface):
         for tile in self.tileSpriteList:
             tile.draw(window)
-                
-    
-    def __str__(self):
-        return str(self.state)
-    
-    
-    def print(self):
-        for row in self.state:
-            print(row)
 
 
 
 
-        
 def HumanPlayer(event, currentPlayer, grid: Grid, board: Board):
         
         action = grid.getGridPosFromWindowPos(Vector2(event.pos))
@@ -295,77 +86,154 @@ def HumanPlayer(event, currentPlayer, grid: Grid, board: Board):
         
     
 
-def AIPlayer(board: Board, playerValue: int, lastMoveTime: int = 0):
-
-    bestAction = board.minimax(board.state, playerValue, depth=DEPTH, root=True)
-    if bestAction is None: return False, None
+class AISearch:
+    """ The AI's search for one move, running on a background thread so the game window stays responsive.
+    The gameplay loop polls `isReady` every frame and calls `perform` once it returns True.
+    """
     
-    currentTime = pygame.time.get_ticks()
-    if currentTime - lastMoveTime < AI_PERFORM_DELAY:
-        # Add a delay so that the time between each action made by an AI is at least AI_PERFORM_DELAY
-        sleep((AI_PERFORM_DELAY - (currentTime - lastMoveTime))/1000)
-        
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AISearch") # One search at a time
     
-    validMove = board.performAction(bestAction, playerValue)
-    didWin = board.checkHasWon(bestAction, playerValue)
+    def __init__(self, board: Board, playerValue: int, lastMoveTime: int = 0, playerType: str = "AI"):
+        """
+        Args:
+            board (Board): The board to make the move on. Its state is copied, so the board can be drawn while searching.
+            playerValue (int): The player the AI plays for.
+            lastMoveTime (int, optional): pygame ticks of the AI's previous move. The move is performed no sooner than AI_PERFORM_DELAY after it.
+            playerType (str, optional): "AI" for the alpha-beta search, "MCTS" for Monte Carlo Tree Search. Defaults to "AI".
+        """
+        
+        self.board = board
+        self.playerValue = playerValue
+        self.playerType = playerType
+        self.readyTime = lastMoveTime + AI_PERFORM_DELAY
+        
+        # Progress, written by the search thread and read by the gameplay loop
+        self.depth = 0
+        self.nodes = 0
+        self.stats = None # SearchStats of the alpha-beta search, once it is performed
+        
+        self.stopEvent = threading.Event()
+        state = [row[:] for row in board.state]
+        if playerType == "MCTS":
+            self.future = self.executor.submit(
+                board.mcts, state, playerValue, MCTS_TIME_BUDGET, self.stopEvent.is_set, self.updateProgress
+            )
+        else:
+            self.future = self.executor.submit(
+                board.iterativeDeepening, state, playerValue, AI_TIME_BUDGET, DEPTH, self.stopEvent.is_set, self.updateProgress
+            )
     
-    return validMove, didWin
-
-
-
-
-if __name__ == '__main__':
-    # Testing what depth takes an acceptable time based on the size of the board and win length
-    startPlayer = -1
     
-    # state = [
-    #     [ 1,  0,  0],
-    #     [ 0, 0,  0],
-    #     [ 0,  0,  0]
-    # ]
+    def updateProgress(self, depth, nodes):
+        self.depth = depth
+        self.nodes = nodes
     
-    xCells = 3
-    yCells = 3
     
-    winLength = 3
-    depth = 10
+    def progressText(self) -> str:
+        if self.playerType == "MCTS": return f"{self.nodes:,} games played out, up to {self.depth} moves ahead"
+        return f"Looking {self.depth} moves ahead, {self.nodes:,} positions searched"
     
-
     
-    cellSize = 200 
-            
-    grid = Grid(0, 0, cellSize, xCells, yCells)
-    board = Board(grid, 3, startPlayer)
+    def isReady(self) -> bool:
+        """ True when the search has finished and the minimum delay since the last AI move has passed. """
+        return self.future.done() and pygame.time.get_ticks() >= self.readyTime
     
-    # Depth at sizes that are fast enough
-    # X, Y, WinLen: Depth
-    # 3, 3, 3: Full
-    # 3, 4, 3: Full-
-    # 4, 4, 3: 8
-    # 4, 5, 3: 6
-    # 5, 5, 3: 5-6
-    # 5, 6, 3: 5
-    # 6, 6, 3: 4-5
-    # 6, 7, 3: 4
-    # 7, 7, 3: 4
-    # 7, 8, 3: 4
-    # 8, 8, 3: 3-4
-    # 8, 9, 3: 3
-    # 9, 9, 3: 3
-    # 9, 10, 3: 3 (looong) 2 (shooort)
-    # 10, 10, 3: 3 (looong) 2 (shooort)
-    # 15, 15, 3: 2 (looong)
-    # 20, 20, 3: 1 (long)
-    # 100, 100, 3: 0 (looong)
-
-    # board.print()
-   
-    # Let Minimax decide the first move
     
+    def perform(self):
+        """ Make the move that was found.
+        Returns:
+            tuple[bool, bool | None]: If a valid move was made, and if it won the game.
+        """
+        
+        bestAction = self.future.result()
+        if self.playerType != "MCTS": bestAction, self.stats = bestAction
+        if bestAction is None: return False, None
+        
+        validMove = self.board.performAction(bestAction, self.playerValue)
+        didWin = self.board.checkHasWon(bestAction, self.playerValue)
+        
+        return validMove, didWin
     
-    bestAction = board.minimax(board.state, startPlayer, depth=depth, root=True)
-    print(bestAction)
     
-    # print(f"{bestValue}, ({bestAction.x}, {bestAction.y})")
-    # winner = "Draw" if bestValue == 0 else "X" if bestValue > 0 else "O"
-    # print(f"Best move: {bestAction}, Best Value: {bestValue}")
\ No newline at end of file
+    def cancel(self):
+        """ Stop the search and wait for the thread to let go of the board. Takes at most a few milliseconds. """
+        self.stopEvent.set()
+        wait([self.future])
+
+
+
+class AIPonder:
+    """ Lets the AI think on the human's time: searches the human's turn on a background thread until `stop` is called. """
+    
+    def __init__(self, board: Board, humanValue: int):
+        self.stopEvent = threading.Event()
+        state = [row[:] for row in board.state]
+        self.future = AISearch.executor.submit(board.ponder, state, humanValue, self.stopEvent.is_set)
+    
+    
+    def stop(self):
+        """ Stop pondering, so the AI can start its own search. """
+        self.stopEvent.set()
+        wait([self.future])
+
+
+
+def AIPlayer(board: Board, playerValue: int, lastMoveTime: int = 0, playerType: str = "AI"):
+    """ Search for the AI's move and make it, blocking until it is done. The gameplay loop uses `AISearch` instead.
+    Args:
+        board (Board): The board to make the move on.
+        playerValue (int): The player the AI plays for.
+        lastMoveTime (int, optional): pygame ticks of the AI's previous move. The move is made no sooner than AI_PERFORM_DELAY after it.
+        playerType (str, optional): "AI" for the alpha-beta search, "MCTS" for Monte Carlo Tree Search. Defaults to "AI".
+    Returns:
+        tuple[bool, bool | None, SearchStats | None]: If a valid move was made, if it won the game, and the
+            statistics of the alpha-beta search (None for MCTS).
+    """
+    
+    aiSearch = AISearch(board, playerValue, lastMoveTime=lastMoveTime, playerType=playerType)
+    wait([aiSearch.future])
+    
+    # Add a delay so that the time between each action made by an AI is at least AI_PERFORM_DELAY
+    waitTime = aiSearch.readyTime - pygame.time.get_ticks()
+    if waitTime > 0: sleep(waitTime / 1000)
+    
+    validMove, didWin = aiSearch.perform()
+    return validMove, didWin, aiSearch.stats
+
+
+
+
+# What depth takes an acceptable time based on the size of the board and win length.
+# Measured with `python -m TicTacToeGame.benchmark` (rerun it there, it takes a few minutes): the deepest search
+# where the empty board and two random openings of 4 stones (fixed by POSITION_SEED) take less than
+# AI_TIME_BUDGET on average. Depth counts the AI's own move, so minimax depth is one less.
+# "12+" means depth 12 was still fast enough, the benchmark doesn't go deeper.
+#
+# The numbers are from TicTacToeGame/benchmarkResults.jsonl, written by
+#   python -m TicTacToeGame.benchmark TicTacToeGame/benchmarkResults.jsonl
+# Its first line says when and on what it ran (one x86_64 CPU, Python 3.12.1), with AI_TIME_BUDGET 1000 ms,
+# TT_SIZE_MB 64 and one process. Compare a rerun against it with
+#   python -m TicTacToeGame.benchmark TicTacToeGame/benchmarkResults.jsonl new.jsonl
+# Times varied by about 25% between runs on that machine, so a depth can be one higher or lower on a rerun.
+# The depths don't shrink steadily with the board size: with winLength 3 the first player wins on every board
+# from 4x4. Where all three positions are decided (like on 7x7), the search proves it in a few thousand
+# positions at any depth, and one opening that is still open (like on 6x7) sets the depth of the board.
+#
+# X, Y, WinLen: Depth (average seconds at that depth)
+# 3, 3, 3: Full (0.00 s)
+# 3, 4, 3: Full (0.01 s)
+# 4, 4, 3: 12+ (0.02 s)
+# 4, 5, 3: 12+ (0.03 s)
+# 5, 5, 3: 12+ (0.11 s)
+# 5, 6, 3: 12+ (0.49 s)
+# 6, 6, 3: 9 (0.89 s)
+# 6, 7, 3: 4 (0.31 s)
+# 7, 7, 3: 12+ (0.06 s)
+# 7, 8, 3: 5 (0.54 s)
+# 8, 8, 3: 4 (0.78 s)
+# 8, 9, 3: 4 (0.90 s)
+# 9, 9, 3: 4 (0.37 s)
+# 9, 10, 3: 4 (0.67 s)
+# 10, 10, 3: 3 (0.21 s)
+# 15, 15, 3: 3 (0.26 s)
+# 20, 20, 3: 3 (0.57 s)
@@ -0,0 +1,79 @@
+from functools import lru_cache
+
+
+def getTransforms(numCellsX: int, numCellsY: int) -> list:
+    """The symmetries of the board as functions from (x, y) to the transformed (x, y).
+    Rectangular boards have 4 (identity, two mirrors and a half turn), square boards have 8.
+    The identity is always first.
+    """
+
+    maxX, maxY = numCellsX - 1, numCellsY - 1
+
+    transforms = [
+        lambda x, y: (x, y),                 # Identity
+        lambda x, y: (maxX - x, y),          # Mirror left-right
+        lambda x, y: (x, maxY - y),          # Mirror up-down
+        lambda x, y: (maxX - x, maxY - y),   # Half turn
+    ]
+
+    if numCellsX == numCellsY:
+        transforms += [
+            lambda x, y: (y, x),                 # Mirror along the main diagonal
+            lambda x, y: (maxY - y, maxX - x),   # Mirror along the other diagonal
+            lambda x, y: (maxY - y, x),          # Quarter turn
+            lambda x, y: (y, maxX - x),          # Three quarter turn
+        ]
+
+    return transforms
+
+
+@lru_cache(maxsize=None)
+def getSymmetries(numCellsX: int, numCellsY: int) -> tuple[tuple[tuple[int, ...], tuple[int, ...]], ...]:
+    """Every board symmetry as a permutation of BitBoard indices, together with its inverse.
+    Sentinel indices map to themselves.
+
+    Returns:
+        tuple: One `(permutation, inverse)` pair per symmetry, identity first.
+    """
+
+    stride = numCellsX + 1
+    size = stride * numCellsY
+
+    symmetries = []
+    for transform in getTransforms(numCellsX, numCellsY):
+        permutation = list(range(size))
+
+        for y in range(numCellsY):
+            for x in range(numCellsX):
+                newX, newY = transform(x, y)
+                permutation[y * stride + x] = newY * stride + newX
+
+        inverse = [0] * size
+        for index, newIndex in enumerate(permutation):
+            inverse[newIndex] = index
+
+        symmetries.append((tuple(permutation), tuple(inverse)))
+
+    return tuple(symmetries)
+
+
+def uniqueActions(actions: list[int], symmetries, stabilizer: list[int]) -> list[int]:
+    """Remove moves that are mirror images of another move.
+
+    Args:
+        actions (list[int]): Bit indices of the possible moves.
+        symmetries: The `(permutation, inverse)` pairs from `getSymmetries`.
+        stabilizer (list[int]): Indices of the symmetries that leave the current position unchanged.
+    Returns:
+        list[int]: The actions with only the smallest index of every group of equivalent moves kept, in the original order.
+            Only equivalent moves that are in `actions` count, so a move whose mirror images were all left out is kept.
+    """
+
+    if not stabilizer: return actions
+
+    permutations = [symmetries[i][0] for i in stabilizer]
+    actionSet = set(actions)
+    return [
+        action for action in actions
+        if all(action <= permutation[action] or permutation[action] not in actionSet for permutation in permutations)
+    ]
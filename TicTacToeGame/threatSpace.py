@@ -0,0 +1,191 @@
+from .bitboard import BitBoard, getBitIndices
+from .search import SearchTimeout, SIDE_KEY, TIME_CHECK_INTERVAL
+
+
+class ThreatSpaceSearch:
+    """Looks for a forced win that only uses threats, the way gomoku players read the board.
+
+    The attacker only plays moves that threaten something, so the defender only has a few answers, and
+    the tree stays small even on boards where alpha-beta can't get past depth 2.
+
+    - VCF (victory by continuous fours): every attacker move makes a four (a window one stone short of
+      a win). The defender has exactly one answer: block it.
+    - VCT (victory by continuous threats): the attacker may also make threes, moves that threaten a fork
+      on the next move. The defender then has more answers: any stone in the attacker's threes, or a four
+      of its own. The attacker has to win against all of them.
+
+    A line fails as soon as the defender gets a free move, or can win first. Positions that were already
+    proven or refuted are remembered, so the same threats played in another order are not searched twice.
+    """
+
+    def __init__(self, board: BitBoard, maxNodes: int = 20000, shouldStop=None):
+        """
+        Args:
+            board (BitBoard): The position to search. Moves are made and undone on it, it is unchanged afterwards.
+            maxNodes (int, optional): Give up after this many moves. Defaults to 20000.
+            shouldStop (optional): Function checked every TIME_CHECK_INTERVAL nodes. The search gives up when it returns True.
+        """
+
+        self.board = board
+        self.maxNodes = maxNodes
+        self.shouldStop = shouldStop
+
+        self.nodes = 0
+        self.exhausted = False # True if the last search gave up before it could prove or refute a win
+        self.results = {} # (key, depth, allowThrees) -> win sequence or None
+
+
+    def findWin(self, attacker: int, maxDepth: int = 12) -> list[int] | None:
+        """Look for a VCF, then for a VCT. Returns the first one found, or None (see `exhausted`)."""
+
+        sequence = self.findVCF(attacker, maxDepth)
+        if sequence is not None or self.exhausted: return sequence
+
+        return self.findVCT(attacker, maxDepth)
+
+
+    def findVCF(self, attacker: int, maxDepth: int = 12) -> list[int] | None:
+        """Forced win for the attacker (to move) with fours only.
+
+        Args:
+            attacker (int): The player to move, who is looking for a win.
+            maxDepth (int, optional): Most attacker moves in the sequence. Defaults to 12.
+        Returns:
+            list[int] | None: Bit indices of the moves of both players, ending with the winning move,
+                or None if there is no such win, or it wasn't found within the node budget (`exhausted` is set).
+        """
+        return self.search(attacker, maxDepth, allowThrees=False)
+
+
+    def findVCT(self, attacker: int, maxDepth: int = 12) -> list[int] | None:
+        """Forced win for the attacker (to move) with fours and threes. Same arguments and result as `findVCF`."""
+        return self.search(attacker, maxDepth, allowThrees=True)
+
+
+    def search(self, attacker: int, maxDepth: int, allowThrees: bool) -> list[int] | None:
+        """Iterative deepening over the number of attacker moves, so the shortest win is found first."""
+
+        board = self.board
+        numMoves = len(board.moves)
+        self.nodes = 0
+        self.exhausted = False
+
+        try:
+            for depth in range(1, maxDepth + 1):
+                sequence = self.attack(attacker, depth, allowThrees)
+                if sequence is not None: return sequence
+
+        except SearchTimeout:
+            board.undoTo(numMoves)
+            self.exhausted = True
+
+        return None
+
+
+    def countNode(self):
+        self.nodes += 1
+        if self.nodes >= self.maxNodes: raise SearchTimeout
+        if self.nodes % TIME_CHECK_INTERVAL == 0 and self.shouldStop is not None and self.shouldStop(): raise SearchTimeout
+
+
+    def getKey(self, player: int, depth: int, allowThrees: bool) -> tuple:
+        key = self.board.hash
+        if player == -1: key ^= SIDE_KEY
+        return key, depth, allowThrees
+
+
+    def attack(self, attacker: int, depth: int, allowThrees: bool) -> list[int] | None:
+        """The attacker is to move. Returns the winning sequence from here, or None."""
+
+        board = self.board
+
+        winning = board.getWinningCells(attacker)
+        if winning: return [(winning & -winning).bit_length() - 1]
+        if depth == 0: return None
+
+        key = self.getKey(attacker, depth, allowThrees)
+        if key in self.results: return self.results[key]
+
+        threats = board.getWinningCells(-attacker)
+        if threats:
+            # The defender has a four: block it. That only keeps the initiative if the block is a four itself
+            if threats & (threats - 1): return None
+            moves = [(threats & -threats).bit_length() - 1]
+        else:
+            moves = self.getThreatMoves(attacker, allowThrees)
+
+        result = None
+        for move in moves:
+            self.countNode()
+            board.makeMove(move, attacker)
+            defence = self.defend(attacker, depth - 1, allowThrees)
+            board.unmakeMove(move, attacker)
+
+            if defence is not None:
+                result = [move] + defence
+                break
+
+        self.results[key] = result
+        return result
+
+
+    def defend(self, attacker: int, depth: int, allowThrees: bool) -> list[int] | None:
+        """The defender is to move after a threat. Returns the attacker's win against the defender's
+        first answer, if the attacker wins against every answer, otherwise None."""
+
+        board = self.board
+        defender = -attacker
+
+        if board.getWinningCells(defender): return None # The defender wins first
+
+        key = self.getKey(defender, depth, allowThrees)
+        if key in self.results: return self.results[key]
+
+        winning = board.getWinningCells(attacker)
+        if winning:
+            answers = [(winning & -winning).bit_length() - 1] # Block the four. With two fours, any block loses
+        elif allowThrees and board.getForkCells(attacker):
+            defence = board.getThreatCells(attacker) | board.getThreatCells(defender)
+            answers = [action for action in board.getActions() if defence >> action & 1]
+        else:
+            return None # Nothing is threatened, the defender gets a free move
+
+        result = None
+        for answer in answers:
+            self.countNode()
+            board.makeMove(answer, defender)
+            sequence = self.attack(attacker, depth, allowThrees)
+            board.unmakeMove(answer, defender)
+
+            if sequence is None: # The defender found a way out
+                result = None
+                break
+
+            if result is None: result = [answer] + sequence
+
+        self.results[key] = result
+        return result
+
+
+    def getThreatMoves(self, attacker: int, allowThrees: bool) -> list[int]:
+        """The attacker's fours, followed (with allowThrees) by the moves that make a three: a position where
+        the attacker threatens to fork. Threes are tried with the most fork cells first."""
+
+        # Taken from the threat cells themselves, not from getActions: with a long winLength a window's empty
+        # cells can be further from its stones than CANDIDATE_DISTANCE, and getActions would leave them out
+        board = self.board
+        fourCells = board.getThreatCells(attacker)
+        fours = getBitIndices(fourCells)
+        if not allowThrees: return fours
+
+        # A three needs a stone in a window that is 3 stones short of a win
+        threes = []
+        for action in getBitIndices(board.getThreatCells(attacker, missing=3) & ~fourCells):
+            board.makeMove(action, attacker)
+            forks = board.getForkCells(attacker).bit_count()
+            board.unmakeMove(action, attacker)
+
+            if forks: threes.append((forks, action))
+
+        threes.sort(reverse=True)
+        return fours + [action for _, action in threes]
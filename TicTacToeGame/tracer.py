@@ -0,0 +1,219 @@
+import json
+import queue
+import struct
+import threading
+
+import numpy as np
+
+
+TRACE_MAGIC = b"TTTTRACE"
+TRACE_VERSION = 1
+HEADER = struct.Struct("<8sHBBBBI") # magic, version, numCellsX, numCellsY, winLength, stride, sampleEvery
+RECORD = struct.Struct("<BhhhbiiiB") # ply, depth, move, rootMove, player, alpha, beta, value, reason
+MAX_HEADER_FIELD = 255 # numCellsX, numCellsY, winLength and stride are stored in one byte each
+MAX_PLY = 255 # Ply is one byte
+MAX_MOVE = 32767 # Moves are signed 16-bit bit indices
+
+# The same layout as RECORD, to read a whole trace at once
+RECORD_DTYPE = np.dtype([
+    ("ply", "u1"), ("depth", "<i2"), ("move", "<i2"), ("rootMove", "<i2"), ("player", "i1"),
+    ("alpha", "<i4"), ("beta", "<i4"), ("value", "<i4"), ("reason", "u1"),
+])
+
+# Why the search left a node
+REASON_PV = 0 # All moves searched, the value is inside the window
+REASON_CUTOFF = 1 # A move reached beta, the other moves were skipped
+REASON_ALL = 2 # All moves searched, none reached alpha
+REASON_TT = 3 # Answered by the transposition table without searching
+REASON_WIN = 4 # The player to move wins with the move that was searched
+REASON_LEAF = 5 # Scored by the evaluation at the end of the search depth
+REASON_TERMINAL = 6 # The game is over: won, full or a dead draw
+REASON_NAMES = ["pv", "cutoff", "all", "tt", "win", "leaf", "terminal"]
+
+
+class SearchTracer:
+    """Streams the nodes of a search to a binary file, to see afterwards where a search spent its nodes.
+
+    Set it as `Search.tracer` (or pass it to `BoardCore.minimax` or `BoardCore.iterativeDeepening`) and
+    every node is recorded when the search leaves it: its ply, remaining depth, the move into it, the root move it is under, the
+    alpha-beta window, the value and the reason (REASON_*). Values are from the view of the player to move.
+
+    Records are 21 bytes, packed into a buffer that a background thread writes to the file, so the
+    search doesn't wait for the disk. To keep tracing cheap on big searches, only every `1 / sampleRate`th
+    node is recorded, and nodes deeper than `maxPly` are skipped before anything is packed.
+    Read the file back with `readTrace` or summarize it with `summarizeTrace`.
+    """
+
+    def __init__(self, path: str, sampleRate: float = 1.0, maxPly: int | None = None, bufferBytes: int = 1 << 16):
+        """
+        Args:
+            path (str): File to write the trace to. It is overwritten.
+            sampleRate (float, optional): Share of the nodes to record, rounded to 1 in every N. Defaults to 1.0.
+            maxPly (int | None, optional): Only record nodes at most this many moves below the root. None for all
+                nodes down to MAX_PLY, deeper ones can't be stored.
+            bufferBytes (int, optional): Records are handed to the writer thread in chunks of about this size.
+        """
+
+        if maxPly is not None and not 0 <= maxPly <= MAX_PLY: raise ValueError(f"maxPly must be between 0 and {MAX_PLY}, got {maxPly}")
+
+        self.sampleEvery = max(1, round(1 / sampleRate))
+        self.maxPly = MAX_PLY if maxPly is None else maxPly
+        self.bufferBytes = bufferBytes
+
+        self.nodes = 0 # Nodes offered to the tracer, recorded or not
+        self.records = 0 # Nodes recorded
+        self.buffer = bytearray()
+        self.hasHeader = False
+
+        self.file = open(path, "wb")
+        self.queue = queue.Queue(maxsize=64) # Bounded, so a slow disk slows the search down instead of filling memory
+        self.thread = threading.Thread(target=self.writeLoop, name="SearchTracer", daemon=True)
+        self.thread.start()
+
+
+    def attach(self, board):
+        """Write the header with the board size. The search calls it before the first record, later calls do nothing.
+        Raises ValueError if the board is too large for the record format."""
+
+        if self.hasHeader: return
+
+        sizes = {"numCellsX": board.numCellsX, "numCellsY": board.numCellsY, "winLength": board.winLength, "stride": board.stride}
+        for name, size in sizes.items():
+            if size > MAX_HEADER_FIELD: raise ValueError(f"Can't trace this board: {name} is {size}, the most a trace stores is {MAX_HEADER_FIELD}")
+        if board.stride * board.numCellsY - 1 > MAX_MOVE:
+            raise ValueError(f"Can't trace this board: its bit indices go past {MAX_MOVE}")
+
+        self.hasHeader = True
+        self.queue.put(HEADER.pack(TRACE_MAGIC, TRACE_VERSION, board.numCellsX, board.numCellsY, board.winLength, board.stride, self.sampleEvery))
+
+
+    def record(self, ply: int, depth: int, move: int, rootMove: int, player: int, alpha: int, beta: int, value: int, reason: int):
+        """Record a node the search is leaving. Moves are bit indices, -1 at the root."""
+
+        self.nodes += 1
+        if self.nodes % self.sampleEvery: return
+
+        self.records += 1
+        self.buffer += RECORD.pack(ply, depth, move, rootMove, player, alpha, beta, value, reason)
+        if len(self.buffer) >= self.bufferBytes: self.flush()
+
+
+    def flush(self):
+        if self.buffer:
+            self.queue.put(bytes(self.buffer))
+            self.buffer.clear()
+
+
+    def writeLoop(self):
+        while (chunk := self.queue.get()) is not None:
+            self.file.write(chunk)
+
+
+    def close(self):
+        """Write the rest of the records and close the file."""
+
+        if self.file.closed: return
+        self.flush()
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+
+def readTrace(path: str) -> tuple[dict, np.ndarray]:
+    """Read a trace file.
+
+    Returns:
+        tuple[dict, np.ndarray]: The header (numCellsX, numCellsY, winLength, stride, sampleEvery) and the
+            records as a structured array with the fields of RECORD_DTYPE.
+    """
+
+    with open(path, "rb") as file:
+        magic, version, numCellsX, numCellsY, winLength, stride, sampleEvery = HEADER.unpack(file.read(HEADER.size))
+        if magic != TRACE_MAGIC or version != TRACE_VERSION: raise ValueError(f"{path} is not a version {TRACE_VERSION} search trace")
+
+        records = np.fromfile(file, dtype=RECORD_DTYPE)
+
+    header = {"numCellsX": numCellsX, "numCellsY": numCellsY, "winLength": winLength, "stride": stride, "sampleEvery": sampleEvery}
+    return header, records
+
+
+def summarizeTrace(path: str, topMoves: int = 10) -> dict:
+    """Where the nodes of a trace went: per ply, per reason and per root move.
+
+    Returns:
+        dict: The header, the number of records, the estimated number of nodes (records times the sampling),
+            and for every ply the nodes and the count of every reason, the nodes per reason, and the
+            `topMoves` root moves with the most nodes under them as ((x, y), nodes).
+    """
+
+    header, records = readTrace(path)
+    stride = header["stride"]
+    numReasons = len(REASON_NAMES)
+
+    plies = np.bincount(records["ply"], minlength=1)
+    reasonsByPly = np.zeros((len(plies), numReasons), dtype=np.int64)
+    np.add.at(reasonsByPly, (records["ply"], records["reason"]), 1)
+
+    rootMoves = records["rootMove"][records["rootMove"] >= 0]
+    moves, counts = np.unique(rootMoves, return_counts=True)
+    order = np.argsort(-counts, kind="stable")[:topMoves]
+
+    return {
+        **header,
+        "records": len(records),
+        "estimatedNodes": len(records) * header["sampleEvery"],
+        "byPly": [
+            {"ply": ply, "nodes": int(plies[ply]), **{name: int(reasonsByPly[ply, i]) for i, name in enumerate(REASON_NAMES)}}
+            for ply in range(len(plies)) if plies[ply]
+        ],
+        "byReason": {name: int(count) for name, count in zip(REASON_NAMES, reasonsByPly.sum(axis=0))},
+        "byRootMove": [((int(moves[i]) % stride, int(moves[i]) // stride), int(counts[i])) for i in order],
+    }
+
+
+def printSummary(summary: dict):
+    total = max(1, summary["records"])
+
+    print(f"{summary['numCellsX']}x{summary['numCellsY']} k{summary['winLength']}: {summary['records']:,} records, "
+          f"1 in {summary['sampleEvery']} nodes, about {summary['estimatedNodes']:,} nodes")
+
+    print(f"\n{'Ply':>4} {'Nodes':>10} {'Share':>6} " + " ".join(f"{name:>9}" for name in REASON_NAMES))
+    for row in summary["byPly"]:
+        print(f"{row['ply']:>4} {row['nodes']:>10,} {row['nodes'] / total:>6.1%} " + " ".join(f"{row[name]:>9,}" for name in REASON_NAMES))
+
+    print("\nReasons: " + ", ".join(f"{name} {count / total:.1%}" for name, count in summary["byReason"].items()))
+
+    print("\nRoot moves with the most nodes:")
+    for (x, y), count in summary["byRootMove"]:
+        print(f"  ({x}, {y}): {count:,} ({count / total:.1%})")
+
+
+
+if __name__ == '__main__':
+    # Run from the repository root:
+    #   python -m TicTacToeGame.tracer trace.bin                summarize a trace
+    #   python -m TicTacToeGame.tracer trace.bin trace.jsonl    also write every record as a JSON line
+    import sys
+
+    printSummary(summarizeTrace(sys.argv[1]))
+
+    if len(sys.argv) == 3:
+        header, records = readTrace(sys.argv[1])
+        stride = header["stride"]
+
+        with open(sys.argv[2], "w") as file:
+            for record in records.tolist():
+                row = dict(zip(RECORD_DTYPE.names, record))
+                row["reason"] = REASON_NAMES[row["reason"]]
+                for field in ("move", "rootMove"):
+                    row[field] = None if row[field] < 0 else [row[field] % stride, row[field] // stride]
+                file.write(json.dumps(row) + "\n")
@@ -0,0 +1,81 @@
+
+# Kinds of values stored in an entry
+EXACT = 0 # The value is the exact value of the position
+LOWER = 1 # The search failed high, the real value is at least the stored value
+UPPER = 2 # The search failed low, the real value is at most the stored value
+
+ENTRY_SIZE_BYTES = 160 # Rough size of one stored entry (tuple + ints) in CPython, used to turn megabytes into slots
+
+
+class TranspositionTable:
+    """Fixed-size hash table of searched positions, indexed by Zobrist hash.
+
+    Every slot holds one entry `(key, depth, flag, value, move, generation)`. When two positions
+    map to the same slot, the one searched deepest is kept, unless the old entry is from an earlier
+    search, in which case it is always replaced. The number of slots is fixed when the table is
+    created, so memory use never grows during long sessions.
+    """
+
+    def __init__(self, sizeMB: float = 64):
+        """
+        Args:
+            sizeMB (float, optional): Approximate memory cap for the table in megabytes. Defaults to 64.
+        """
+
+        # Round the number of slots down to a power of two, so the slot index is a bit mask of the key
+        maxSlots = max(1, int(sizeMB * 1024 * 1024 / ENTRY_SIZE_BYTES))
+        self.numSlots = 1 << (maxSlots.bit_length() - 1)
+        self.indexMask = self.numSlots - 1
+
+        self.slots = [None] * self.numSlots
+        self.generation = 0
+
+        self.probes = 0
+        self.hits = 0
+
+
+    def newSearch(self):
+        """Mark the start of a new search. Entries from older searches are replaced first."""
+        self.generation += 1
+
+
+    def clear(self):
+        self.slots = [None] * self.numSlots
+        self.generation = 0
+
+
+    def probe(self, key: int):
+        """Look up a position.
+
+        Args:
+            key (int): Zobrist hash of the position.
+        Returns:
+            tuple | None: The stored `(key, depth, flag, value, move, generation)` entry, or None if the position is not stored.
+        """
+
+        self.probes += 1
+        entry = self.slots[key & self.indexMask]
+
+        if entry is None or entry[0] != key: return None
+
+        self.hits += 1
+        return entry
+
+
+    def store(self, key: int, depth: int, flag: int, value: int, move: int | None):
+        """Store the result of searching a position, using depth-preferred replacement."""
+
+        index = key & self.indexMask
+        entry = self.slots[index]
+
+        if entry is not None and entry[5] == self.generation and entry[1] > depth:
+            return # Keep the deeper entry from the current search
+
+        # Keep the known best move if this search of the same position did not find one
+        if move is None and entry is not None and entry[0] == key: move = entry[4]
+
+        self.slots[index] = (key, depth, flag, value, move, self.generation)
+
+
+    def __len__(self):
+        return sum(1 for entry in self.slots if entry is not None)
@@ -0,0 +1,85 @@
+import numpy as np
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def getLineIndices(numCellsX: int, numCellsY: int) -> np.ndarray:
+    """Flat indices into a (numCellsY, numCellsX) array for every line of the board, in all four directions of
+    `BoardCore.dirSteps` (rows, columns and both diagonals), one line after the other.
+    Lines are separated by the index `numCellsX * numCellsY`, which points at an extra 0 appended to the
+    flattened state, so that a run of stones can never continue from one line into the next.
+    """
+
+    separator = numCellsX * numCellsY
+    cells = np.arange(separator).reshape(numCellsY, numCellsX)
+
+    lines = []
+    lines += list(cells)                                    # Rows (R)
+    lines += list(cells.T)                                  # Columns (U)
+    for offset in range(-numCellsY + 1, numCellsX):
+        lines.append(np.diagonal(cells, offset))            # Down right diagonals (HUL)
+        lines.append(np.diagonal(cells[:, ::-1], offset))   # Down left diagonals (HUR)
+
+    indices = []
+    for line in lines:
+        indices.extend(line)
+        indices.append(separator)
+
+    return np.array(indices, dtype=np.intp)
+
+
+def evaluateArray(state: np.ndarray) -> int:
+    """Evaluate an int8 state array with the same scoring as `Board.evaluateState`.
+
+    Every line of L equal stones adds L^3 with the sign of its player (L stones that each add L^2).
+    The runs are found for the whole board at once: all lines are laid out in one 1D array, and the
+    start and end of every run of a player are where the difference of its 0/1 mask is +1 and -1.
+
+    Args:
+        state (np.ndarray): 2D int8 array with 1, -1 and 0 values.
+    Returns:
+        int: The score of the state, positive is good for player 1.
+    """
+
+    numCellsY, numCellsX = state.shape
+    lines = np.append(state.ravel(), 0)[getLineIndices(numCellsX, numCellsY)]
+
+    score = 0
+    for player in (1, -1):
+        isPlayer = np.concatenate(([0], lines == player, [0])).astype(np.int8)
+        edges = np.diff(isPlayer)
+
+        lengths = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+        score += player * int(np.sum(lengths.astype(np.int64) ** 3))
+
+    return score
+
+
+def evaluateState(state: list[list[int]]) -> int:
+    """Same as `evaluateArray`, for a 2D list state like `Board.state`."""
+    return evaluateArray(np.asarray(state, dtype=np.int8))
+
+
+
+if __name__ == '__main__':
+    # Benchmark against the pure Python BoardCore.evaluateState. Run from the repository root: python -m TicTacToeGame.vectorEval
+    import random
+    from timeit import timeit
+
+    from TicTacToeGame.core import BoardCore
+
+    random.seed(0)
+
+    print(f"{'Size':>8} {'Python (ms)':>12} {'NumPy (ms)':>12} {'Speedup':>8}")
+
+    for size in (5, 10, 15, 20, 30):
+        state = [[random.choice((0, 0, 1, -1)) for _ in range(size)] for _ in range(size)]
+        board = BoardCore(size, size, 5, 1, state)
+
+        assert evaluateState(state) == board.evaluateStatePython(state)
+
+        number = 20
+        pythonTime = timeit(lambda: board.evaluateStatePython(state), number=number) / number * 1000
+        numpyTime = timeit(lambda: evaluateState(state), number=number) / number * 1000
+
+        print(f"{f'{size}x{size}':>8} {pythonTime:>12.3f} {numpyTime:>12.3f} {pythonTime / numpyTime:>7.1f}x")
@@ -34,7 +34,7 @@ class Text:
                 self.center.y - self.textSurf.get_height() // 2
             )
             
-        else:
+        elif self.topLeftPos is None:
             # Default to top left corner of screen.
             self.topLeftPos = Vector2(0, 0)
         
@@ -10,27 +10,29 @@ from TicTacToeGame import mainTTTLoop
 import os
 
 
-os.environ['SDL_VIDEO_WINDOW_POS'] = '1' # Center the window on the screen
+# The AI's worker processes import this file again, so only open the window when it is run directly
+if __name__ == '__main__':
 
-clock = pygame.time.Clock()
-window = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    os.environ['SDL_VIDEO_WINDOW_POS'] = '1' # Center the window on the screen
 
+    clock = pygame.time.Clock()
+    window = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
 
-# Start screen
-pygame.display.set_caption("Select Game")
 
-while True:
- 
-    game = startScreenLoop(window, clock)
-    
-    match game:
-        case "Snake":
-            mainSnakeLoop(window, clock)
-            
-        case "Tic Tac Toe":
-            mainTTTLoop(window, clock)
+    # Start screen
+    pygame.display.set_caption("Select Game")
 
+    while True:
 
+        game = startScreenLoop(window, clock)
 
-pygame.quit()
+        match game:
+            case "Snake":
+                mainSnakeLoop(window, clock)
 
+            case "Tic Tac Toe":
+                mainTTTLoop(window, clock)
+
+
+
+    pygame.quit()
@@ -0,0 +1,97 @@
+"""Positions and a brute-force solver shared by the tests."""
+
+import random
+
+from TicTacToeGame.bitboard import BitBoard, getBitIndices
+
+
+def getEmptyCells(board: BitBoard) -> list[int]:
+    return getBitIndices(board.cellMask & ~board.occupied)
+
+
+def randomPositions(numCellsX: int, numCellsY: int, winLength: int, numStones: int, count: int, seed: int) -> list[tuple[BitBoard, int]]:
+    """Random positions nobody has won yet, with the player to move."""
+
+    rng = random.Random(seed)
+    positions = []
+
+    while len(positions) < count:
+        board = BitBoard(numCellsX, numCellsY, winLength)
+        player = 1
+        for _ in range(numStones):
+            index = rng.choice(getEmptyCells(board))
+            board.makeMove(index, player)
+            if board.hasWon(index, player): break
+            player = -player
+        else:
+            positions.append((board, player))
+
+    return positions
+
+
+def solvedPositions() -> list[tuple[BitBoard, int]]:
+    """The empty 3x3 board and random positions small enough to brute force, with wins, draws and losses to move."""
+
+    return (
+        [(BitBoard(3, 3, 3), 1)]
+        + randomPositions(3, 3, 3, 2, 6, seed=1)
+        + randomPositions(3, 3, 3, 5, 6, seed=7)
+        + randomPositions(4, 4, 3, 6, 6, seed=2)
+        + randomPositions(4, 4, 3, 7, 6, seed=5)
+        + randomPositions(4, 4, 4, 5, 4, seed=3)
+    )
+
+
+def randomWalk(board: BitBoard, rng: random.Random, steps: int, check):
+    """Make and unmake random moves on the board, calling `check(board)` after every step.
+    Stops making moves in a branch once a player has won, like the search does."""
+
+    player = 1 if len(board.moves) % 2 == 0 else -1
+    won = False
+
+    for _ in range(steps):
+        empty = getEmptyCells(board)
+        if board.moves and (won or not empty or rng.random() < 0.35):
+            index, stonePlayer = board.moves[-1]
+            board.unmakeMove(index, stonePlayer)
+            player, won = stonePlayer, False
+        elif empty:
+            index = rng.choice(empty)
+            board.makeMove(index, player)
+            won = board.hasWon(index, player)
+            player = -player
+
+        check(board)
+
+
+def bruteForce(board: BitBoard, player: int, cache: dict) -> int:
+    """Game value for the player to move (1 win, 0 draw, -1 loss), trying every empty cell."""
+
+    key = (board.stones[1], board.stones[-1], player)
+    if key in cache: return cache[key]
+
+    best = -1
+    for action in getEmptyCells(board):
+        board.makeMove(action, player)
+        if board.hasWon(action, player): value = 1
+        elif board.isFull(): value = 0
+        else: value = -bruteForce(board, -player, cache)
+        board.unmakeMove(action, player)
+
+        best = max(best, value)
+        if best == 1: break
+
+    cache[key] = best
+    return best
+
+
+def moveValue(board: BitBoard, action: int, player: int) -> int:
+    """Brute-force game value for the player of making the move."""
+
+    board.makeMove(action, player)
+    if board.hasWon(action, player): value = 1
+    elif board.isFull(): value = 0
+    else: value = -bruteForce(board, -player, {})
+    board.unmakeMove(action, player)
+
+    return value
@@ -0,0 +1,27 @@
+import pytest
+
+from TicTacToeGame.arena import getOpenings, makeTasks, playGame, eloInterval
+from TicTacToeGame.bitboard import BitBoard
+
+
+def testOpeningsSpreadOverTheBoard():
+    board = BitBoard(9, 9, 4)
+    firstStones = {opening[0] for opening in getOpenings(9, 9, 4, count=5, numMoves=2)}
+    assert firstStones - {board.centerIndex}
+
+
+def testFullSearchNeverLosesToRandom():
+    match = {"board": [3, 3, 3], "games": 6, "openingMoves": 1, "players": [{"name": "full", "depth": 9}, {"type": "random"}]}
+
+    for task in makeTasks(match):
+        result = playGame(task)
+        assert not result["illegal"]
+        assert result["winner"] != (-1 if result["first"] == "full" else 1)
+
+
+def testEloIntervalContainsTheScore():
+    elo, low, high = eloInterval(6, 2, 2)
+    assert low < elo < high and elo > 0
+
+    elo, low, high = eloInterval(0, 5, 0)
+    assert elo == 0 and low < 0 and low == pytest.approx(-high)
@@ -0,0 +1,27 @@
+import re
+from pathlib import Path
+
+from TicTacToeGame.benchmark import getPositions, runBenchmark, depthTable, loadRecords
+from TicTacToeGame.bitboard import BitBoard
+
+PACKAGE = Path(__file__).parent.parent / "TicTacToeGame"
+
+
+def testOpeningsSpreadOverTheBoard():
+    board = BitBoard(9, 9, 4)
+    firstStones = {moves[0][0] for moves in getPositions(9, 9, 4, numPositions=6)[1:]}
+    assert firstStones - {board.centerIndex}
+
+
+def testDepthTableOfAShortRun():
+    records = runBenchmark([(3, 3, 3), (4, 4, 3)], timeBudgetMS=10_000, maxDepth=3, log=None)
+
+    assert [row[:4] for row in depthTable(records)] == [(3, 3, 3, "3+"), (4, 4, 3, "3+")]
+    assert all(record["completed"] for record in records[1:])
+
+
+def testStructsTableMatchesTheResultsFile():
+    # The table in structs.py is copied from the output of: python -m TicTacToeGame.benchmark TicTacToeGame/benchmarkResults.jsonl
+    rows = re.findall(r"^# (\d+), (\d+), (\d+): (\S+) \(", (PACKAGE / "structs.py").read_text(), re.MULTILINE)
+    expected = [(str(x), str(y), str(k), depth) for x, y, k, depth, _ in depthTable(loadRecords(PACKAGE / "benchmarkResults.jsonl"))]
+    assert rows == expected
@@ -0,0 +1,94 @@
+import random
+
+from TicTacToeGame.bitboard import BitBoard
+from TicTacToeGame.search import Search
+
+from helpers import randomWalk
+
+
+def testScoreMatchesEvaluate():
+    rng = random.Random(6)
+
+    def check(board):
+        assert board.score == board.evaluate()
+
+    for numCellsX, numCellsY, winLength in [(3, 3, 3), (5, 4, 3), (7, 7, 4), (9, 9, 5)]:
+        randomWalk(BitBoard(numCellsX, numCellsY, winLength), rng, 200, check)
+
+
+def getThreatCellsByScan(board: BitBoard, player: int, missing: int) -> int:
+    """getThreatCells from a scan of every window, for live windows with a stone in them."""
+
+    cells = 0
+    for mask in board.winMasks:
+        own, other = (board.stones[player] & mask).bit_count(), (board.stones[-player] & mask).bit_count()
+        if own and not other and own == board.winLength - missing: cells |= mask
+
+    return cells & ~board.occupied
+
+
+def testThreatCellsMatchWindows():
+    rng = random.Random(15)
+
+    def check(board):
+        # Levels 1 and 3 start being tracked partway through the walk
+        for missing in ((2,) if len(board.moves) < 4 else (1, 2, 3)):
+            for player in (1, -1):
+                assert board.getThreatCells(player, missing) == getThreatCellsByScan(board, player, missing)
+
+    for numCellsX, numCellsY, winLength in [(3, 3, 3), (6, 5, 4), (9, 9, 5)]:
+        randomWalk(BitBoard(numCellsX, numCellsY, winLength), rng, 200, check)
+
+
+def testMakeAndUnmakeMatchAFreshBoard():
+    rng = random.Random(8)
+
+    def check(board):
+        # Skip some steps, so the values that are only brought up to date when read catch up over several moves
+        if rng.random() < 0.5: return
+
+        fresh = BitBoard.fromState(board.toState(), board.winLength)
+        for missing in (1, 2, 3):
+            board.trackThreats(missing)
+            fresh.trackThreats(missing)
+
+        assert board.stones == fresh.stones and board.occupied == fresh.occupied
+        assert board.score == fresh.score == board.evaluate()
+        assert board.hash == fresh.hash and board.symHashes == fresh.symHashes
+        assert board.near == fresh.near
+        assert board.windowCounts == fresh.windowCounts
+        assert board.threatWindows == fresh.threatWindows
+        assert board.numLiveWindows == fresh.numLiveWindows and board.liveCells == fresh.liveCells
+
+    for numCellsX, numCellsY, winLength in [(3, 3, 3), (4, 6, 3), (7, 7, 4), (9, 9, 4), (10, 8, 5)]:
+        randomWalk(BitBoard(numCellsX, numCellsY, winLength), rng, 300, check)
+
+
+def testLargeBoardsOnlyGenerateMovesNearStones():
+    board = BitBoard(9, 9, 4)
+    assert board.getActions() == [board.centerIndex]
+
+    board.makeMove(board.toIndex(1, 1), 1)
+    assert sorted(board.toPos(action) for action in board.getActions()) == [(x, y) for x in range(4) for y in range(4) if (x, y) != (1, 1)]
+
+    small = BitBoard(6, 6, 4) # Below CANDIDATE_MIN_CELLS every empty cell is a move
+    small.makeMove(small.toIndex(1, 1), 1)
+    assert len(small.getActions()) == 35
+
+
+def testDeadCellsAreLeftOut():
+    # One row of 4 with win length 3: the windows are cells 0-2 and 1-3
+    board = BitBoard(4, 1, 3)
+    board.makeMove(0, 1)
+    board.makeMove(1, -1)
+
+    # Window 0-2 has stones of both players, so cell 0 is dead. Cells 2 and 3 are still in the live window 1-3
+    assert board.getActions() == [2, 3] and not board.isDeadDraw()
+
+    board.makeMove(3, 1)
+    assert board.isDeadDraw() and board.numLiveWindows == 0
+    assert board.getActions() == [2] # Only dead cells left, so they are moves again
+    assert Search(board).bestAction(-1, 1) == (0, 2)
+
+    board.unmakeMove(3, 1)
+    assert board.getActions() == [2, 3] and not board.isDeadDraw()
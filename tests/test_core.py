@@ -0,0 +1,76 @@
+import pickle
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+from TicTacToeGame.core import BoardCore, Pos
+
+
+def testMinimax3x3():
+    board = BoardCore(3, 3, 3)
+    assert board.minimax(board.state, 1, depth=8) == 0
+    assert board.minimax(board.state, 1, depth=8, root=True) is not None
+
+
+def testWindowCountsMatchTheLineScan():
+    rng = random.Random(19)
+
+    for numCellsX, numCellsY, winLength in [(3, 3, 3), (5, 4, 3), (7, 6, 4), (9, 9, 5)]:
+        board = BoardCore(numCellsX, numCellsY, winLength)
+        player = 1
+
+        for _ in range(300):
+            empty = [Pos(x, y) for y in range(numCellsY) for x in range(numCellsX) if board.state[y][x] == 0]
+            if board.moveStack and (not empty or rng.random() < 0.3):
+                board.unmakeMove()
+                player = -player
+                continue
+
+            action = rng.choice(empty)
+            board.makeMove(action, player)
+
+            # The board's own state is checked with the window counts, a copy of it with a scan along the lines
+            won = board.checkHasWon(action, player)
+            assert won == board.checkHasWon(action, player, [row[:] for row in board.state])
+            assert won == board.bits.hasWon(board.bits.toIndex(action.x, action.y), player)
+            if won: board.unmakeMove()
+            else: player = -player
+
+
+def testCoreImportsWithoutPygame():
+    # A None entry in sys.modules makes every `import pygame` fail
+    code = "import sys; sys.modules['pygame'] = None; from TicTacToeGame.core import BoardCore; BoardCore(3, 3, 3)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parent.parent, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def testPickleKeepsTheStones():
+    board = BoardCore(5, 4, 3, startPlayer=-1)
+    for x, y, player in [(1, 1, 1), (2, 1, -1), (4, 3, 1)]:
+        board.makeMove(Pos(x, y), player)
+
+    copy = pickle.loads(pickle.dumps(board))
+
+    assert type(copy) is BoardCore
+    assert (copy.numCellsX, copy.numCellsY, copy.winLength, copy.startPlayer) == (5, 4, 3, -1)
+    assert copy.state == board.state and copy.state is not board.state
+    assert copy.bits.stones == board.bits.stones
+
+
+def testTranspositionTableMadeByTheFirstSearch():
+    board = BoardCore(4, 4, 3)
+    assert "transpositionTable" not in vars(board)
+
+    board.iterativeDeepening(board.state, 1, 100, 2)
+    table = vars(board)["transpositionTable"]
+    board.iterativeDeepening(board.state, 1, 100, 2)
+    assert board.transpositionTable is table and table.generation == 2
+
+
+def testIterativeDeepeningReturnsTheStats():
+    board = BoardCore(4, 4, 3)
+    action, stats = board.iterativeDeepening(board.state, 1, 60_000, 3)
+
+    assert stats.nodes > 0 and stats.depth == 4 # maxDepth counts like in minimax, one less than the moves searched
+    assert stats.pv[0] == action
@@ -0,0 +1,23 @@
+import pytest
+
+from TicTacToeGame.lazySmp import lazySmpSearch
+from TicTacToeGame.parallel import shutdownPools
+from TicTacToeGame.search import WIN_BOUND
+
+from helpers import randomPositions, bruteForce, moveValue
+
+
+@pytest.fixture(scope="module", autouse=True)
+def pools():
+    yield
+    shutdownPools(waitForWorkers=True)
+
+
+# Losses and draws to move after three stones, wins after four
+@pytest.mark.parametrize("board, player", randomPositions(3, 3, 3, 3, 4, seed=10) + randomPositions(3, 3, 3, 4, 2, seed=10))
+def testLazySmpSolvesSmallBoards(board, player):
+    expected = bruteForce(board, player, {})
+    value, action, _ = lazySmpSearch(board, player, 5000, 9, 2)
+
+    assert (value > WIN_BOUND) - (value < -WIN_BOUND) == expected
+    assert moveValue(board, action, player) == expected
@@ -0,0 +1,69 @@
+import random
+
+import numpy as np
+import pytest
+
+from TicTacToeGame import mcts
+from TicTacToeGame.bitboard import BitBoard
+from TicTacToeGame.mcts import MCTS, ROLLOUT_POLICIES, getEmptyCells
+
+
+def makeBoard(numCellsX: int, numCellsY: int, winLength: int, stones: list[tuple[int, int, int]]) -> BitBoard:
+    board = BitBoard(numCellsX, numCellsY, winLength)
+    for x, y, player in stones:
+        board.makeMove(board.toIndex(x, y), player)
+    return board
+
+
+@pytest.fixture(autouse=True)
+def seeded(monkeypatch):
+    random.seed(18)
+    monkeypatch.setattr(mcts, "_rng", np.random.default_rng(18))
+
+
+@pytest.mark.parametrize("policy", list(ROLLOUT_POLICIES))
+def testRolloutsOfTheLastMove(policy):
+    rollout = ROLLOUT_POLICIES[policy]
+
+    # X X . / O O X / X O O: the last cell completes X's top row
+    board = makeBoard(3, 3, 3, [(0, 0, 1), (1, 1, -1), (1, 0, 1), (0, 1, -1), (2, 1, 1), (1, 2, -1), (0, 2, 1), (2, 2, -1)])
+    assert list(rollout(board, 1, 8)) == [1] * 8
+    assert list(rollout(board, -1, 8)) == [0] * 8 # O can't win with it
+
+
+def testRolloutPoliciesAgree():
+    board = makeBoard(3, 3, 3, [(1, 1, 1), (0, 0, -1)])
+    rates = []
+    for rollout in ROLLOUT_POLICIES.values():
+        winners = np.asarray(rollout(board, 1, 4000))
+        rates.append([np.mean(winners == value) for value in (1, 0, -1)])
+
+    assert np.allclose(rates[0], rates[1], atol=0.04)
+
+
+def testWinsAndBlocksWithoutPlayouts():
+    # X has three on the top row and the cell after it is free
+    board = makeBoard(5, 5, 4, [(0, 0, 1), (0, 4, -1), (1, 0, 1), (2, 4, -1), (2, 0, 1)])
+    assert MCTS(board).search(1, maxPlayouts=0) == board.toIndex(3, 0)
+    assert MCTS(board).search(-1, maxPlayouts=0) == board.toIndex(3, 0)
+
+
+def testBoardUnchangedAfterSearch():
+    board = makeBoard(5, 5, 4, [(2, 2, 1)])
+    moves = list(board.moves)
+    search = MCTS(board)
+    action = search.search(-1, maxPlayouts=640)
+
+    assert action in getEmptyCells(board) and search.playouts >= 640
+    assert board.moves == moves
+
+
+@pytest.mark.parametrize("budget", [{"maxPlayouts": 0}, {"timeBudgetMS": 0}, {"stop": True}])
+def testMctsWithoutBudget(budget):
+    board = makeBoard(5, 5, 4, [(2, 2, 1)])
+
+    search = MCTS(board)
+    if budget.pop("stop", False): search.shouldStop = lambda: True
+    action = search.search(-1, **budget)
+
+    assert action in getEmptyCells(board)
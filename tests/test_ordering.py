@@ -0,0 +1,40 @@
+from TicTacToeGame.bitboard import BitBoard
+from TicTacToeGame.ordering import MoveOrdering
+
+
+def makeBoard(stones: list[tuple[int, int, int]]) -> BitBoard:
+    board = BitBoard(5, 5, 3)
+    for x, y, player in stones:
+        board.makeMove(board.toIndex(x, y), player)
+    return board
+
+
+def testWinsThenBlocksThenTheRest():
+    # X to move can win at (2, 0), O threatens to win at (2, 4)
+    board = makeBoard([(0, 0, 1), (0, 4, -1), (1, 0, 1), (1, 4, -1)])
+    actions = board.getActions()
+    ordered = MoveOrdering(board).orderMoves(actions, 1, 0)
+
+    assert sorted(ordered) == sorted(actions)
+    assert ordered[:2] == [board.toIndex(2, 0), board.toIndex(2, 4)]
+
+    # The move from the transposition table goes before everything
+    ttMove = board.toIndex(4, 2)
+    assert MoveOrdering(board).orderMoves(actions, 1, 0, ttMove)[:3] == [ttMove, board.toIndex(2, 0), board.toIndex(2, 4)]
+
+
+def testCutoffsPromoteQuietMoves():
+    board = makeBoard([(2, 2, 1)])
+    ordering = MoveOrdering(board)
+    actions = board.getActions()
+    corner = board.toIndex(0, 4)
+    assert ordering.orderMoves(actions, -1, 1)[0] != corner
+
+    # A killer at its ply, and a history score for the player at every ply
+    ordering.recordCutoff(corner, -1, 1, 3)
+    assert ordering.orderMoves(actions, -1, 1)[0] == corner
+    assert ordering.orderMoves(actions, -1, 3)[0] == corner
+    assert ordering.orderMoves(actions, 1, 3)[0] != corner
+
+    ordering.newSearch()
+    assert ordering.killers == [] and ordering.history[-1][corner] == 4 # 3 * 3, halved
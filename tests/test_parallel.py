@@ -0,0 +1,37 @@
+import multiprocessing
+
+from TicTacToeGame import parallel
+from TicTacToeGame.bitboard import BitBoard
+from TicTacToeGame.parallel import rootParallelSearch, shutdownPools, _initWorker, _searchRootMove
+from TicTacToeGame.search import Search, INF
+
+
+def testRootParallelMatchesSerialWhenForced():
+    # X threatens (2, 5): O is forced to block, and both searches extend the depth for it
+    board = BitBoard(6, 6, 4)
+    for x, y, player in [(2, 2, 1), (2, 1, -1), (2, 3, 1), (4, 4, -1), (2, 4, 1)]:
+        board.makeMove(board.toIndex(x, y), player)
+
+    try:
+        for depth in (2, 3, 4):
+            serialValue, serialAction = Search(board).bestAction(-1, depth)
+            value, action, _ = rootParallelSearch(board, -1, depth, 2)
+            shutdownPools(waitForWorkers=True) # Fresh tables, like the serial search
+            assert (value, action) == (serialValue, serialAction)
+    finally:
+        shutdownPools(waitForWorkers=True)
+
+
+def testWorkerTablesStartEverySearch(monkeypatch):
+    # Run the worker side in this process, with its own module state
+    for name in ("_sharedAlpha", "_sharedStop", "_workerTTSizeMB"): monkeypatch.setattr(parallel, name, None)
+    monkeypatch.setattr(parallel, "_workerSearches", {})
+    monkeypatch.setattr(parallel, "_workerSearchIds", {})
+
+    context = multiprocessing.get_context("spawn")
+    _initWorker(context.Value("q", -INF), context.Value("b", 0), 1)
+
+    position = (4, 4, 3, ())
+    for searchId, generation in [(1, 1), (1, 1), (2, 2), (2, 2), (3, 3)]:
+        _searchRootMove(position, 5, 1, 2, None, searchId)
+        assert parallel._workerSearches[(4, 4, 3)].tt.generation == generation
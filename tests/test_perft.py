@@ -0,0 +1,34 @@
+import pytest
+
+from TicTacToeGame.core import BoardCore, Pos
+from TicTacToeGame.perft import ENGINES, KNOWN_3X3, perft
+
+
+@pytest.mark.parametrize("engine", list(ENGINES))
+def testPerftMatchesKnownCounts(engine):
+    result = perft(BoardCore(3, 3, 3), 1, 6, engine)
+
+    assert result.nodes == KNOWN_3X3["nodes"][:6]
+    assert result.wins == KNOWN_3X3["wins"][:6]
+    assert result.draws == KNOWN_3X3["draws"][:6]
+
+
+def testPerftEnginesAgree():
+    counts = {engine: perft(BoardCore(4, 4, 3), 1, 4, engine)[:3] for engine in ENGINES}
+    assert len(set(map(str, counts.values()))) == 1
+
+
+def testPerftFull3x3():
+    result = perft(BoardCore(3, 3, 3), 1, 9, "bitboard")
+    assert result.nodes == KNOWN_3X3["nodes"] and result.games == 255168
+
+
+def testPerftFromAPositionLeavesItUnchanged():
+    board = BoardCore(4, 4, 3)
+    for x, y, player in [(1, 1, 1), (2, 1, -1), (0, 3, 1)]:
+        board.makeMove(Pos(x, y), player)
+    state = [row[:] for row in board.state]
+
+    counts = {str(perft(board, -1, 4, engine)[:3]) for engine in ENGINES}
+    assert len(counts) == 1
+    assert board.state == state and perft(board, -1, 1).nodes == [13]
@@ -0,0 +1,35 @@
+import pytest
+
+from TicTacToeGame.bitboard import BitBoard
+from TicTacToeGame.proofNumber import ProofNumberSearch, WIN, DRAW, LOSS, UNKNOWN
+from TicTacToeGame.setup import CANDIDATE_DISTANCE
+
+from helpers import solvedPositions, bruteForce, moveValue
+
+
+@pytest.mark.parametrize("board, player", solvedPositions())
+def testMatchesBruteForce(board, player):
+    expected = bruteForce(board, player, {})
+    moves = list(board.moves)
+    status, action, _, _ = ProofNumberSearch(board).solve(player)
+
+    assert status == {1: WIN, 0: DRAW, -1: LOSS}[expected]
+    assert board.moves == moves
+    if expected != -1: assert moveValue(board, action, player) == expected
+
+
+def testGivesUpAtTheNodeBudget():
+    board = BitBoard(7, 7, 4)
+    status, action, nodes, _ = ProofNumberSearch(board, maxNodes=50).solve(1)
+
+    assert (status, action) == (UNKNOWN, None) and nodes <= 50
+    assert board.moves == [] and board.candidateDistance == CANDIDATE_DISTANCE # Lifted while solving, then restored
+
+
+def testDrawProvenWithoutSearch():
+    # Every window holds stones of both players, so any move keeps the draw
+    board = BitBoard(4, 1, 3)
+    for index, player in [(0, 1), (1, -1), (3, 1)]:
+        board.makeMove(index, player)
+
+    assert ProofNumberSearch(board).solve(-1)[:2] == (DRAW, 2)
@@ -0,0 +1,82 @@
+import json
+from time import perf_counter
+
+import pytest
+
+from TicTacToeGame.bitboard import BitBoard
+from TicTacToeGame.search import Search, WIN_SCORE, WIN_BOUND
+
+from helpers import solvedPositions, bruteForce, moveValue
+
+
+@pytest.mark.parametrize("board, player", solvedPositions())
+def testMinimaxMatchesBruteForce(board, player):
+    expected = bruteForce(board, player, {})
+    value, action = Search(board).bestAction(player, board.countEmpty())
+
+    assert (value > WIN_BOUND) - (value < -WIN_BOUND) == expected
+    if expected == 0: assert value == 0
+    assert moveValue(board, action, player) == expected # The chosen move keeps the value
+
+
+
+def testThreatsExtendPastTheHorizon():
+    # X makes an open three and O can only block one end. The win is three moves away, and a search of depth 2
+    # only sees it because the forced block doesn't use up depth
+    board = BitBoard(7, 7, 4)
+    for x, y, player in [(2, 3, 1), (0, 0, -1), (3, 3, 1), (6, 6, -1)]:
+        board.makeMove(board.toIndex(x, y), player)
+
+    value, action = Search(board).bestAction(1, 2)
+
+    assert value == WIN_SCORE - 2
+    assert action in (board.toIndex(1, 3), board.toIndex(4, 3))
+
+
+def testIterativeDeepeningKeepsToTheBudget():
+    board = BitBoard(15, 15, 5)
+    board.makeMove(board.toIndex(7, 7), 1)
+
+    startTime = perf_counter()
+    _, action, depth = Search(board).iterativeDeepening(-1, 200, 30)
+
+    assert perf_counter() - startTime < 1 # The clock is checked every TIME_CHECK_INTERVAL nodes
+    assert action is not None and 1 <= depth < 30
+    assert board.moves == [(board.toIndex(7, 7), 1)]
+
+
+@pytest.mark.parametrize("board, player", solvedPositions()[::4])
+def testIterativeDeepeningSolvesSmallBoards(board, player):
+    value, action, _ = Search(board).iterativeDeepening(player, 60_000)
+
+    expected = bruteForce(board, player, {})
+    assert (value > WIN_BOUND) - (value < -WIN_BOUND) == expected
+    assert moveValue(board, action, player) == expected
+
+
+def testStatsOfIterativeDeepening():
+    board = BitBoard(5, 5, 4)
+    board.makeMove(board.toIndex(2, 2), 1)
+    search = Search(board)
+    _, action, depth = search.iterativeDeepening(-1, 60_000, 4)
+    stats = search.stats
+
+    assert [entry[0] for entry in stats.depths] == [1, 2, 3, 4] and stats.depth == depth == 4
+    assert stats.nodes == search.nodes == sum(nodes for _, _, nodes in stats.depths)
+    assert stats.leafEvals > 0 and sum(stats.cutoffs.values()) > 0
+    assert 0 < stats.ttHits <= stats.ttProbes and 0 <= stats.firstMoveCutoffRate <= 1
+    assert stats.pv[0] == board.toPos(action) and len(stats.pv) <= depth
+
+    assert json.loads(json.dumps(stats.toDict()))["depths"][-1][0] == 4
+    assert len(stats.summaryLines()) == 6
+
+
+def testStatsStartOverEverySearch():
+    board = BitBoard(4, 4, 3)
+    search = Search(board)
+    search.bestAction(1, 3)
+    firstNodes = search.nodes
+
+    search.bestAction(1, 4)
+    assert search.stats.nodes == search.nodes - firstNodes
+    assert search.stats.depths[0][0] == 4 and search.stats.depths[0][2] == search.stats.nodes
@@ -0,0 +1,60 @@
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # No window needed
+
+from TicTacToeGame.core import BoardCore
+from TicTacToeGame.setup import AI_PERFORM_DELAY
+from TicTacToeGame.structs import AISearch, AIPonder
+
+
+class HeadlessBoard(BoardCore):
+    """The part of structs.Board the AI threads use, without textures."""
+
+    def performAction(self, action, player) -> bool:
+        if self.state[action.y][action.x] != 0: return False
+        self.makeMove(action, player)
+        return True
+
+
+def makeBoard(numCellsX: int, numCellsY: int, winLength: int, stones: list[tuple[int, int, int]]) -> HeadlessBoard:
+    board = HeadlessBoard(numCellsX, numCellsY, winLength)
+    for x, y, player in stones:
+        board.performAction(board.toAction(x, y), player)
+    return board
+
+
+def testAISearchMakesTheWinningMove():
+    board = makeBoard(3, 3, 3, [(0, 0, 1), (1, 1, -1), (1, 0, 1), (2, 2, -1)])
+    search = AISearch(board, 1, lastMoveTime=-AI_PERFORM_DELAY)
+    search.future.result(timeout=10)
+
+    assert search.isReady()
+    assert search.perform() == (True, True)
+    assert board.state[0][2] == 1 and search.stats.nodes > 0
+
+
+def testCancelStopsTheSearch():
+    board = makeBoard(15, 15, 5, [(7, 7, 1)])
+    state = [row[:] for row in board.state]
+    search = AISearch(board, -1)
+
+    time.sleep(0.05)
+    startTime = time.perf_counter()
+    search.cancel()
+
+    assert time.perf_counter() - startTime < 1
+    assert board.state == state
+
+
+def testPonderFillsTheTranspositionTable():
+    board = makeBoard(5, 5, 4, [(2, 2, 1)])
+    state = [row[:] for row in board.state]
+    ponder = AIPonder(board, -1)
+
+    time.sleep(0.2)
+    ponder.stop()
+
+    assert ponder.future.done() and ponder.future.exception() is None
+    assert len(board.transpositionTable) > 0
+    assert board.state == state
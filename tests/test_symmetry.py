@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from TicTacToeGame.bitboard import BitBoard
+from TicTacToeGame.search import Search
+
+from helpers import randomPositions, randomWalk
+
+
+def mirrored(board: BitBoard, permutation: tuple[int, ...]) -> BitBoard:
+    """A new board with every stone moved by the symmetry."""
+
+    copy = BitBoard(board.numCellsX, board.numCellsY, board.winLength)
+    for index, player in board.moves:
+        copy.makeMove(permutation[index], player)
+
+    return copy
+
+
+@pytest.mark.parametrize("numCellsX, numCellsY", [(3, 3), (4, 3), (5, 5), (6, 4)])
+def testCanonicalHashSharedByMirrors(numCellsX, numCellsY):
+    for board, _ in randomPositions(numCellsX, numCellsY, 3, 4, 5, seed=numCellsX * numCellsY):
+        key, _ = board.canonicalHash()
+
+        for permutation, _ in board.symmetries:
+            assert mirrored(board, permutation).canonicalHash()[0] == key
+
+
+def testSymHashesFollowMakeAndUnmake():
+    rng = random.Random(3)
+
+    def check(board):
+        fresh = BitBoard.fromState(board.toState(), board.winLength)
+        assert board.symHashes == fresh.symHashes
+        assert board.symHashes[0] == board.hash
+
+    for numCellsX, numCellsY in [(3, 3), (5, 4), (6, 6)]:
+        randomWalk(BitBoard(numCellsX, numCellsY, 3), rng, 150, check)
+
+
+def testStabilizerOfSymmetricPosition():
+    board = BitBoard(5, 5, 3)
+    assert len(board.getStabilizer()) == 7 # The empty square board is unchanged by every symmetry
+
+    board.makeMove(board.toIndex(0, 0), 1)
+    assert len(board.getStabilizer()) == 1 # Only the mirror along the main diagonal keeps the corner
+
+
+def testSearchSharesMirroredPositions():
+    # After a corner opening, the two mirror-image replies along the diagonal are searched once
+    board = BitBoard(4, 4, 3)
+    board.makeMove(board.toIndex(0, 0), 1)
+    actions, _ = Search(board).getOrderedActions(-1)
+
+    assert board.toIndex(1, 0) in actions or board.toIndex(0, 1) in actions
+    assert not (board.toIndex(1, 0) in actions and board.toIndex(0, 1) in actions)
+
+
+def testEmptyEvenBoardHasMoves():
+    # The center of an even board isn't the smallest of its mirror images, but it is the only candidate
+    for size in (8, 10):
+        _, action = Search(BitBoard(size, size, 4)).bestAction(1, 2)
+        assert action is not None
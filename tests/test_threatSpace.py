@@ -0,0 +1,50 @@
+import pytest
+
+from TicTacToeGame.bitboard import BitBoard
+from TicTacToeGame.search import Search, WIN_BOUND
+from TicTacToeGame.threatSpace import ThreatSpaceSearch
+
+from helpers import randomPositions
+
+
+def replay(board: BitBoard, sequence: list[int], attacker: int) -> bool:
+    """Play the sequence, attacker first, and check that its last move wins. The board is left as it was."""
+
+    player = attacker
+    for index in sequence:
+        board.makeMove(index, player)
+        player = -player
+
+    won = board.hasWon(sequence[-1], attacker)
+    for _ in sequence: board.unmakeMove(*board.moves[-1])
+    return won
+
+
+def testOpenThreeWinsWithFours():
+    board = BitBoard(15, 15, 5)
+    for x, y, player in [(5, 7, 1), (6, 6, -1), (6, 7, 1), (9, 9, -1), (7, 7, 1), (3, 3, -1)]:
+        board.makeMove(board.toIndex(x, y), player)
+    moves = list(board.moves)
+
+    search = ThreatSpaceSearch(board)
+    sequence = search.findVCF(1)
+
+    assert sequence is not None and len(sequence) == 3 and replay(board, sequence, 1)
+    assert board.moves == moves and not search.exhausted
+
+
+def testNoWinFromOneStone():
+    board = BitBoard(15, 15, 5)
+    board.makeMove(board.toIndex(7, 7), 1)
+    search = ThreatSpaceSearch(board)
+
+    assert search.findWin(1) is None and not search.exhausted
+
+
+@pytest.mark.parametrize("board, player", randomPositions(9, 9, 4, 10, 8, seed=16))
+def testWinsAreConfirmedByAlphaBeta(board, player):
+    sequence = ThreatSpaceSearch(board).findWin(player, maxDepth=3)
+    if sequence is None: return
+
+    assert replay(board, sequence, player)
+    assert Search(board).bestAction(player, len(sequence))[0] > WIN_BOUND
@@ -0,0 +1,46 @@
+import pytest
+
+from TicTacToeGame.bitboard import BitBoard
+from TicTacToeGame.core import BoardCore
+from TicTacToeGame.search import Search
+from TicTacToeGame.tracer import SearchTracer, readTrace, REASON_NAMES
+
+
+def testTracerRoundTrip(tmp_path):
+    path = tmp_path / "trace.bin"
+    board = BitBoard(4, 4, 3)
+    search = Search(board)
+
+    # Set straight on the search, without BoardCore writing the header
+    with SearchTracer(path) as tracer:
+        search.tracer = tracer
+        value, _ = search.bestAction(1, 4)
+
+    header, records = readTrace(path)
+    assert (header["numCellsX"], header["numCellsY"], header["winLength"], header["stride"]) == (4, 4, 3, board.stride)
+    assert len(records) == tracer.records == tracer.nodes
+    assert records["reason"].max() < len(REASON_NAMES)
+
+    root = records[-1]
+    assert root["ply"] == 0 and root["move"] == -1 and root["value"] == value
+
+
+def testTracerThroughIterativeDeepening(tmp_path):
+    path = tmp_path / "trace.bin"
+    board = BoardCore(5, 5, 4)
+
+    with SearchTracer(path, maxPly=2) as tracer:
+        action, _ = board.iterativeDeepening(board.state, 1, 200, 3, tracer=tracer)
+
+    _, records = readTrace(path)
+    assert action is not None and len(records) == tracer.records > 0
+    assert records["ply"].max() <= 2
+
+
+def testTracerRejectsBoardsTooLarge(tmp_path):
+    with SearchTracer(tmp_path / "trace.bin") as tracer:
+        with pytest.raises(ValueError):
+            tracer.attach(BitBoard(256, 3, 3))
+
+    with pytest.raises(ValueError):
+        SearchTracer(tmp_path / "trace.bin", maxPly=256)
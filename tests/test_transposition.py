@@ -0,0 +1,56 @@
+from TicTacToeGame.bitboard import BitBoard
+from TicTacToeGame.transposition import TranspositionTable, EXACT, LOWER, ENTRY_SIZE_BYTES
+
+
+def testStoreAndProbe():
+    table = TranspositionTable(1)
+    table.store(12345, 4, EXACT, 17, 8)
+
+    assert table.probe(12345) == (12345, 4, EXACT, 17, 8, 0)
+    assert table.probe(12345 + table.numSlots) is None # Same slot, different position
+    assert (table.probes, table.hits) == (2, 1)
+
+
+def testDeeperEntryKeptWithinASearch():
+    table = TranspositionTable(1)
+    key, other = 7, 7 + table.numSlots
+
+    table.store(key, 6, EXACT, 1, 3)
+    table.store(other, 2, LOWER, 2, 4)
+    assert table.probe(key)[1] == 6 and table.probe(other) is None
+
+    # Entries from an earlier search are replaced whatever their depth
+    table.newSearch()
+    table.store(other, 2, LOWER, 2, 4)
+    assert table.probe(other) == (other, 2, LOWER, 2, 4, 1)
+
+
+def testBestMoveKeptWhenNoneFound():
+    table = TranspositionTable(1)
+    table.store(5, 2, EXACT, 0, 9)
+    table.newSearch()
+    table.store(5, 3, LOWER, 4, None)
+
+    assert table.probe(5)[4] == 9
+
+
+def testSizeIsFixed():
+    table = TranspositionTable(1)
+    assert table.numSlots & (table.numSlots - 1) == 0
+    assert table.numSlots * ENTRY_SIZE_BYTES <= 1024 * 1024
+
+    for key in range(3 * table.numSlots):
+        table.store(key, 1, EXACT, 0, None)
+    assert len(table) == table.numSlots
+
+
+def testHashDependsOnlyOnTheStones():
+    a, b = BitBoard(4, 4, 3), BitBoard(4, 4, 3)
+    moves = [(0, 1), (5, -1), (11, 1), (3, -1)]
+
+    for index, player in moves: a.makeMove(index, player)
+    for index, player in reversed(moves): b.makeMove(index, player)
+    assert a.hash == b.hash != 0
+
+    a.undoTo(0)
+    assert a.hash == 0
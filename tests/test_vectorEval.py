@@ -0,0 +1,14 @@
+import pytest
+
+from TicTacToeGame import vectorEval
+from TicTacToeGame.core import BoardCore
+
+from helpers import randomPositions
+
+
+@pytest.mark.parametrize("numCellsX, numCellsY", [(3, 3), (7, 5), (10, 10), (12, 9)])
+def testMatchesTheLineScan(numCellsX, numCellsY):
+    for board, _ in randomPositions(numCellsX, numCellsY, 4, numCellsX * numCellsY // 3, 4, seed=numCellsX + numCellsY):
+        state = board.toState()
+        core = BoardCore(numCellsX, numCellsY, 4)
+        assert vectorEval.evaluateState(state) == core.evaluateStatePython(state) == board.evaluate()